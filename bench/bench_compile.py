@@ -0,0 +1,69 @@
+"""
+Benchmark of compiled commands against the interpreter.
+
+For each command it times eval_command, which looks up the parsed
+command in the parse cache and walks its eval tree, and the callable
+returned by compile_command, on the same engine.
+
+Usage: python bench/bench_compile.py [--runs N]
+"""
+
+import argparse
+import io
+import os
+import sys
+import time
+
+SRC_DIR = os.path.join(os.path.dirname(os.path.dirname(
+    os.path.abspath(__file__))), "src")
+sys.path.insert(0, SRC_DIR)
+
+from core.api import (  # noqa: E402
+    compile_command, create_shell_engine, eval_command)
+
+COMMANDS = [
+    "echo hello world",
+    "echo 'a b' \"c d\" e f g h i j",
+    "echo $x $y",
+    "echo \"$x-$y\" | cat",
+    "echo `echo a` b",
+    "echo a | cat | cat | cat",
+]
+
+
+def best_time(function, runs: int) -> float:
+    """
+    Get the best time of a call of the function in batches, in seconds.
+    """
+    best = float("inf")
+    for _ in range(5):
+        start = time.perf_counter()
+        for _ in range(runs):
+            function()
+        best = min(best, (time.perf_counter() - start) / runs)
+    return best
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n")[1])
+    parser.add_argument("--runs", type=int, default=2000)
+    args = parser.parse_args()
+    output = io.StringIO()
+    engine = create_shell_engine(output_stream=output,
+                                 parser_backend="descent")
+    eval_command(engine, "set x 1; set y 2")
+    print(f"{'command':<36}{'interpreted':>12}{'compiled':>12}"
+          f"{'speedup':>10}")
+    for command in COMMANDS:
+        compiled = compile_command(engine, command)
+        interpreted = best_time(lambda: eval_command(engine, command),
+                                args.runs)
+        compiled = best_time(compiled, args.runs)
+        output.seek(0)
+        output.truncate()
+        print(f"{command:<36}{interpreted * 1e6:>9.1f} us"
+              f"{compiled * 1e6:>9.1f} us{interpreted / compiled:>9.2f}x")
+
+
+if __name__ == "__main__":
+    main()
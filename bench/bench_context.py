@@ -0,0 +1,71 @@
+"""
+Benchmark of the layered Context with many variables and deep pipes.
+
+For engines holding more and more variables set with set, it times
+a pipe of many stages, commands with substitutions, each creating
+child contexts, and a lookup of a variable through a deep chain of
+child contexts. With the layered context these don't depend on the
+number of variables.
+
+Usage: python bench/bench_context.py [--runs N]
+"""
+
+import argparse
+import io
+import os
+import sys
+import time
+
+SRC_DIR = os.path.join(os.path.dirname(os.path.dirname(
+    os.path.abspath(__file__))), "src")
+sys.path.insert(0, SRC_DIR)
+
+from core.api import create_shell_engine, eval_command  # noqa: E402
+from core.runtime import Context  # noqa: E402
+
+VARIABLE_COUNTS = (0, 1000, 10000)
+PIPE = "echo a" + " | cat" * 30
+SUBSTITUTIONS = "echo `echo $V1` `echo b` `echo c`"
+DEPTH = 100
+
+
+def mean_time(function, runs: int) -> float:
+    """
+    Get the mean time of a call of the function, in seconds.
+    """
+    start = time.perf_counter()
+    for _ in range(runs):
+        function()
+    return (time.perf_counter() - start) / runs
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n")[1])
+    parser.add_argument("--runs", type=int, default=200)
+    args = parser.parse_args()
+    print(f"{'variables':>10}{'set (us)':>12}{'31 stages (ms)':>16}"
+          f"{'3 substitutions (us)':>22}{'depth 100 get (us)':>20}")
+    for count in VARIABLE_COUNTS:
+        output = io.StringIO()
+        engine = create_shell_engine(output_stream=output,
+                                     parser_backend="descent")
+        start = time.perf_counter()
+        for index in range(count):
+            eval_command(engine, f"set V{index} value{index}")
+        set_time = (f"{(time.perf_counter() - start) / count * 1e6:.1f}"
+                    if count else "-")
+        pipe_time = mean_time(lambda: eval_command(engine, PIPE), args.runs)
+        substitution_time = mean_time(
+            lambda: eval_command(engine, SUBSTITUTIONS), args.runs)
+        context = Context()
+        for index in range(count):
+            context.set(f"V{index}", f"value{index}")
+        for _ in range(DEPTH):
+            context = context.copy()
+        get_time = mean_time(lambda: context.get("V1"), args.runs * 10)
+        print(f"{count:>10}{set_time:>12}{pipe_time * 1e3:>16.2f}"
+              f"{substitution_time * 1e6:>22.1f}{get_time * 1e6:>20.2f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,98 @@
+"""
+Benchmark of the latency of a command run by the shell daemon.
+
+For each command it times a new shell.py -c process, a new client.py
+process sending the command to a daemon started by shell.py -d, and
+eval_command on an engine of this process, which is the lower bound.
+
+Usage: python bench/bench_daemon.py [--runs N]
+"""
+
+import argparse
+import io
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+SRC_DIR = os.path.join(os.path.dirname(os.path.dirname(
+    os.path.abspath(__file__))), "src")
+sys.path.insert(0, SRC_DIR)
+
+from core.api import create_shell_engine, eval_command  # noqa: E402
+
+COMMANDS = [
+    "echo hello",
+    "cat shell.py | grep import | wc -l",
+    "sort shell.py | uniq | head -n 3",
+]
+
+
+def process_time(args: list) -> float:
+    """
+    Get the time of a new process running the arguments, in seconds.
+    """
+    start = time.perf_counter()
+    subprocess.run([sys.executable] + args, cwd=SRC_DIR, check=True,
+                   stdin=subprocess.DEVNULL, stdout=subprocess.DEVNULL)
+    return time.perf_counter() - start
+
+
+def start_daemon(socket_path: str) -> subprocess.Popen:
+    """
+    Start the daemon and wait until it listens on the socket.
+    """
+    daemon = subprocess.Popen([sys.executable, "shell.py", "-d",
+                               socket_path], cwd=SRC_DIR,
+                              stdin=subprocess.DEVNULL)
+    deadline = time.monotonic() + 30
+    while not os.path.exists(socket_path):
+        if daemon.poll() is not None or time.monotonic() > deadline:
+            daemon.kill()
+            raise RuntimeError("the daemon didn't start")
+        time.sleep(0.05)
+    return daemon
+
+
+def in_process_time(engine, command: str) -> float:
+    """
+    Get the time of the command evaluated by the engine, in seconds.
+    """
+    start = time.perf_counter()
+    eval_command(engine, command, io.StringIO())
+    return time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n")[1])
+    parser.add_argument("--runs", type=int, default=20)
+    args = parser.parse_args()
+    os.chdir(SRC_DIR)
+    engine = create_shell_engine(parser_backend="descent")
+    with tempfile.TemporaryDirectory() as tmp:
+        socket_path = os.path.join(tmp, "daemon.sock")
+        daemon = start_daemon(socket_path)
+        try:
+            print(f"median of {args.runs} runs, in ms")
+            print(f"{'command':<36}{'shell.py -c':>12}{'client.py':>12}"
+                  f"{'in process':>12}")
+            for command in COMMANDS:
+                cases = [
+                    lambda: process_time(["shell.py", "-c", command]),
+                    lambda: process_time(["client.py", "-S", socket_path,
+                                          "-c", command]),
+                    lambda: in_process_time(engine, command),
+                ]
+                times = [statistics.median(case() for _ in range(args.runs))
+                         for case in cases]
+                print(f"{command:<36}"
+                      + "".join(f"{t * 1e3:>12.2f}" for t in times))
+        finally:
+            daemon.terminate()
+            daemon.wait()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,112 @@
+"""
+Benchmark of the grep throughput on a large synthetic log.
+
+It writes a log of the given size, then times grep with literal and
+regular expression patterns, matching few or most lines, and with its
+options, as text and as bytes. The output is redirected to a file.
+The throughput is the size of the log divided by the best time.
+The scaling of grep -j is measured with growing numbers of processes,
+the start of the process pool is left out by the best time.
+
+Usage: python bench/bench_grep.py [--size MB] [--runs N] [--jobs N ...]
+"""
+
+import argparse
+import os
+import random
+import sys
+import tempfile
+import time
+
+SRC_DIR = os.path.join(os.path.dirname(os.path.dirname(
+    os.path.abspath(__file__))), "src")
+sys.path.insert(0, SRC_DIR)
+
+from core.api import create_shell_engine, eval_command  # noqa: E402
+
+CASES = [
+    ("literal sparse", "ERROR"),
+    ("literal dense", "INFO"),
+    ("regex sparse", "'timeout after [0-9]+ ms'"),
+    ("regex anchored", "'^2026-10-18T0[0-3]'"),
+    ("no match", "FATAL"),
+    ("-c literal", "-c ERROR"),
+    ("-i regex", "-i 'error.*db'"),
+    ("-v literal", "-v INFO"),
+    ("-l literal", "-l ERROR"),
+    ("-m 10", "-m 10 ERROR"),
+]
+PARALLEL_CASES = [
+    ("literal dense", "INFO"),
+    ("regex sparse", "'timeout after [0-9]+ ms'"),
+]
+LEVELS = ["INFO"] * 90 + ["WARN"] * 8 + ["ERROR"] * 2
+COMPONENTS = ["db", "auth", "http", "cache"]
+MESSAGES = [
+    "request completed in {} ms",
+    "cache miss for key k{}",
+    "retrying connection attempt {}",
+    "timeout after {} ms",
+]
+
+
+def write_log(path: str, size: int):
+    """
+    Write a synthetic log of about size bytes, one event per second.
+    """
+    generator = random.Random(0)
+    written = 0
+    second = 0
+    with open(path, "w") as f:
+        while written < size:
+            lines = []
+            for _ in range(1000):
+                hours, rest = divmod(second % 86400, 3600)
+                message = generator.choice(MESSAGES).format(
+                    generator.randrange(100000))
+                lines.append(
+                    f"2026-10-18T{hours:02}:{rest // 60:02}:{rest % 60:02}Z "
+                    f"{generator.choice(LEVELS)} "
+                    f"[{generator.choice(COMPONENTS)}] {message} "
+                    f"req_id={generator.getrandbits(64):016x}\n")
+                second += 1
+            block = "".join(lines)
+            f.write(block)
+            written += len(block)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n")[1])
+    parser.add_argument("--size", type=int, default=100)
+    parser.add_argument("--runs", type=int, default=3)
+    parser.add_argument("--jobs", type=int, nargs="+", default=[1, 2, 4])
+    args = parser.parse_args()
+    with tempfile.TemporaryDirectory() as tmp:
+        log = os.path.join(tmp, "synthetic.log")
+        output = os.path.join(tmp, "output.txt")
+        write_log(log, args.size << 20)
+        size = os.path.getsize(log) / 1e6
+        print(f"{size:.0f} MB log, best of {args.runs} runs")
+        print(f"{'mode':<6}{'case':<24}{'time (ms)':>12}{'MB/s':>10}"
+              f"{'output (MB)':>13}")
+        for bytes_mode in (False, True):
+            engine = create_shell_engine(parser_backend="descent",
+                                         bytes_mode=bytes_mode)
+            cases = list(CASES)
+            for jobs in args.jobs:
+                cases += [(f"-j {jobs} {name}", f"-j {jobs} {pattern}")
+                          for name, pattern in PARALLEL_CASES]
+            for name, pattern in cases:
+                command = f"grep {pattern} {log} > {output}"
+                best = float("inf")
+                for _ in range(args.runs):
+                    start = time.perf_counter()
+                    eval_command(engine, command)
+                    best = min(best, time.perf_counter() - start)
+                print(f"{'bytes' if bytes_mode else 'text':<6}{name:<24}"
+                      f"{best * 1e3:>12.0f}{size / best:>10.1f}"
+                      f"{os.path.getsize(output) / 1e6:>13.1f}")
+
+
+if __name__ == "__main__":
+    main()
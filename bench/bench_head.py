@@ -0,0 +1,72 @@
+"""
+Benchmark of head on files of growing sizes.
+
+head -n and head -c stop reading after the lines or bytes they write,
+so their time and peak memory must not depend on the size of the file,
+also when head reads a pipe. head -n with a negative count only keeps
+the count last lines in memory.
+
+Usage: python bench/bench_head.py [--sizes MB ...]
+"""
+
+import argparse
+import io
+import os
+import sys
+import tempfile
+import time
+import tracemalloc
+
+SRC_DIR = os.path.join(os.path.dirname(os.path.dirname(
+    os.path.abspath(__file__))), "src")
+sys.path.insert(0, SRC_DIR)
+
+from core.api import create_shell_engine, eval_command  # noqa: E402
+
+COMMANDS = [
+    "head -n 10 {}",
+    "head -c 100 {}",
+    "cat {} | head -n 10",
+    "head -n -10 {} | head -n 5",
+]
+LINE = "2026-10-18T12:00:00 INFO request served in 12 ms\n"
+
+
+def write_file(path: str, size: int):
+    """
+    Write a log file of about size bytes.
+    """
+    block = LINE * ((1 << 20) // len(LINE))
+    with open(path, "w") as f:
+        for _ in range(max(size // len(block), 1)):
+            f.write(block)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n")[1])
+    parser.add_argument("--sizes", type=int, nargs="+",
+                        default=[1, 10, 100])
+    args = parser.parse_args()
+    engine = create_shell_engine(parser_backend="descent")
+    print(f"{'size (MB)':>10}  {'command':<28}{'time (ms)':>12}"
+          f"{'peak (KiB)':>12}")
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "big.log")
+        for size in args.sizes:
+            write_file(path, size << 20)
+            # import the apps before the measures
+            eval_command(engine, f"head -n 1 {path}", io.StringIO())
+            for command in COMMANDS:
+                command = command.format(path)
+                tracemalloc.start()
+                start = time.perf_counter()
+                eval_command(engine, command, io.StringIO())
+                elapsed = time.perf_counter() - start
+                peak = tracemalloc.get_traced_memory()[1]
+                tracemalloc.stop()
+                print(f"{size:>10}  {command.replace(path, 'FILE'):<28}"
+                      f"{elapsed * 1e3:>12.2f}{peak / 1024:>12.1f}")
+
+
+if __name__ == "__main__":
+    main()
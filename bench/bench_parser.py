@@ -0,0 +1,78 @@
+"""
+Benchmark of the parser backends, "earley" and "descent".
+
+For each backend it measures the first parse in a new interpreter,
+which includes importing the parser and building the grammar, and the
+time per parse of typical commands and of long pipes, without the
+parse cache.
+
+Usage: python bench/bench_parser.py [--repeat N]
+"""
+
+import argparse
+import os
+import subprocess
+import sys
+import time
+
+SRC_DIR = os.path.join(os.path.dirname(os.path.dirname(
+    os.path.abspath(__file__))), "src")
+sys.path.insert(0, SRC_DIR)
+
+from core.shell_parser.parser import (  # noqa: E402
+    PARSER_BACKENDS, parse_command)
+
+COMMANDS = [
+    "echo hello world",
+    "cat a.txt | grep -v '^#' | sort | uniq | head -n 5",
+    "echo \"a `echo b` $x\" > out.txt; cat < out.txt | wc -l",
+    "sleep 1 & cut -b 1-10 data.csv | sort -r | uniq",
+]
+
+
+def first_parse(backend: str) -> float:
+    """
+    Get the time of the first parse in a new interpreter, in seconds.
+    """
+    code = ("import time; start = time.perf_counter(); "
+            "from core.shell_parser.parser import parse_command; "
+            f"parse_command('echo a | cat', {backend!r}); "
+            "print(time.perf_counter() - start)")
+    output = subprocess.run([sys.executable, "-c", code], cwd=SRC_DIR,
+                            check=True, capture_output=True, text=True)
+    return float(output.stdout)
+
+
+def parse_time(command: str, backend: str, repeat: int) -> float:
+    """
+    Get the best time of a parse of the command, in seconds.
+    """
+    parse_command(command, backend)
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        parse_command(command, backend)
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n")[1])
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+    cases = [("typical commands", COMMANDS)]
+    for stages in (10, 50, 200):
+        cases.append((f"pipe of {stages} stages",
+                      [" | ".join(["grep a"] * stages)]))
+    print(f"{'':<24}" + "".join(f"{b:>12}" for b in PARSER_BACKENDS))
+    print(f"{'first parse (ms)':<24}" + "".join(
+        f"{first_parse(b) * 1000:>12.1f}" for b in PARSER_BACKENDS))
+    for name, commands in cases:
+        times = [sum(parse_time(c, b, args.repeat) for c in commands)
+                 / len(commands) for b in PARSER_BACKENDS]
+        print(f"{name + ' (us)':<24}"
+              + "".join(f"{t * 1e6:>12.1f}" for t in times))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,57 @@
+"""
+Benchmark of the startup of shell.py -c with the parser cache.
+
+It times new processes running a short command with the cache
+disabled, with an empty cache directory (cold, the tables are built
+and saved) and with the tables saved by a previous run (warm).
+The start of the interpreter alone is given as the baseline.
+
+Usage: python bench/bench_startup.py [--runs N]
+"""
+
+import argparse
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+SRC_DIR = os.path.join(os.path.dirname(os.path.dirname(
+    os.path.abspath(__file__))), "src")
+COMMAND = "echo a | cat"
+
+
+def run_time(args: list, cache_dir: str) -> float:
+    """
+    Get the time of a new process running the arguments, in seconds.
+    """
+    env = dict(os.environ, SHELL_PARSER_CACHE_DIR=cache_dir)
+    start = time.perf_counter()
+    subprocess.run([sys.executable] + args, cwd=SRC_DIR, env=env,
+                   check=True, stdout=subprocess.DEVNULL)
+    return time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n")[1])
+    parser.add_argument("--runs", type=int, default=10)
+    args = parser.parse_args()
+    shell = ["shell.py", "-c", COMMAND]
+    with tempfile.TemporaryDirectory() as tmp:
+        warm_dir = os.path.join(tmp, "warm")
+        run_time(shell, warm_dir)
+        cases = [
+            ("interpreter", lambda: run_time(["-c", "pass"], "")),
+            ("no cache", lambda: run_time(shell, "")),
+            ("cold cache", lambda: run_time(shell, tempfile.mkdtemp(dir=tmp))),
+            ("warm cache", lambda: run_time(shell, warm_dir)),
+        ]
+        print(f"shell.py -c {COMMAND!r}, median of {args.runs} runs")
+        for name, measure in cases:
+            times = [measure() for _ in range(args.runs)]
+            print(f"{name:<12} {statistics.median(times) * 1000:8.1f} ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,74 @@
+"""
+Benchmark of commands with large command substitutions.
+
+The substituted arguments are built as QuotedString, whose size must
+grow linearly with the argument. For arguments of growing sizes it
+times the command and measures the peak of the memory allocated by it,
+for a single large word next to quoted and unquoted text, many words,
+and a double quoted substitution.
+
+Usage: python bench/bench_substitution.py [--sizes MB ...]
+"""
+
+import argparse
+import io
+import os
+import sys
+import tempfile
+import time
+import tracemalloc
+
+SRC_DIR = os.path.join(os.path.dirname(os.path.dirname(
+    os.path.abspath(__file__))), "src")
+sys.path.insert(0, SRC_DIR)
+
+from core.api import create_shell_engine, eval_command  # noqa: E402
+
+COMMANDS = [
+    ("one word", "echo x`cat {word}`'*'\"y\" | wc -m"),
+    ("many words", "echo `cat {words}` | wc -w"),
+    ("double quoted", "echo \"`cat {word}`\" | wc -m"),
+]
+
+
+def measure(engine, command: str) -> tuple:
+    """
+    Get the time of the command in seconds and the peak of the memory
+    it allocated in bytes.
+    """
+    start = time.perf_counter()
+    eval_command(engine, command, io.StringIO())
+    elapsed = time.perf_counter() - start
+    tracemalloc.start()
+    eval_command(engine, command, io.StringIO())
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return elapsed, peak
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n")[1])
+    parser.add_argument("--sizes", type=float, nargs="+",
+                        default=[0.1, 1, 4])
+    args = parser.parse_args()
+    engine = create_shell_engine(parser_backend="descent")
+    print(f"{'size (MB)':>10}  {'command':<14}{'time (ms)':>12}"
+          f"{'peak (MB)':>12}")
+    with tempfile.TemporaryDirectory() as tmp:
+        word = os.path.join(tmp, "word.txt")
+        words = os.path.join(tmp, "words.txt")
+        for size in args.sizes:
+            length = int(size * 1e6)
+            with open(word, "w") as f:
+                f.write("a" * length)
+            with open(words, "w") as f:
+                f.write("word " * (length // 5))
+            for name, command in COMMANDS:
+                elapsed, peak = measure(
+                    engine, command.format(word=word, words=words))
+                print(f"{size:>10}  {name:<14}{elapsed * 1e3:>12.1f}"
+                      f"{peak / 1e6:>12.1f}")
+
+
+if __name__ == "__main__":
+    main()
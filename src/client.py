@@ -0,0 +1,31 @@
+import sys
+from user.client import run_remote_command
+from user.protocol import default_socket_path
+
+
+if __name__ == "__main__":
+    # client.py [-S SOCKET] [-v NAME=VALUE]... -c COMMAND
+    # evaluates the command on the daemon started by shell.py -d
+    args = sys.argv[1:]
+    socket_path = default_socket_path()
+    variables = {}
+    command = None
+    while len(args) > 0:
+        if len(args) < 2:
+            raise ValueError("wrong number of command line arguments")
+        option, value = args[0], args[1]
+        args = args[2:]
+        if option == "-S":
+            socket_path = value
+        elif option == "-v":
+            name, separator, var_value = value.partition("=")
+            if not separator:
+                raise ValueError(f"expected NAME=VALUE, got {value}")
+            variables[name] = var_value
+        elif option == "-c":
+            command = value
+        else:
+            raise ValueError(f"unexpected command line argument {option}")
+    if command is None:
+        raise ValueError("missing -c COMMAND")
+    sys.exit(run_remote_command(command, socket_path, variables))
@@ -2,32 +2,167 @@
 This module provides the public API for interacting with the shell engine.
 
 It includes functions for creating a shell engine instance,
-evaluating commands, retrieving available commands,
+evaluating commands, also from asyncio code,
+compiling commands, inspecting the parse and result caches,
+retrieving available commands,
 and getting the current working directory.
 """
 
 from core.engine import ShellEngine
+from typing import TYPE_CHECKING, Callable, Optional
+import threading
 from core.app_factory import get_available_apps as _get_available_apps
 from core.builtinapp_executor import BuiltinAppExecutor as _BuiltinAppExecutor
 
+if TYPE_CHECKING:
+    from concurrent.futures import Executor
+
 
 def create_shell_engine(**kwargs) -> ShellEngine:
     """
     Create a shell engine instance.
     Args:
         **kwargs: Initial context to pass to the ShellEngine.
+            parse_cache_size sets the capacity of the parse cache,
+            0 disables it.
+            parser_backend selects the parser, "earley" (default)
+            or the faster "descent".
+            pipeline_mode selects how pipes run, "sequential" (default)
+            runs one command after another, "streaming" runs them
+            concurrently through bounded buffers.
+            pipeline_fusion=False disables the replacement of
+            common pipes, e.g. sort | head, by single pass apps.
+            result_cache_size sets the number of bytes of output
+            kept by the result cache of read-only commands,
+            0 (default) disables it.
+            bytes_mode=True passes bytes instead of text through pipes
+            and redirected files, see core.runtime.execute_app.
     """
     return ShellEngine(**kwargs)
 
 
-def eval_command(engine: ShellEngine, command: str) -> None:
+def eval_command(engine: ShellEngine, command: str,
+                 output_stream=None) -> None:
     """Evaluate a command using the shell engine.
 
     Args:
         engine: The ShellEngine instance to use for evaluating the command.
         command: The command string to evaluate.
+        output_stream: The stream receiving the output of this command,
+            the output stream of the engine by default.
+    """
+    engine._eval_command(command, output_stream=output_stream)
+
+
+async def eval_command_async(engine: ShellEngine, command: str,
+                             output_stream=None,
+                             executor: Optional["Executor"] = None) -> None:
+    """Evaluate a command without blocking the running event loop.
+
+    The command runs in a thread of the executor, by default a thread
+    pool shared by all the engines, so the number of threads stays
+    bounded however many commands are awaited at once. Commands
+    evaluated concurrently on one engine share its variables and
+    the working directory of the process.
+
+    Args:
+        engine: The ShellEngine instance to use for evaluating the command.
+        command: The command string to evaluate.
+        output_stream: The stream receiving the output of this command,
+            e.g. a StringIO to capture it,
+            the output stream of the engine by default.
+        executor: The executor running the command,
+            the shared thread pool by default.
+    """
+    # imported here, so the -c mode of the shell doesn't load them
+    import asyncio
+    import functools
+    if executor is None:
+        executor = _get_executor()
+    loop = asyncio.get_running_loop()
+    await loop.run_in_executor(
+        executor, functools.partial(engine._eval_command, command,
+                                    output_stream=output_stream))
+
+
+_executor = None
+_executor_lock = threading.Lock()
+
+
+def _get_executor() -> "Executor":
+    """
+    Get the thread pool shared by the async evaluations,
+    it is created on the first use.
+    """
+    global _executor
+    with _executor_lock:
+        if _executor is None:
+            from concurrent.futures import ThreadPoolExecutor
+            _executor = ThreadPoolExecutor(
+                thread_name_prefix="shell-engine")
+        return _executor
+
+
+def compile_command(engine: ShellEngine, command: str) -> Callable[[], None]:
+    """Compile a command for repeated evaluation on the shell engine.
+
+    Constant arguments are folded at compile time, variables, globs and
+    command substitutions are evaluated on every call.
+
+    Args:
+        engine: The ShellEngine instance to evaluate the command on.
+        command: The command string to compile.
+
+    Returns:
+        A callable evaluating the command each time it is called.
+
+    Raises:
+        ParseError: If the command is invalid.
+    """
+    return engine._compile_command(command)
+
+
+def get_parse_cache_info(engine: ShellEngine) -> dict:
+    """Get the statistics of the parse cache of the engine.
+
+    Args:
+        engine: The ShellEngine instance.
+
+    Returns:
+        A dict with the hits, misses, size and capacity of the cache.
+    """
+    return engine._get_parse_cache_info()
+
+
+def clear_parse_cache(engine: ShellEngine) -> None:
+    """Clear the parse cache of the engine.
+
+    Args:
+        engine: The ShellEngine instance.
+    """
+    engine._clear_parse_cache()
+
+
+def get_result_cache_info(engine: ShellEngine) -> Optional[dict]:
+    """Get the statistics of the result cache of the engine.
+
+    Args:
+        engine: The ShellEngine instance.
+
+    Returns:
+        A dict with the hits, misses, bypasses, hit rate, entries,
+        size and capacity of the cache, None if it is disabled.
+    """
+    return engine._get_result_cache_info()
+
+
+def clear_result_cache(engine: ShellEngine) -> None:
+    """Clear the result cache of the engine.
+
+    Args:
+        engine: The ShellEngine instance.
     """
-    engine._eval_command(command)
+    engine._clear_result_cache()
 
 
 def get_available_commands() -> list:
@@ -1,13 +1,34 @@
 from abc import ABC, abstractmethod
+from core.utils import (IOContextManager, EncodingWriter, current_stream,
+                        thread_local_stdio)
 from core.error_handling import (ErrorHandler, raise_error_handler,
                                  AppRuntimeError, AppValueError)
+from io import StringIO
+from typing import Iterable, Iterator, Optional
+import sys
 
 
 class App(ABC):
     """
     Abstract base class for all applications.
-    The run method should be implemented by subclasses.
+    The _run_io method should be implemented by subclasses, it takes
+    the arguments and the input and output streams of the application.
+    Applications printing to the standard output can implement
+    the _run method instead, see _run_io. A subclass implementing
+    neither of them is a TypeError when it is defined.
+
+    Applications setting supports_bytes can run in the bytes mode of
+    the engine, where binary is set on them and their streams and
+    lines are bytes instead of text. Files are opened with _open,
+    in the mode of the application.
     """
+    supports_bytes = False
+
+    def __init_subclass__(cls, **kwargs):
+        super().__init_subclass__(**kwargs)
+        if cls._run_io is App._run_io and cls._run is App._run:
+            raise TypeError(f"{cls.__name__} must implement _run_io or _run")
+
     def __init__(self, name,
                  error_handler: ErrorHandler = raise_error_handler):
         """
@@ -15,26 +36,141 @@ class App(ABC):
         """
         self._name = name
         self._error_handler = error_handler
+        self.binary = False
+
+    def _open(self, file: str):
+        """
+        Open the file for reading, in binary mode if the app is binary.
+        """
+        return open(file, "rb" if self.binary else "r")
+
+    def _encode(self, text: str):
+        """
+        Get the text as bytes if the app is binary, as is otherwise.
+        """
+        if self.binary:
+            return text.encode("utf-8", "surrogateescape")
+        return text
 
-    @abstractmethod
     def _run(self, args):
-        pass
+        """
+        Run the application on the standard streams, see _run_io.
+        """
+        raise NotImplementedError(f"{self._name} doesn't implement _run")
+
+    def _run_io(self, args, input_stream, output_stream):
+        """
+        Run the _run method with sys.stdin and sys.stdout set to the
+        streams, for applications using the standard streams.
+        Only the streams of the current thread are changed,
+        so such applications can run concurrently.
+        """
+        with thread_local_stdio(), IOContextManager(input_stream,
+                                                    output_stream):
+            self._run(args)
 
-    def exec(self, args):
+    def exec(self, args, input_stream=None, output_stream=None):
         """
-        Executes the application's main logic with the given arguments.
+        Executes the application's main logic with the given arguments
+        and streams, which default to the standard input and output.
 
-        This method wraps the _run method with app providing error handling.
+        This method wraps the _run_io method with app providing error
+        handling.
         ValueErrors are caught and wrapped in AppValueError.
         Other exceptions are caught and wrapped in AppRuntimeError.
         The configured error_handler is then used to
-        handle these application-specific errors.
+        handle these application-specific errors, and prints
+        their messages to the output stream.
+        BrokenPipeError is raised as is, it means the next command
+        of a streaming pipe stopped reading the output.
         """
+        if input_stream is None:
+            input_stream = current_stream(sys.stdin)
+        if output_stream is None:
+            output_stream = current_stream(sys.stdout)
         try:
-            self._run(args)
+            self._run_io(args, input_stream, output_stream)
+        except (BrokenPipeError, AppValueError, AppRuntimeError):
+            # errors of a previous streaming app of the pipe
+            # reading the input are already handled by that app
+            raise
         except ValueError as e:
             app_value_error = AppValueError(e, self._name)
-            self._error_handler.handle_error(app_value_error)
+            self._error_handler.handle_error(app_value_error,
+                                             self._error_stream(output_stream))
         except Exception as e:
             app_runtime_error = AppRuntimeError(e, self._name)
-            self._error_handler.handle_error(app_runtime_error)
+            self._error_handler.handle_error(app_runtime_error,
+                                             self._error_stream(output_stream))
+
+    def _error_stream(self, output_stream):
+        """
+        Get the text stream the error messages are printed to.
+        """
+        if self.binary:
+            return EncodingWriter(output_stream)
+        return output_stream
+
+
+class StreamingApp(App):
+    """
+    Abstract base class for applications working line by line.
+    The _stream method should be implemented by subclasses, it takes
+    the arguments and an iterator of input lines, None when there is
+    no input, and returns an iterator of output lines, each line ending
+    with its line break.
+
+    Streaming apps of a pipe are chained without any stream in between,
+    and only read as much input as they need. The _run_io method
+    runs the app on streams, like the other apps.
+    """
+    @abstractmethod
+    def _stream(self, args,
+                input_lines: Optional[Iterable[str]]) -> Iterator[str]:
+        pass
+
+    def _run_io(self, args, input_stream, output_stream):
+        input_lines = None if input_stream.isatty() else input_stream
+        for line in self._stream(args, input_lines):
+            output_stream.write(line)
+
+    def stream(self, args,
+               input_lines: Optional[Iterable[str]]) -> Iterator[str]:
+        """
+        Get the output lines of the application's main logic.
+
+        Errors are handled as in exec, while the lines are iterated.
+        Messages printed by the error_handler become output lines.
+        """
+        try:
+            yield from self._stream(args, input_lines)
+        except (BrokenPipeError, AppValueError, AppRuntimeError):
+            raise
+        except ValueError as e:
+            yield from self._handle_stream_error(
+                AppValueError(e, self._name))
+        except Exception as e:
+            yield from self._handle_stream_error(
+                AppRuntimeError(e, self._name))
+
+    def _handle_stream_error(self, error: Exception) -> Iterator[str]:
+        output = StringIO()
+        self._error_handler.handle_error(error, output)
+        for line in output.getvalue().splitlines(keepends=True):
+            yield self._encode(line)
+
+    @staticmethod
+    def _input_lines(input_lines: Optional[Iterable[str]]) -> Iterable[str]:
+        """
+        Get the input lines, raises ValueError when there is no input.
+        """
+        if input_lines is None:
+            raise ValueError("empty input")
+        return input_lines
+
+    def _file_lines(self, file: str) -> Iterator[str]:
+        """
+        Iterate over the lines of the file, which is closed at the end.
+        """
+        with self._open(file) as f:
+            yield from f
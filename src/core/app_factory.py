@@ -4,23 +4,61 @@ This module handles the registration, creation, and discovery of applications.
 It provides mechanisms to register new application types,
 instantiate applications by name,
 and retrieve a list of all available applications.
+Applications can also be registered lazily by the module defining them,
+the module is then only imported on the first use of one of its apps.
+Applications can be marked pure when their output only depends on
+their arguments, their input and the files named by their arguments,
+so the result cache of the engine may reuse it.
 """
 
 from core.app import App
-from typing import Dict, Type
+from typing import Dict, Set, Type
 from .error_handling import print_error_handler
+import importlib
 
 
 _app_registry: Dict[str, Type[App]] = {}
+_lazy_app_modules: Dict[str, str] = {}
+_pure_apps: Set[str] = set()
 
 
-def register(name: str):
+def register(name: str, pure: bool = False):
     def decorator(cls: Type[App]):
         _app_registry[name] = cls
+        if pure:
+            _pure_apps.add(name)
         return cls
     return decorator
 
 
+def register_lazy(name: str, module: str, pure: bool = False):
+    """
+    Register an application by the name of the module defining it.
+    The module is imported when the application is first created.
+    """
+    _lazy_app_modules[name] = module
+    if pure:
+        _pure_apps.add(name)
+
+
+def is_pure_app(name: str) -> bool:
+    """
+    Check if the application is marked pure, known without importing it.
+    """
+    if name.startswith('_'):
+        name = name[1:]
+    return name in _pure_apps
+
+
+def _get_app_class(name: str) -> Type[App]:
+    """
+    Get the application class by name, importing its module if needed.
+    """
+    if name not in _app_registry and name in _lazy_app_modules:
+        importlib.import_module(_lazy_app_modules[name])
+    return _app_registry[name]
+
+
 def create_app(name: str) -> App:
     """
     Create an application instance by name.
@@ -28,9 +66,9 @@ def create_app(name: str) -> App:
     try:
         if name.startswith('_'):
             name = name[1:]
-            app = _app_registry[name](name, print_error_handler)
+            app = _get_app_class(name)(name, print_error_handler)
         else:
-            app = _app_registry[name](name)
+            app = _get_app_class(name)(name)
         return app
     except KeyError:
         raise ValueError(f"unsupported application {name}")
@@ -41,5 +79,7 @@ def get_available_apps() -> list:
     Get a list of available applications.
     """
     original_apps = list(_app_registry.keys())
+    original_apps += [name for name in _lazy_app_modules
+                      if name not in _app_registry]
     unsafe_apps = ["_" + name for name in original_apps]
     return original_apps + unsafe_apps
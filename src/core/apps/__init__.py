@@ -1,2 +1,11 @@
-import core.apps.basic_apps  # noqa: F401
-import core.apps.additional_apps  # noqa: F401
+from core.app_factory import register_lazy
+
+# the app modules are only imported when one of their apps is used.
+# ls and find are not pure, their output depends on the directories.
+_pure_apps = {"echo", "cat", "head", "tail", "grep", "sort", "uniq", "cut",
+              "wc"}
+for name in ["echo", "ls", "cat", "head", "tail", "grep"]:
+    register_lazy(name, "core.apps.basic_apps", pure=name in _pure_apps)
+for name in ["find", "sort", "uniq", "cut", "wc"]:
+    register_lazy(name, "core.apps.additional_apps",
+                  pure=name in _pure_apps)
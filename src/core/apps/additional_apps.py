@@ -5,16 +5,15 @@ which are concrete implementations of the App class.
 """
 
 import os
-import re
 import fnmatch
-from core.app import App
+from core.app import App, StreamingApp
 from core.app_factory import register
-import sys
+from core.utils import write_lines
 
 
 @register("find")
 class Find(App):
-    def _run(self, args):
+    def _run_io(self, args, input_stream, output_stream):
         if len(args) < 2 or len(args) > 4:
             raise ValueError("wrong number of arguments.")
 
@@ -39,12 +38,14 @@ class Find(App):
         for root, _, files in os.walk(path_to_search, followlinks=False):
             for filename in files:
                 if fnmatch.fnmatch(filename, pattern):
-                    print(os.path.join(root, filename))
+                    output_stream.write(os.path.join(root, filename) + "\n")
 
 
 @register("sort")
 class Sort(App):
-    def _run(self, args):
+    supports_bytes = True
+
+    def _run_io(self, args, input_stream, output_stream):
         if len(args) > 2:
             raise ValueError("wrong number of arguments")
         file = None
@@ -60,21 +61,22 @@ class Sort(App):
             if option != "-r":
                 raise ValueError("Unknown option: " + option)
         if file is None:
-            if sys.stdin.isatty():
+            if input_stream.isatty():
                 raise ValueError("empty input")
             else:
-                file_lines = sys.stdin.readlines()
+                file_lines = input_stream.readlines()
         else:
-            with open(file, "r") as f:
+            with self._open(file) as f:
                 file_lines = f.readlines()
         sorted_lines = sorted(file_lines, reverse=(option == "-r"))
-        for line in sorted_lines:
-            print(line, end="")
+        write_lines(output_stream, sorted_lines)
 
 
 @register("uniq")
-class Uniq(App):
-    def _run(self, args):
+class Uniq(StreamingApp):
+    supports_bytes = True
+
+    def _stream(self, args, input_lines):
         if len(args) > 2:
             raise ValueError("wrong number of arguments")
         file = None
@@ -90,30 +92,27 @@ class Uniq(App):
             if option != "-i":
                 raise ValueError("Unknown option: " + option)
         if file is None:
-            if sys.stdin.isatty():
-                raise ValueError("empty input")
-            else:
-                file_lines = sys.stdin.readlines()
+            file_lines = self._input_lines(input_lines)
         else:
-            with open(file, "r") as f:
-                file_lines = f.readlines()
-        unique_lines = [file_lines[0]]
-        for i in range(1, len(file_lines)):
-            line = file_lines[i]
-            adjacent_line = file_lines[i-1]
-            if option == "-i":
+            file_lines = self._file_lines(file)
+        adjacent_line = None
+        for line in file_lines:
+            if adjacent_line is None:
+                yield line
+            elif option == "-i":
                 if line.lower() != adjacent_line.lower():
-                    unique_lines.append(line)
+                    yield line
             else:
                 if line != adjacent_line:
-                    unique_lines.append(line)
-        for line in unique_lines:
-            print(line, end="")
+                    yield line
+            adjacent_line = line
 
 
 @register("cut")
-class Cut(App):
-    def _run(self, args):
+class Cut(StreamingApp):
+    supports_bytes = True
+
+    def _stream(self, args, input_lines):
         if len(args) < 2 or len(args) > 3:
             raise ValueError("wrong number of arguments")
         if args[0] != "-b":
@@ -124,25 +123,22 @@ class Cut(App):
         else:
             file = None
         if file is None:
-            if sys.stdin.isatty():
-                raise ValueError("empty input")
-            else:
-                file_lines = sys.stdin.readlines()
+            file_lines = self._input_lines(input_lines)
         else:
-            with open(file, "r") as f:
-                file_lines = f.readlines()
+            file_lines = self._file_lines(file)
+        newline = self._encode("\n")
         for line in file_lines:
             # Remove trailing newline character
             # add it back after processing
-            line = line.rstrip('\n')
+            line = line.rstrip(newline)
             try:
                 result = self.__extract_bytes(line, extra_bytes)
-                # Print the result with a newline
-                print(result, end="\n")
             except ValueError as e:
                 raise ValueError(f"Error specifying bytes: {e}") from e
+            # Output the result with a newline
+            yield result + newline
 
-    def __extract_bytes(self, line: str, bytes_spec: str) -> str:
+    def __extract_bytes(self, line, bytes_spec: str):
         indices = set()
         line_len = len(line)
         try:
@@ -206,15 +202,18 @@ class Cut(App):
             # or handle differently
             raise ValueError(f"Error parsing byte/character specification "
                              f"'{bytes_spec}': {e}") from e
-        # Sort indices and build the result string
+        # Sort indices and build the result string,
+        # the line is bytes in the bytes mode
         sorted_indices = sorted(list(indices))
-        result = "".join(line[i] for i in sorted_indices)
+        result = line[:0].join(line[i:i + 1] for i in sorted_indices)
         return result
 
 
 @register("wc")
-class Wc(App):
-    def _run(self, args):
+class Wc(StreamingApp):
+    supports_bytes = True
+
+    def _stream(self, args, input_lines):
         if len(args) > 2:
             raise ValueError("wrong number of arguments")
         file = None
@@ -233,22 +232,27 @@ class Wc(App):
             if option not in ["-l", "-w", "-m"]:
                 raise ValueError("Unknown option: " + option)
         if file is None:
-            if sys.stdin.isatty():
-                raise ValueError("empty input")
-            file_lines = sys.stdin.readlines()
+            file_lines = self._input_lines(input_lines)
         else:
-            with open(file, "r") as f:
-                file_lines = f.readlines()
-        word_count = sum(len(re.findall(r'\S+', line.rstrip('\n')))
-                         for line in file_lines)
-        char_count = sum(len(line) for line in file_lines)
+            file_lines = self._file_lines(file)
+        line_count = 0
+        word_count = 0
+        char_count = 0
+        for line in file_lines:
+            line_count += 1
+            # split separates the words at the whitespace matched by \s
+            word_count += len(line.split())
+            if self.binary and not line.isascii():
+                # the characters of the UTF-8 text, not its bytes
+                line = line.decode("utf-8", "surrogateescape")
+            char_count += len(line)
         if option == "-l":
-            print(len(file_lines))
+            yield self._encode(f"{line_count}\n")
         elif option == "-w":
-            print(word_count)
+            yield self._encode(f"{word_count}\n")
         elif option == "-m":
-            print(char_count)
+            yield self._encode(f"{char_count}\n")
         else:
-            print(len(file_lines))
-            print(word_count)
-            print(char_count)
+            yield self._encode(f"{line_count}\n")
+            yield self._encode(f"{word_count}\n")
+            yield self._encode(f"{char_count}\n")
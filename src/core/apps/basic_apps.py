@@ -4,23 +4,34 @@ echo, ls, cat, head, tail, grep
 which are concrete implementations of the App class.
 """
 
+import atexit
+import io
 import os
 import re
-from core.app import App
+import threading
+import time
+from collections import deque
+from itertools import groupby, islice
+from stat import S_ISREG
+from typing import TYPE_CHECKING, Dict
+from core.app import App, StreamingApp
 from core.app_factory import register
-import sys
+from core.utils import write_lines
+
+if TYPE_CHECKING:
+    from concurrent.futures import Executor
 
 
 @register("echo")
 class Echo(App):
-    def _run(self, args):
+    def _run_io(self, args, input_stream, output_stream):
         out = (" ".join(args))
-        print(out)
+        output_stream.write(out + "\n")
 
 
 @register("ls")
 class Ls(App):
-    def _run(self, args):
+    def _run_io(self, args, input_stream, output_stream):
         if len(args) == 0:
             ls_dir = os.getcwd()
         elif len(args) > 1:
@@ -29,123 +40,685 @@ class Ls(App):
             ls_dir = args[0]
         for f in os.listdir(ls_dir):
             if not f.startswith("."):
-                print(f)
+                output_stream.write(f + "\n")
 
 
 @register("cat")
-class Cat(App):
-    def _run(self, args):
+class Cat(StreamingApp):
+    supports_bytes = True
+
+    def _stream(self, args, input_lines):
         if len(args) == 0:
-            if sys.stdin.isatty():
-                raise ValueError("empty input")
-            else:
-                for line in sys.stdin:
-                    print(line, end="")
+            yield from self._input_lines(input_lines)
         else:
             for a in args:
-                with open(a, "r") as f:
-                    print(f.read(), end="")
+                yield from self._file_lines(a)
 
 
 @register("head")
-class Head(App):
-    def _run(self, args):
-        if len(args) > 3:
-            raise ValueError("wrong number of arguments")
-        is_stdin = False
-        if len(args) == 0:
-            num_lines = 10
-            is_stdin = True
-        elif len(args) == 1:
-            # must be head [FILE]
-            num_lines = 10
-            file = args[0]
-        elif len(args) == 2:
-            # must be head [OPTIONS]
-            if args[0] != "-n":
-                raise ValueError("Unknown option: " + args[0])
-            num_lines = int(args[1])
-            is_stdin = True
-        else:
-            # must be head [OPTIONS] [FILE]
-            if args[0] != "-n":
+class Head(StreamingApp):
+    supports_bytes = True
+
+    def _stream(self, args, input_lines):
+        option, count, files = self.__parse_args(args)
+        if len(files) == 0:
+            yield from self.__head(self._input_lines(input_lines),
+                                   option, count)
+            return
+        for index, file in enumerate(files):
+            if len(files) > 1:
+                # each file is preceded by its name, as in GNU head
+                if index > 0:
+                    yield self._encode("\n")
+                yield self._encode(f"==> {file} <==\n")
+            yield from self.__head(self._file_lines(file), option, count)
+
+    @staticmethod
+    def __parse_args(args):
+        """
+        Get the option, -n or -c, its count and the files of head.
+        The count is a string, as "-0" is not the same count as "0".
+        """
+        option = "-n"
+        count = "10"
+        if len(args) > 0 and args[0].startswith("-") and len(args[0]) > 1:
+            if args[0] not in ("-n", "-c"):
                 raise ValueError("Unknown option: " + args[0])
-            num_lines = int(args[1])
-            file = args[2]
-        if is_stdin:
-            if sys.stdin.isatty():
-                raise ValueError("empty input")
-            lines = sys.stdin.readlines()
-            for i in range(0, min(len(lines), num_lines)):
-                print(lines[i], end="")
+            if len(args) < 2:
+                raise ValueError("wrong number of arguments")
+            option = args[0]
+            count = args[1]
+            args = args[2:]
+        # an invalid count is an error before any file is read
+        int(count)
+        return option, count, args
+
+    @staticmethod
+    def __head(lines, option, count):
+        """
+        Get the first count lines, or characters with -c, of the lines,
+        or all but the last ones when count is negative.
+        The characters are bytes in the bytes mode.
+        Only the lines needed are read, and the lines kept in memory
+        are at most the last lines, or characters, left out.
+        """
+        all_but_last = count.startswith("-")
+        count = abs(int(count))
+        if option == "-n" and not all_but_last:
+            yield from islice(lines, count)
+        elif option == "-n":
+            # a line is printed once count more lines are read
+            pending = deque()
+            for line in lines:
+                pending.append(line)
+                if len(pending) > count:
+                    yield pending.popleft()
+        elif not all_but_last:
+            for line in lines:
+                if count <= 0:
+                    break
+                yield line[:count]
+                count -= len(line)
         else:
-            with open(file, "r") as f:
-                lines = f.readlines()
-                for i in range(0, min(len(lines), num_lines)):
-                    print(lines[i], end="")
+            pending = deque()
+            pending_size = 0
+            for line in lines:
+                pending.append(line)
+                pending_size += len(line)
+                while pending and pending_size - len(pending[0]) >= count:
+                    pending_size -= len(pending[0])
+                    yield pending.popleft()
+            if pending_size > count:
+                yield pending[0][:pending_size - count]
 
 
 @register("tail")
 class Tail(App):
-    def _run(self, args):
-        if len(args) > 3:
+    supports_bytes = True
+    # the seconds between two checks of a followed file
+    follow_interval = 0.5
+
+    def _run_io(self, args, input_stream, output_stream):
+        follow = False
+        num_lines = 10
+        while len(args) > 0 and args[0].startswith("-") and len(args[0]) > 1:
+            if args[0] == "-f":
+                follow = True
+                args = args[1:]
+            elif args[0] == "-n" and len(args) > 1:
+                num_lines = int(args[1])
+                args = args[2:]
+            elif args[0] == "-n":
+                raise ValueError("wrong number of arguments")
+            else:
+                raise ValueError("Unknown option: " + args[0])
+        if len(args) > 1:
             raise ValueError("wrong number of arguments")
-        is_stdin = False
+        num_lines = max(num_lines, 0)
         if len(args) == 0:
-            num_lines = 10
-            is_stdin = True
-        elif len(args) == 1:
-            # must be tail [FILE]
-            num_lines = 10
-            file = args[0]
-        elif len(args) == 2:
-            # must be tail [OPTIONS]
-            if args[0] != "-n":
-                raise ValueError("Unknown option: " + args[0])
-            num_lines = int(args[1])
-            is_stdin = True
-        else:
-            # must be tail [OPTIONS] [FILE]
-            if args[0] != "-n":
-                raise ValueError("Unknown option: " + args[0])
-            num_lines = int(args[1])
-            file = args[2]
-        if is_stdin:
-            if sys.stdin.isatty():
+            # as in GNU tail, the input is not followed
+            if input_stream.isatty():
                 raise ValueError("empty input")
-            lines = sys.stdin.readlines()
-            display_length = min(len(lines), num_lines)
-            for i in range(0, display_length):
-                print(lines[len(lines) - display_length + i], end="")
-        else:
-            with open(file, "r") as f:
-                lines = f.readlines()
-                display_length = min(len(lines), num_lines)
-                for i in range(0, display_length):
-                    print(lines[len(lines) - display_length + i], end="")
+            write_lines(output_stream, deque(input_stream, num_lines))
+            return
+        with self._open(args[0]) as f:
+            raw = f if self.binary else f.buffer
+            if self.__size(raw) > 0:
+                f.seek(self.__last_lines_offset(raw, num_lines))
+                write_lines(output_stream, f)
+            else:
+                # pipes, and files such as the ones of /proc whose size
+                # is unknown, are read to the end
+                write_lines(output_stream, deque(f, num_lines))
+            if follow:
+                self.__follow(f, raw, output_stream)
+
+    @staticmethod
+    def __size(raw) -> int:
+        """
+        Get the size of the binary file, 0 if it can't be seeked.
+        """
+        if not raw.seekable():
+            return 0
+        try:
+            return raw.seek(0, os.SEEK_END)
+        except OSError:
+            return 0
+
+    @staticmethod
+    def __last_lines_offset(raw, count: int,
+                            block_size: int = 65536) -> int:
+        """
+        Get the offset of the last count lines of the binary file,
+        reading blocks backwards from its end until count line breaks
+        are found.
+        """
+        end = raw.seek(0, os.SEEK_END)
+        if count == 0:
+            return end
+        position = end
+        raw.seek(end - 1)
+        if raw.read(1) == b"\n":
+            # the line break ending the file doesn't start a line
+            position -= 1
+        newlines = 0
+        while position > 0:
+            start = max(position - block_size, 0)
+            raw.seek(start)
+            block = raw.read(position - start)
+            block_newlines = block.count(b"\n")
+            if newlines + block_newlines >= count:
+                index = len(block)
+                while newlines < count:
+                    index = block.rfind(b"\n", 0, index)
+                    newlines += 1
+                return start + index + 1
+            newlines += block_newlines
+            position = start
+        return 0
+
+    def __follow(self, f, raw, output_stream):
+        """
+        Write the data appended to the file until the command is
+        interrupted or the output is closed.
+        The file is checked every follow_interval seconds, by comparing
+        its size to the offset read, and read again from its start
+        when it was truncated.
+        """
+        output_stream.flush()
+        try:
+            while True:
+                data = f.read()
+                if data:
+                    output_stream.write(data)
+                    output_stream.flush()
+                    continue
+                time.sleep(self.follow_interval)
+                # raises BrokenPipeError when the next command of
+                # a streaming pipe stopped reading
+                output_stream.flush()
+                if os.fstat(raw.fileno()).st_size < raw.tell():
+                    f.seek(0)
+        except KeyboardInterrupt:
+            # the interrupt only stops following the file
+            pass
+
+
+# the characters of a pattern which are not matched literally
+_REGEX_META = re.compile(r"[.^$*+?{}\[\]\\|()]")
+# patterns whose matches depend on the text around the line,
+# so they are only searched line by line
+_LINE_ONLY_REGEX = re.compile(r"\\[AZ]|\(\?<?[=!]")
+
+_process_pools: Dict[int, "Executor"] = {}
+_process_pools_lock = threading.Lock()
+
+
+def _process_pool(workers: int) -> "Executor":
+    """
+    Get the process pool of grep -j with the number of workers,
+    which is created on the first use and shared by the commands.
+    The workers are started by a fork server, as the pool may be
+    created by a thread of a streaming pipe or of an async evaluation,
+    and forking a process running other threads is unsafe.
+    As the workers import the main module, scripts running grep -j
+    must guard their code with if __name__ == "__main__".
+    The pools are shut down when the process exits.
+    """
+    with _process_pools_lock:
+        pool = _process_pools.get(workers)
+        if pool is None:
+            # imported here, so the other apps don't load them
+            import multiprocessing
+            from concurrent.futures import ProcessPoolExecutor
+            if len(_process_pools) == 0:
+                atexit.register(_shutdown_process_pools)
+            pool = ProcessPoolExecutor(
+                workers, mp_context=multiprocessing.get_context("forkserver"))
+            _process_pools[workers] = pool
+        return pool
+
+
+def _shutdown_process_pools():
+    with _process_pools_lock:
+        for pool in _process_pools.values():
+            pool.shutdown(cancel_futures=True)
+        _process_pools.clear()
+
+
+def _grep_piece(binary, pattern, flags, max_count, directory, file, start,
+                stop):
+    """
+    Search a piece of a file for grep -j, see Grep._search_piece.
+    """
+    grep = Grep("grep")
+    grep.binary = binary
+    return grep._search_piece(pattern, flags, max_count, directory, file,
+                              start, stop)
 
 
 @register("grep")
-class Grep(App):
-    def _run(self, args):
-        if len(args) < 1:
+class Grep(StreamingApp):
+    """
+    grep [-vclniF] [-m NUM] [-j JOBS] PATTERN [FILE]...
+    The pattern is searched anywhere in the lines. Files are read in
+    chunks of whole lines, and the pattern is searched in a chunk at
+    once instead of line by line.
+
+    With -j, the files are split in pieces of whole lines searched
+    by up to JOBS processes, the output stays in the order of the
+    lines. Without it, grep never starts processes, as the workers
+    import the main module of the caller, see _process_pool.
+    """
+    supports_bytes = True
+    # the number of characters read from a file at once
+    chunk_size = 1 << 20
+    # the number of bytes of the pieces of files searched in parallel
+    piece_size = 1 << 22
+
+    def _stream(self, args, input_lines):
+        flags, max_count, jobs, pattern, files = self.__parse_args(args)
+        find, is_match = self.__compile(pattern, flags)
+        if len(files) == 0:
+            sources = [(None, self.__select_lines(
+                self._input_lines(input_lines), is_match, flags))]
+        else:
+            if jobs is not None and jobs > 1:
+                yield from self.__grep_parallel(pattern, flags, max_count,
+                                                jobs, files)
+                return
+            # line only patterns have no find function
+            sources = ((file, self.__select_file(file, find, is_match, flags)
+                        if find is not None else
+                        self.__select_lines(self._file_lines(file),
+                                            is_match, flags))
+                       for file in files)
+        prefix = self._encode("")
+        for file, selected in sources:
+            # the files are only read until the lines needed are found
+            if max_count is not None:
+                selected = islice(selected, max_count)
+            if len(files) > 1:
+                prefix = self._encode(f"{file}:")
+            if "l" in flags:
+                if next(selected, None) is not None:
+                    name = file if file is not None else "(standard input)"
+                    yield self._encode(f"{name}\n")
+            elif "c" in flags:
+                count = sum(1 for _ in selected)
+                yield prefix + self._encode(f"{count}\n")
+            elif "n" in flags:
+                for number, line in selected:
+                    yield prefix + self._encode(f"{number}:") + line
+            else:
+                for _, line in selected:
+                    yield prefix + line
+
+    @staticmethod
+    def __parse_args(args):
+        """
+        Get the flags, the maximum count, the number of jobs,
+        the pattern and the files.
+        """
+        flags = set()
+        max_count = None
+        jobs = None
+        index = 0
+        while (index < len(args) and args[index].startswith("-")
+               and len(args[index]) > 1):
+            option = args[index]
+            index += 1
+            if option == "--":
+                break
+            if option in ("-m", "-j"):
+                if index == len(args):
+                    raise ValueError("wrong number of arguments")
+                value = int(args[index])
+                index += 1
+                if option == "-j":
+                    if value < 1:
+                        raise ValueError("invalid number of jobs")
+                    jobs = value
+                else:
+                    # as in GNU grep, a negative count is no limit
+                    max_count = value if value >= 0 else None
+                continue
+            for flag in option[1:]:
+                if flag not in "vclniF":
+                    raise ValueError("Unknown option: " + option)
+                flags.add(flag)
+        if index == len(args):
             raise ValueError("wrong number of arguments")
-        if len(args) == 1:
-            if sys.stdin.isatty():
-                raise ValueError("empty input")
-            pattern = args[0]
-            for line in sys.stdin:
-                if re.match(pattern, line):
-                    print(line, end="")
+        return flags, max_count, jobs, args[index], args[index + 1:]
+
+    @staticmethod
+    def __limit(flags, max_count):
+        """
+        Get the number of selected lines needed from a file,
+        None when there is no limit.
+        """
+        if "l" in flags:
+            return 1 if max_count is None else min(max_count, 1)
+        return max_count
+
+    def __grep_parallel(self, pattern, flags, max_count, jobs, files):
+        """
+        Get the output lines of the files searched by jobs processes.
+        The pieces are searched ahead of the output, and their results
+        are used in order, so the output is the same as in one process.
+        """
+        pieces = ((index, file, start, stop)
+                  for index, file in enumerate(files)
+                  for start, stop in self.__pieces(file))
+        results = self.__search_pieces(pieces, pattern, flags, max_count,
+                                       jobs)
+        prefix = self._encode("")
+        for (_, file), file_results in groupby(
+                results, key=lambda result: result[0][:2]):
+            if len(files) > 1:
+                prefix = self._encode(f"{file}:")
+            limit = self.__limit(flags, max_count)
+            # the number of the lines before the piece,
+            # and of the selected lines
+            number = 0
+            count = 0
+            for _, future in file_results:
+                if limit is not None and count >= limit:
+                    # the lines needed are found
+                    future.cancel()
+                    continue
+                line_count, selected = future.result()
+                remaining = None if limit is None else limit - count
+                if "c" in flags:
+                    count += (selected if remaining is None
+                              else min(selected, remaining))
+                else:
+                    selected = selected[:remaining]
+                    if "n" in flags:
+                        for line_number, line in selected:
+                            yield (prefix + self._encode(
+                                f"{number + line_number}:") + line)
+                    elif "l" in flags:
+                        pass
+                    elif prefix:
+                        for line in selected:
+                            yield prefix + line
+                    else:
+                        yield from selected
+                    count += len(selected)
+                number += line_count
+            if "l" in flags:
+                if count > 0:
+                    yield self._encode(f"{file}\n")
+            elif "c" in flags:
+                yield prefix + self._encode(f"{count}\n")
+
+    def __pieces(self, file):
+        """
+        Get the (start, stop) byte offsets of the pieces of whole lines
+        of the file, stop is None for the last piece, read to the end.
+        Files other than regular files are one piece.
+        """
+        start = 0
+        try:
+            stat = os.stat(file)
+        except OSError:
+            # the error is raised by the search of the piece
+            stat = None
+        if stat is not None and S_ISREG(stat.st_mode):
+            size = stat.st_size
+            with open(file, "rb") as f:
+                while start + self.piece_size < size:
+                    f.seek(start + self.piece_size - 1)
+                    f.readline()
+                    stop = f.tell()
+                    if stop >= size:
+                        break
+                    yield start, stop
+                    start = stop
+        yield start, None
+
+    def __search_pieces(self, pieces, pattern, flags, max_count, jobs):
+        """
+        Get the (piece, future) of the pieces in order, submitting up to
+        twice jobs pieces ahead to the process pool.
+        The pieces not used are cancelled when the search stops.
+        """
+        pool = _process_pool(jobs)
+        # the working directory of the pool may be another one
+        directory = os.getcwd()
+        pending = deque()
+        try:
+            for piece in pieces:
+                _, file, start, stop = piece
+                future = pool.submit(_grep_piece, self.binary, pattern,
+                                     flags, max_count, directory, file,
+                                     start, stop)
+                pending.append((piece, future))
+                if len(pending) == 2 * jobs:
+                    yield pending.popleft()
+            while pending:
+                yield pending.popleft()
+        finally:
+            for _, future in pending:
+                future.cancel()
+
+    def _search_piece(self, pattern, flags, max_count, directory, file,
+                      start, stop):
+        """
+        Search the piece of the file from the start to the stop offset,
+        run in a process of the pool by _grep_piece.
+        The file is relative to the directory.
+        Returns the number of lines of the piece, only counted with -n,
+        and the count of its selected lines with -c, the list of their
+        (number, line) with -n, or the list of the lines.
+        """
+        find, is_match = self.__compile(pattern, flags)
+        try:
+            with open(os.path.join(directory, file), "rb") as f:
+                f.seek(start)
+                data = f.read() if stop is None else f.read(stop - start)
+        except OSError as e:
+            # the error names the file as the search in one process
+            e.filename = file
+            raise
+        stream = io.BytesIO(data)
+        if not self.binary:
+            # decoded as by _open
+            stream = io.TextIOWrapper(stream)
+        chunks = list(self.__chunks(stream))
+        newline = self._encode("\n")
+        line_count = 0
+        if "n" in flags:
+            line_count = sum(chunk.count(newline) for chunk in chunks)
+        if find is None:
+            lines = (line for chunk in chunks
+                     for line in self.__split_lines(chunk, newline))
+            selected = self.__select_lines(lines, is_match, flags)
         else:
-            pattern = args[0]
-            files = args[1:]
-            for file in files:
-                with open(file, "r") as f:
-                    lines = f.readlines()
-                    for line in lines:
-                        if re.match(pattern, line):
-                            if len(files) > 1:
-                                print(f"{file}:{line}", end="")
-                            else:
-                                print(line, end="")
+            selected = self.__select_chunks(chunks, find, is_match, flags)
+        selected = islice(selected, self.__limit(flags, max_count))
+        if "c" in flags:
+            return line_count, sum(1 for _ in selected)
+        if "n" in flags:
+            return line_count, list(selected)
+        return line_count, [line for _, line in selected]
+
+    def __compile(self, pattern: str, flags: set):
+        """
+        Get the functions searching the pattern, which are compiled once:
+        find(chunk, pos) returns the (start, end) of the first match
+        from pos in a chunk of lines, None if there is none,
+        and is_match(line) is true when the line matches.
+        find is None when the pattern must be searched line by line.
+        Patterns without special characters are searched as strings.
+        As in POSIX grep, the line break is not part of the line.
+        """
+        newline = self._encode("\n")
+        if "F" in flags or _REGEX_META.search(pattern) is None:
+            if "i" not in flags:
+                text = self._encode(pattern)
+                size = len(text)
+
+                def find(chunk, pos):
+                    start = chunk.find(text, pos)
+                    return None if start < 0 else (start, start + size)
+
+                def is_match(line):
+                    return text in line
+                return find, is_match
+            pattern = re.escape(pattern)
+        regex_flags = re.IGNORECASE if "i" in flags else 0
+        line_regex = re.compile(self._encode(pattern), regex_flags)
+
+        def is_match(line):
+            end = len(line)
+            if line[-1:] == newline:
+                end -= 1
+            return line_regex.search(line, 0, end) is not None
+        if _LINE_ONLY_REGEX.search(pattern) is not None:
+            return None, is_match
+        # ^ and $ match at the line breaks in a chunk
+        chunk_regex = re.compile(self._encode(pattern),
+                                 regex_flags | re.MULTILINE)
+
+        def find(chunk, pos):
+            match = chunk_regex.search(chunk, pos)
+            return None if match is None else match.span()
+        return find, is_match
+
+    @staticmethod
+    def __select_lines(lines, is_match, flags, first=1):
+        """
+        Get the (number, line) of the selected lines, the matching lines,
+        or the other lines with -v. The lines are numbered from first.
+        """
+        if "v" in flags:
+            for number, line in enumerate(lines, first):
+                if not is_match(line):
+                    yield number, line
+        else:
+            for number, line in enumerate(lines, first):
+                if is_match(line):
+                    yield number, line
+
+    def __select_chunks(self, chunks, find, is_match, flags):
+        """
+        Get the (number, line) of the selected lines of the chunks,
+        like __select_lines, searching each chunk at once.
+        Searching a chunk costs per match, so when most lines of
+        a chunk match, the next chunk is read line by line instead.
+        The lines found by the search are only numbered with -n.
+        """
+        newline = self._encode("\n")
+        invert = "v" in flags
+        numbered = "n" in flags
+        # the number of the lines before the chunk
+        number = 0
+        dense = False
+        for chunk in chunks:
+            line_count = chunk.count(newline)
+            matches = 0
+            if dense:
+                lines = (io.BytesIO(chunk) if self.binary
+                         else io.StringIO(chunk, newline="\n"))
+                for selected in self.__select_lines(lines, is_match, flags,
+                                                    number + 1):
+                    matches += 1
+                    yield selected
+                if invert:
+                    matches = line_count - matches
+            else:
+                position = 0
+                # the number of the lines before the position
+                line_number = number
+                matching_lines = self.__matching_lines(chunk, find,
+                                                       is_match, newline)
+                for start, end in matching_lines:
+                    matches += 1
+                    if invert:
+                        for line in self.__split_lines(chunk[position:start],
+                                                       newline):
+                            line_number += 1
+                            yield line_number, line
+                        line_number += 1
+                    else:
+                        if numbered:
+                            line_number += chunk.count(newline, position,
+                                                       start) + 1
+                        yield line_number, chunk[start:end]
+                    position = end
+                if invert:
+                    for line in self.__split_lines(chunk[position:],
+                                                   newline):
+                        line_number += 1
+                        yield line_number, line
+            number += line_count
+            dense = matches * 4 > line_count
+
+    def __select_file(self, file, find, is_match, flags):
+        """
+        Get the (number, line) of the selected lines of the file.
+        """
+        with self._open(file) as f:
+            yield from self.__select_chunks(self.__chunks(f), find,
+                                            is_match, flags)
+
+    def __chunks(self, stream):
+        """
+        Iterate over chunks of whole lines of the stream, only the last
+        one may not end with a line break.
+        """
+        newline = self._encode("\n")
+        empty = self._encode("")
+        rest = empty
+        for data in iter(lambda: stream.read(self.chunk_size), empty):
+            if rest:
+                data = rest + data
+            end = data.rfind(newline) + 1
+            # a line longer than a chunk is read with the next chunk
+            rest = data[end:]
+            if end > 0:
+                yield data[:end]
+        if rest:
+            yield rest
+
+    @staticmethod
+    def __matching_lines(chunk, find, is_match, newline):
+        """
+        Get the (start, end) of the matching lines of the chunk.
+        A match going over the end of its line, e.g. of "a\\s+b", is only
+        a match of the line if the line matches alone.
+        """
+        size = len(chunk)
+        pos = 0
+        while pos < size:
+            found = find(chunk, pos)
+            if found is None:
+                return
+            start, end = found
+            if start == size and chunk.endswith(newline):
+                # an empty match after the last line
+                return
+            line_start = chunk.rfind(newline, pos, start) + 1 or pos
+            # the end of the line, and of its text without the line break
+            text_end = chunk.find(newline, start)
+            if text_end < 0:
+                text_end = line_end = size
+            else:
+                line_end = text_end + 1
+            if end <= text_end or is_match(chunk[line_start:line_end]):
+                yield line_start, line_end
+            pos = line_end
+
+    @staticmethod
+    def __split_lines(text, newline):
+        """
+        Get the lines of the text, each one with its line break.
+        """
+        lines = text.split(newline)
+        last = lines.pop()
+        for line in lines:
+            yield line + newline
+        if last:
+            yield last
@@ -0,0 +1,159 @@
+"""
+This module defines the fused applications below:
+grep | head, sort | head, sort | uniq, cat | wc -l, cut | sort | uniq
+which replace these pipes in a single pass, see core.pipe_fusion.
+They are not registered, and are named after the first app of the pipe,
+as the errors of a pipe come from its first app.
+"""
+
+import heapq
+from collections import Counter
+from itertools import islice
+from core.app import StreamingApp
+from core.utils import text_lines
+from core.apps.basic_apps import Grep
+from core.apps.additional_apps import Cut
+
+
+def _sort_input(app: StreamingApp, args, input_lines):
+    """
+    Get the input lines and the reverse option of valid sort arguments.
+    """
+    reverse = len(args) > 0 and args[0] == "-r"
+    file = args[-1] if len(args) > int(reverse) else None
+    if file is None:
+        return app._input_lines(input_lines), reverse
+    return app._file_lines(file), reverse
+
+
+class GrepHead(Grep):
+    """
+    grep | head -n count, grep stops after count matches.
+    """
+    def __init__(self, count: int):
+        super().__init__("grep")
+        self._count = count
+
+    def _stream(self, args, input_lines):
+        yield from islice(super()._stream(args, input_lines), self._count)
+
+
+class SortHead(StreamingApp):
+    """
+    sort | head -n count, keeps only the count first lines in a heap.
+    Lines without line break are joined to the next sorted line by head,
+    so they are kept apart, and the ones sorted before the last
+    kept line are added back.
+    """
+    supports_bytes = True
+
+    def __init__(self, count: int):
+        super().__init__("sort")
+        self._count = count
+
+    def _stream(self, args, input_lines):
+        lines, reverse = _sort_input(self, args, input_lines)
+        partial_lines = []
+        newline = self._encode("\n")
+
+        def complete_lines():
+            for line in lines:
+                if line.endswith(newline):
+                    yield line
+                else:
+                    partial_lines.append(line)
+        if reverse:
+            kept = heapq.nlargest(self._count, complete_lines())
+        else:
+            kept = heapq.nsmallest(self._count, complete_lines())
+        if len(kept) == self._count:
+            # the lines after the last kept line are not read by head
+            partial_lines = [line for line in partial_lines
+                             if (line > kept[-1]) == reverse]
+        kept = sorted(kept + partial_lines, reverse=reverse)
+        yield from text_lines(kept)
+
+
+class SortUniq(StreamingApp):
+    """
+    sort | uniq, counts the lines instead of sorting all of them.
+    Lines without line break are joined to the next sorted line by uniq,
+    so all the sorted lines are needed when there are any.
+    """
+    supports_bytes = True
+
+    def __init__(self):
+        super().__init__("sort")
+
+    def _stream(self, args, input_lines):
+        lines, reverse = _sort_input(self, args, input_lines)
+        counts = Counter(lines)
+        unique_lines = sorted(counts, reverse=reverse)
+        newline = self._encode("\n")
+        if all(line.endswith(newline) for line in unique_lines):
+            yield from unique_lines
+            return
+        sorted_lines = (line for line in unique_lines
+                        for _ in range(counts[line]))
+        previous_line = None
+        for line in text_lines(sorted_lines):
+            if line != previous_line:
+                yield line
+            previous_line = line
+
+
+class CatWcLines(StreamingApp):
+    """
+    cat | wc -l, counts the lines of the files by blocks.
+    With count_on_error, the count of the lines read before an error
+    is written before the error is raised, as in the streaming mode.
+    """
+    supports_bytes = True
+
+    def __init__(self, count_on_error: bool = False):
+        super().__init__("cat")
+        self._count_on_error = count_on_error
+
+    def _stream(self, args, input_lines):
+        if len(args) == 0:
+            count = sum(1 for _ in self._input_lines(input_lines))
+            yield self._encode(f"{count}\n")
+            return
+        count = 0
+        empty = self._encode("")
+        newline = self._encode("\n")
+        last = empty
+        try:
+            for file in args:
+                with self._open(file) as f:
+                    for block in iter(lambda: f.read(65536), empty):
+                        count += block.count(newline)
+                        last = block[-1:]
+        except Exception:
+            if self._count_on_error:
+                yield self._line_count(count, last)
+            raise
+        yield self._line_count(count, last)
+
+    def _line_count(self, count: int, last):
+        """
+        Get the output of wc -l for the count of line breaks
+        and the last character read.
+        """
+        # the text of the files may not end with a line break
+        if last not in (self._encode(""), self._encode("\n")):
+            count += 1
+        return self._encode(f"{count}\n")
+
+
+class CutSortUniq(Cut):
+    """
+    cut | sort | uniq, drops the duplicated cut lines before sorting.
+    """
+    def __init__(self, reverse: bool):
+        super().__init__("cut")
+        self._reverse = reverse
+
+    def _stream(self, args, input_lines):
+        yield from sorted(set(super()._stream(args, input_lines)),
+                          reverse=self._reverse)
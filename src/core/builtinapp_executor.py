@@ -5,20 +5,23 @@ for executing builtin applications in a shell engine context.
 
 from core.error_handling import (AppRuntimeError, AppValueError,
                                  raise_error_handler, print_error_handler)
+from core.utils import current_stream
+import sys
 
 
 class BuiltinAppExecutor:
     """
     This class is responsible for executing builtin applications.
     Implicitly requires the shell engine to have methods for changing
-    directories, getting the current working directory, and setting
-    and unsetting variables.
+    directories, getting the current working directory, setting
+    and unsetting variables, and waiting for background jobs.
     """
     builtin_commands = {
             "cd": None,
             "pwd": None,
             "set": None,
-            "unset": None
+            "unset": None,
+            "wait": None
         }
 
     def __init__(self, engine):
@@ -31,13 +34,19 @@ class BuiltinAppExecutor:
             "cd": self._cd,
             "pwd": self._pwd,
             "set": self._set,
-            "unset": self._unset
+            "unset": self._unset,
+            "wait": self._wait
         }
 
-    def execute_builtin_app(self, app_name: str, args: list):
+    def execute_builtin_app(self, app_name: str, args: list,
+                            input_stream=None, output_stream=None):
         """
         Execute the builtin application with the given name and arguments.
+        The output and the printed errors go to the output stream,
+        the standard output by default. No builtin app reads its input.
         """
+        if output_stream is None:
+            output_stream = current_stream(sys.stdout)
         error_handler = raise_error_handler
         if app_name.startswith("_"):
             error_handler = print_error_handler
@@ -46,12 +55,17 @@ class BuiltinAppExecutor:
             command_method = self.builtin_commands[app_name]
             try:
                 # Execute the command method with the provided arguments
-                command_method(args)
+                command_method(args, output_stream)
+            except BrokenPipeError:
+                # the next command of a streaming pipe stopped reading
+                raise
             except ValueError as e:
-                error_handler.handle_error(AppValueError(e, app_name))
+                error_handler.handle_error(AppValueError(e, app_name),
+                                           output_stream)
             except Exception as e:
                 # Catch other potential exceptions during command execution
-                error_handler.handle_error(AppRuntimeError(e, app_name))
+                error_handler.handle_error(AppRuntimeError(e, app_name),
+                                           output_stream)
         else:
             # If the command name is not found in our map
             raise ValueError(f"unsupported application {app_name}")
@@ -76,7 +90,7 @@ class BuiltinAppExecutor:
     """
     Builtin application methods.
     """
-    def _cd(self, args: list):
+    def _cd(self, args: list, output_stream):
         """
         Change the current working directory.
         """
@@ -85,13 +99,13 @@ class BuiltinAppExecutor:
         path = args[0]
         self.shell_engine._change_directory(path)
 
-    def _pwd(self, args: list):
+    def _pwd(self, args: list, output_stream):
         """
         Get the current working directory.
         """
-        print(self.shell_engine._get_pwd())
+        print(self.shell_engine._get_pwd(), file=output_stream)
 
-    def _set(self, args: list):
+    def _set(self, args: list, output_stream):
         """
         Set a variable in the context.
         """
@@ -101,7 +115,7 @@ class BuiltinAppExecutor:
         value = args[1]
         self.shell_engine._set_var(var_name, value)
 
-    def _unset(self, args: list):
+    def _unset(self, args: list, output_stream):
         """
         Unset a variable in the context.
         """
@@ -109,3 +123,16 @@ class BuiltinAppExecutor:
             raise ValueError("unset command requires exactly one argument")
         var_name = args[0]
         self.shell_engine._unset_var(var_name)
+
+    def _wait(self, args: list, output_stream):
+        """
+        Wait for the background jobs given by id, e.g. 1 or %1,
+        or for all of them without arguments.
+        """
+        job_ids = []
+        for arg in args:
+            try:
+                job_ids.append(int(arg[1:] if arg.startswith("%") else arg))
+            except ValueError:
+                raise ValueError(f"invalid job id {arg}")
+        self.shell_engine._wait_jobs(job_ids if job_ids else None)
@@ -0,0 +1,105 @@
+"""
+This module compiles the abstract syntax tree (AST) of a command
+into nested Python closures for repeated execution.
+
+Constant parts of the command are folded at compile time: arguments
+made only of non-keywords and quoted strings without glob characters
+are evaluated once. Variables, globs and command substitutions are
+left to the eval nodes and evaluated at run time.
+
+The compiled closures execute sequences, pipes and calls the same way
+as the eval nodes, so a compiled command behaves like the interpreted one.
+"""
+
+from core.eval_tree import create_eval_node
+from core.eval_node import BackgroundNode, CallNode, PipeNode
+from core.pipe_fusion import fuse_stages
+from core.runtime import Context
+from core.shell_parser.ast_nodes import AstNode, constant_argument
+from typing import Callable, Iterator, Optional
+
+
+# a compiled call returns the output lines of a streaming app,
+# like the eval method of CallNode
+CompiledCommand = Callable[[Context], Optional[Iterator[str]]]
+
+
+def _compile_seq(ast: AstNode) -> CompiledCommand:
+    commands = [compile_ast(command) for command in ast.commands]
+
+    def run_seq(context: Context):
+        for command in commands:
+            command(context)
+    return run_seq
+
+
+def _compile_background(ast: AstNode) -> CompiledCommand:
+    command = compile_ast(ast.command)
+
+    def run_background(context: Context):
+        BackgroundNode.start(command, context)
+    return run_background
+
+
+def _compile_pipe(ast: AstNode) -> CompiledCommand:
+    stages = PipeNode.stages(ast)
+    commands = [compile_ast(command) for command in stages]
+    fused_commands = fuse_stages(stages, commands)
+
+    def run_pipe(context: Context):
+        PipeNode.run(commands, context, fused_commands)
+    return run_pipe
+
+
+def _compile_call(ast: AstNode) -> CompiledCommand:
+    # each part is (type, folded value, eval node for run time)
+    parts = []
+    for arg in ast.arguments_or_redirect:
+        if arg.type == "redirection":
+            file_names = constant_argument(arg.file_argument)
+            # an empty file name is left to raise at run time
+            if file_names:
+                value = [arg.redirect_symbol] + file_names
+            else:
+                value = None
+        else:
+            value = constant_argument(arg)
+        if value is not None:
+            parts.append((arg.type, value, None))
+        else:
+            parts.append((arg.type, None,
+                          create_eval_node(arg.type, arg)))
+
+    if all(node is None for _, _, node in parts):
+        evaluated_args = [(arg_type, value) for arg_type, value, _ in parts]
+
+        def run_constant_call(context: Context):
+            return CallNode.execute(evaluated_args, context)
+        return run_constant_call
+
+    def run_call(context: Context):
+        arg_context = CallNode.argument_context(context)
+        return CallNode.execute(((arg_type, value if node is None
+                                  else node.eval(arg_context))
+                                 for arg_type, value, node in parts),
+                                context)
+    return run_call
+
+
+_compilers = {
+    "seq": _compile_seq,
+    "background": _compile_background,
+    "pipe": _compile_pipe,
+    "call": _compile_call,
+}
+
+
+def compile_ast(ast: AstNode) -> CompiledCommand:
+    """
+    Compile the AST of a command into a closure taking the context.
+    """
+    try:
+        compiler = _compilers[ast.type]
+    except KeyError:
+        raise ValueError(f"unsupported compiled node {ast.type}")
+    return compiler(ast)
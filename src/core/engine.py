@@ -1,7 +1,10 @@
 from core.eval_tree import EvalTree
-from core.runtime import Context
-from core.shell_parser.parser import parse_command
+from core.runtime import Context, EngineOptions
+from core.shell_parser.parser import ParseCache, parse_command
+from core.compiler import compile_ast
 from core.error_handling import engine_error_handler
+from core.jobs import JobTable
+from core.result_cache import ResultCache
 import os
 
 
@@ -11,31 +14,132 @@ class ShellEngine:
     """
     def __init__(self, **kwargs):
         """
-        Initialize the shell engine with the given context.
+        Initialize the shell engine with the given context and options.
         The context includes variables, IO streams,
-        exit flag, and the shell engine itself.
+        and the shell engine itself. The options below are kept in
+        the options of the engine instead, see EngineOptions.
         the exit flag is used to determine if the engine should exit
         when an recoverable error occurs.
+        the parse cache size is the number of parsed commands to keep,
+        0 disables the parse cache.
+        the parser backend is either "earley" or "descent".
+        the pipeline mode is "sequential" (default), or "streaming"
+        to run the commands of a pipe concurrently.
+        pipeline fusion replaces common pipes, e.g. sort | head,
+        by single pass apps, it is disabled when it is False.
+        the result cache size is the number of bytes of command
+        outputs to keep for read-only commands, 0 (default) disables
+        the result cache.
+        the bytes mode passes bytes instead of text between the apps
+        supporting it, through pipes and redirected files, when it is
+        True, so the data is only decoded when it is written to text
+        streams, e.g. the terminal.
         """
+        self.options = EngineOptions(**{
+            name: kwargs.pop(name) for name in EngineOptions.__slots__
+            if name in kwargs})
         self.__context = Context()
         for key, value in kwargs.items():
             self.__context.set(key, value)
         self.__context.set("self_engine", self)
-        self.__exit_flag = kwargs.get("exit_flag", True)
+        self.__exit_flag = self.options.exit_flag
+        # the cache keeps the built eval trees, which can be evaluated
+        # many times, so a cached command is neither parsed nor built again
+        self.__parse_cache = ParseCache(self.options.parse_cache_size,
+                                        self.options.parser_backend,
+                                        EvalTree)
+        self.__jobs = JobTable()
+        result_cache_size = self.options.result_cache_size
+        self.__result_cache = (ResultCache(result_cache_size)
+                               if result_cache_size > 0 else None)
 
-    def _eval_command(self, command: str):
+    def _eval_command(self, command: str, input_stream=None,
+                      output_stream=None):
         """
         Evaluate the command.
+        The given streams replace the streams of the engine for this
+        command only, and the errors printed when the exit flag is
+        False go to the given output stream.
         """
+        context = self.__context
+        if input_stream is not None or output_stream is not None:
+            context = context.copy()
+            if input_stream is not None:
+                context.set("input_stream", input_stream)
+            if output_stream is not None:
+                context.set("output_stream", output_stream)
         try:
-            parsed_tree = parse_command(command)
-            eval_tree = EvalTree(parsed_tree)
-            eval_tree.eval(self.__context)
+            eval_tree = self._get_eval_tree(command)
+            if self.__result_cache is not None:
+                self.__result_cache.eval(eval_tree, context)
+            else:
+                eval_tree.eval(context)
         except Exception as e:
-            engine_error_handler(e, self.__exit_flag)
+            engine_error_handler(e, self.__exit_flag, output_stream)
+
+    def _compile_command(self, command: str):
+        """
+        Compile the command into a callable which evaluates it
+        on the engine, errors are handled as in _eval_command.
+        Raises ParseError if the command is invalid.
+        """
+        compiled = compile_ast(parse_command(command,
+                                             self.__parse_cache.backend))
+
+        def run():
+            try:
+                compiled(self.__context)
+            except Exception as e:
+                engine_error_handler(e, self.__exit_flag)
+        return run
     """
     Some methods to manage the state of the engine.
     """
+    def _get_eval_tree(self, command: str) -> EvalTree:
+        """
+        Get the eval tree of the command through the parse cache.
+        """
+        return self.__parse_cache.parse(command)
+
+    def _get_parse_cache_info(self) -> dict:
+        """
+        Get the hit/miss statistics of the parse cache.
+        """
+        return self.__parse_cache.info()
+
+    def _clear_parse_cache(self):
+        """
+        Clear the parse cache.
+        """
+        self.__parse_cache.clear()
+
+    def _get_result_cache_info(self) -> dict:
+        """
+        Get the statistics of the result cache, None if it is disabled.
+        """
+        if self.__result_cache is None:
+            return None
+        return self.__result_cache.info()
+
+    def _clear_result_cache(self):
+        """
+        Clear the result cache.
+        """
+        if self.__result_cache is not None:
+            self.__result_cache.clear()
+
+    def _start_job(self, command, context: Context, output_stream) -> int:
+        """
+        Start the command in the background, see JobTable.start.
+        """
+        return self.__jobs.start(command, context, output_stream)
+
+    def _wait_jobs(self, job_ids: list = None):
+        """
+        Wait for the background jobs, all of them when job_ids is None.
+        """
+        self.__jobs.wait(job_ids)
+
     def _change_directory(self, path: str):
         """
         Change the current working directory.
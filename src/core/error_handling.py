@@ -65,21 +65,22 @@ Error Handlers
 class ErrorHandler(ABC):
     """Abstract base class for error handling strategies."""
     @abstractmethod
-    def handle_error(exception: Exception):
-        """Handles the exception encountered during App execution."""
+    def handle_error(exception: Exception, output_stream=None):
+        """Handles the exception encountered during App execution.
+        Messages go to output_stream, sys.stdout by default."""
         pass
 
 
 class RaiseErrorHandler(ErrorHandler):
     """Error handler strategy that raises an error."""
-    def handle_error(self, exception: Exception):
+    def handle_error(self, exception: Exception, output_stream=None):
         raise exception
 
 
 class PrintErrorHandler(ErrorHandler):
     """Error handler strategy that prints the error message."""
-    def handle_error(self, exception: Exception):
-        print(exception)
+    def handle_error(self, exception: Exception, output_stream=None):
+        print(exception, file=output_stream)
 
 
 # singleton instances of error handlers
@@ -87,11 +88,13 @@ print_error_handler = PrintErrorHandler()
 raise_error_handler = RaiseErrorHandler()
 
 
-def engine_error_handler(exception: Exception, exit_flag: bool = True):
+def engine_error_handler(exception: Exception, exit_flag: bool = True,
+                         output_stream=None):
     """
     Handles errors encountered during the execution of the engine.
     When exit_flag is True, it raises the exception.
-    When exit_flag is False, it prints the error message.
+    When exit_flag is False, it prints the error message
+    to output_stream, sys.stdout by default.
     Unrecoverable exceptions are always raised.
     """
     if exit_flag:
@@ -100,7 +103,7 @@ def engine_error_handler(exception: Exception, exit_flag: bool = True):
         expected_error_handler = print_error_handler
     if isinstance(exception, recoverable_exceptions):
         # Handle recoverable exceptions
-        expected_error_handler.handle_error(exception)
+        expected_error_handler.handle_error(exception, output_stream)
     else:
         # Handle unrecoverable exceptions, always raise
         raise exception
@@ -13,6 +13,9 @@ runtime components.
 
 Each `EvalNode` subclass:
 - Is registered with a specific type name (e.g., "seq", "pipe", "call").
+- Builds its child nodes once in `__init__`, so a tree can be evaluated
+  many times against different contexts. Nodes keep no state between
+  evaluations.
 - Implements an `eval` method that takes a context object and processes its
   part of the AST.
 - Specifies the form of its return value in its docstring, allowing parent
@@ -20,12 +23,17 @@ Each `EvalNode` subclass:
 - Raises ValueError for invalid command structures.
 """
 
-from core.eval_tree import EvalNode, register, create_eval_node
-from core.utils import IOFileManager, char_with_info_list
-from core.runtime import execute_app
+from core.eval_tree import EvalNode, EvalTree, register, create_eval_node
+from core.utils import (IOFileManager, BoundedPipe, QuotedString,
+                        text_lines, current_stream)
+from core.globbing import DirectoryListing, expand_glob
+from core.runtime import engine_options, execute_app
+from core.pipe_fusion import fuse_stages
 from core.shell_parser.parser import parse_command
-from glob import glob
-from io import StringIO
+from core.shell_parser.ast_nodes import AstNode
+from io import BytesIO, StringIO
+import sys
+import threading
 
 
 @register("seq")
@@ -34,18 +42,49 @@ class SeqNode(EvalNode):
     Represents a sequence of eval nodes.
     Return value: None
     """
-    def __init__(self, ast: dict):
-        self.commands = ast.get("commands", [])
+    def __init__(self, ast: AstNode):
+        self.commands = [create_eval_node(command.type, command)
+                         for command in ast.commands]
 
     def eval(self, context=None):
         """
         Evaluate the sequence of commands.
         """
-        for command in self.commands:
-            command_node = create_eval_node(command["type"], command)
+        for command_node in self.commands:
             command_node.eval(context)
 
 
+@register("background")
+class BackgroundNode(EvalNode):
+    """
+    Represents a command run in the background with "&".
+    The command runs as a job of the shell engine, see core.jobs,
+    and its output is written when it finishes.
+    Return value: None
+    """
+    def __init__(self, ast: AstNode):
+        self.command = create_eval_node(ast.command.type, ast.command)
+
+    def eval(self, context=None):
+        """
+        Start the command and return without waiting for it.
+        """
+        BackgroundNode.start(self.command.eval, context)
+
+    @staticmethod
+    def start(command, context):
+        """
+        Start the command, a callable taking the context of the job,
+        as a job of the engine of the context.
+        """
+        # the output stream of this thread, the job runs in another one
+        output_stream = context.get("output_stream")
+        if output_stream is None:
+            output_stream = current_stream(sys.stdout)
+        context.get("self_engine")._start_job(command, context,
+                                              output_stream)
+
+
 @register("pipe")
 class PipeNode(EvalNode):
     """
@@ -63,46 +102,178 @@ class PipeNode(EvalNode):
         pipe's final destination. Otherwise, output goes to a temporary
         in-memory stream, which then becomes the input for a new PipeSegment
         instance created for the remaining commands.
+        When the command is a streaming app, its output lines are passed
+        to the next segment as they are, without the in-memory stream.
+        They are produced as the next commands read them, and the command
+        is closed when the rest of the pipe has finished, so it stops
+        reading its input as soon as the next commands stop reading.
+        The commands are callables taking the segment context,
+        e.g. the eval methods of the command nodes.
         """
         def __init__(self, commands, context):
             self.commands = commands
             self.ori_pipe_context = context
 
-        def execute(self, input_stream):
+        def execute(self, input_stream, input_lines=None):
             my_seg_context = self.ori_pipe_context.copy()
             my_seg_context.set("input_stream", input_stream)
+            my_seg_context.set("input_lines", input_lines)
             # the last command in the pipe
             if len(self.commands) == 1:
                 my_seg_context.set("output_stream",
                                    self.ori_pipe_context.get("output_stream"))
+                my_seg_context.set("output_lines", False)
             else:
-                pipe_out = StringIO()
+                # the output of the bytes mode is bytes
+                if engine_options(self.ori_pipe_context).bytes_mode:
+                    pipe_out = BytesIO()
+                else:
+                    pipe_out = StringIO()
                 my_seg_context.set("output_stream", pipe_out)
-            command_node = create_eval_node(self.commands[0]["type"],
-                                            self.commands[0])
-            command_node.eval(my_seg_context)
+                my_seg_context.set("output_lines", True)
+            output_lines = self.commands[0](my_seg_context)
             # the last command in the pipe
             if len(self.commands) == 1:
                 return
             else:
-                pipe_in = StringIO(pipe_out.getvalue())
-                pipe_out.close()
                 next_seg = PipeNode.PipeSegment(self.commands[1:],
                                                 self.ori_pipe_context)
+                if output_lines is not None:
+                    pipe_out.close()
+                    try:
+                        next_seg.execute(None, text_lines(output_lines))
+                    finally:
+                        # the next commands may stop reading early,
+                        # e.g. head, closing the lines stops this command
+                        output_lines.close()
+                    return
+                pipe_in = type(pipe_out)(pipe_out.getvalue())
+                pipe_out.close()
                 next_seg.execute(pipe_in)
                 pipe_in.close()
                 return
 
-    def __init__(self, ast: dict):
-        self.commands = ast.get("commands", [])
+    class StreamingPipe:
+        """
+        Runs all commands of a pipe concurrently, each command but the
+        last one in its own thread, the last one in the calling thread.
+        Neighbouring commands are connected by a BoundedPipe, so the
+        memory used by a pipe is bounded whatever the size of the data,
+        and the output starts before the first command has finished.
+
+        When a command finishes, the output end of its pipe is closed
+        so the next command sees the end of its input, and the input end
+        is closed so the previous command gets BrokenPipeError instead
+        of blocking on a full pipe. That error is expected and ignored,
+        other errors are raised in the order of the commands after
+        all of them have finished.
+        """
+        def __init__(self, commands, context):
+            self.commands = commands
+            self.ori_pipe_context = context
+
+        def execute(self, input_stream):
+            count = len(self.commands)
+            binary = bool(engine_options(self.ori_pipe_context).bytes_mode)
+            pipes = [BoundedPipe(binary=binary) for _ in range(count - 1)]
+            errors = [None] * count
+            # the streams of the threads are the streams of this thread
+            if input_stream is None:
+                input_stream = current_stream(sys.stdin)
+            output_stream = self.ori_pipe_context.get("output_stream")
+            if output_stream is None:
+                output_stream = current_stream(sys.stdout)
+            threads = []
+            for index in range(count):
+                stage_input = (input_stream if index == 0
+                               else pipes[index - 1].reader)
+                stage_output = (output_stream if index == count - 1
+                                else pipes[index].writer)
+                args = (index, stage_input, stage_output, errors)
+                if index == count - 1:
+                    self._run_stage(*args)
+                else:
+                    thread = threading.Thread(target=self._run_stage,
+                                              args=args, daemon=True)
+                    thread.start()
+                    threads.append(thread)
+            for thread in threads:
+                thread.join()
+            for index, error in enumerate(errors):
+                if error is None:
+                    continue
+                if index < count - 1 and isinstance(error, BrokenPipeError):
+                    continue
+                raise error
+
+        def _run_stage(self, index, input_stream, output_stream, errors):
+            my_seg_context = self.ori_pipe_context.copy()
+            my_seg_context.set("input_stream", input_stream)
+            my_seg_context.set("input_lines", None)
+            my_seg_context.set("output_stream", output_stream)
+            my_seg_context.set("output_lines", False)
+            try:
+                self.commands[index](my_seg_context)
+            except BaseException as e:
+                errors[index] = e
+            finally:
+                if index < len(self.commands) - 1:
+                    try:
+                        output_stream.close()
+                    except BrokenPipeError:
+                        pass
+                if index > 0:
+                    input_stream.close()
+
+    def __init__(self, ast: AstNode):
+        stages = PipeNode.stages(ast)
+        self.commands = [create_eval_node(command.type, command)
+                         for command in stages]
+        self.fused_commands = fuse_stages(
+            stages, [command.eval for command in self.commands])
 
     def eval(self, context=None):
         """
         Evaluate the pipe of commands.
-        Set up the first command, then recursively trigger the next segment.
+        Set up the first command, then recursively trigger the next segment,
+        or run all the commands at once in the streaming pipeline mode.
+        """
+        PipeNode.run([command.eval for command in self.commands], context,
+                     self.fused_commands)
+
+    @staticmethod
+    def stages(ast: AstNode) -> list:
+        """
+        Get the commands of a pipe, with the nested pipes of a left
+        nested pipe AST (a | b | c) flattened into a single list.
+        """
+        commands = []
+        pending = [ast]
+        while pending:
+            node = pending.pop()
+            if node.type == "pipe":
+                pending.extend(reversed(node.commands))
+            else:
+                commands.append(node)
+        return commands
+
+    @staticmethod
+    def run(commands, context, fused_commands=None):
+        """
+        Run the commands of a pipe, callables taking the segment context.
+        The pipeline_mode of the engine options selects how: "streaming"
+        runs the commands concurrently, otherwise they run one after
+        another. fused_commands are the commands with fused stages,
+        see fuse_stages, used unless the pipeline_fusion option is False.
         """
-        pipe_segment = PipeNode.PipeSegment(self.commands, context)
-        pipe_segment.execute(context.get("input_stream"))
+        options = engine_options(context)
+        if fused_commands is not None and options.pipeline_fusion:
+            commands = fused_commands
+        if options.pipeline_mode == "streaming":
+            pipe = PipeNode.StreamingPipe(commands, context)
+        else:
+            pipe = PipeNode.PipeSegment(commands, context)
+        pipe.execute(context.get("input_stream"))
 
 
 @register("call")
@@ -111,24 +282,48 @@ class CallNode(EvalNode):
     Execute a command with arguments and redirections.
     Responsible for handling the command name and its arguments.
     It also manages input and output redirections.
-    Return value: None
+    Return value: None, or an iterator of the output lines when
+    the "output_lines" of the context is True and the app is
+    a streaming app.
     """
-    def __init__(self, ast: dict):
-        self.args = ast.get("arguments_or_redirect", [])
+    def __init__(self, ast: AstNode):
+        self.args = [(arg.type, create_eval_node(arg.type, arg))
+                     for arg in ast.arguments_or_redirect]
 
     def eval(self, context=None):
         """
         Evaluate the call command.
         """
+        arg_context = CallNode.argument_context(context)
+        return CallNode.execute(((arg_type, argment_node.eval(arg_context))
+                                 for arg_type, argment_node in self.args),
+                                context)
+
+    @staticmethod
+    def argument_context(context):
+        """
+        Get the context to evaluate the arguments of a call in,
+        where the globs of the arguments share a directory listing.
+        """
+        arg_context = context.copy()
+        arg_context.set("directory_listing", DirectoryListing())
+        return arg_context
+
+    @staticmethod
+    def execute(evaluated_args, context):
+        """
+        Execute the call from its evaluated arguments and redirections.
+        evaluated_args is an iterable of (type, value) pairs, where value
+        is the return value of the argument or redirection node.
+        Returns the output lines of a streaming app, see execute_app.
+        """
         is_redirect_in = False
         is_redirect_out = False
         redirect_infile, redirect_outfile = None, None
         redirect_outfile_mode = "w"
         argments = []
-        for arg in self.args:
-            argment_node = create_eval_node(arg["type"], arg)
-            argment = argment_node.eval(context)
-            if arg["type"] == "redirection" and argment[0] == "<":
+        for arg_type, argment in evaluated_args:
+            if arg_type == "redirection" and argment[0] == "<":
                 if is_redirect_in:
                     raise ValueError("multiple redirect in")
                 is_redirect_in = True
@@ -138,7 +333,7 @@ class CallNode(EvalNode):
                 # arguments for the command.
                 if len(argment) > 2:
                     argments.extend(argment[2:])
-            elif arg["type"] == "redirection" and argment[0][0] == ">":
+            elif arg_type == "redirection" and argment[0][0] == ">":
                 if is_redirect_out:
                     raise ValueError("multiple redirect out")
                 is_redirect_out = True
@@ -152,17 +347,24 @@ class CallNode(EvalNode):
             else:
                 argments.extend(argment)
         call_context = context.copy()
+        if redirect_infile is not None or redirect_outfile is not None:
+            # the redirected files are closed when the call returns,
+            # so the output lines can't be read later
+            call_context.set("output_lines", False)
         with IOFileManager(redirect_infile, redirect_outfile,
-                           redirect_outfile_mode) as io_file_manager:
+                           redirect_outfile_mode,
+                           bool(engine_options(context).bytes_mode)
+                           ) as io_file_manager:
             input_stream, output_stream = io_file_manager
             if input_stream is not None:
                 call_context.set("input_stream", input_stream)
+                call_context.set("input_lines", None)
             if output_stream is not None:
                 call_context.set("output_stream", output_stream)
             if len(argments) == 0:
                 raise ValueError("no command to execute")
             command = argments[0]
-            execute_app(command, argments[1:], call_context)
+            return execute_app(command, argments[1:], call_context)
 
 
 @register("argument")
@@ -174,48 +376,57 @@ class ArgumentNode(EvalNode):
     Return value: list of strings, which is the final argument list
     to be passed to the command.
     """
-    def __init__(self, ast: dict):
-        self.values = ast.get("values", [])
+    def __init__(self, ast: AstNode):
+        self.values = [(value.type, create_eval_node(value.type, value))
+                       for value in ast.values]
 
     def eval(self, context) -> list[str]:
         """
         Evaluate the argument node.
         Arguments are split into a list of strings.
-        Using the char_with_info_list to wrap the content
-        and glob module for globbing.
+        Using the QuotedString to wrap the content
+        and core.globbing for globbing, "**" matches directories
+        recursively.
         """
         args = []
-        for value in self.values:
-            arg = create_eval_node(value["type"], value).eval(context)
-            if (value["type"] == "backquoted"):
+        for value_type, value_node in self.values:
+            arg = value_node.eval(context)
+            if (value_type == "backquoted"):
                 # we can't use parse_command here,
                 # as the command substitution may contain backquote,
                 # and we don't support recursive command substitution.
                 # so we need to split it manually.
                 self.__command_substitution_split(arg, args)
-            elif (value["type"] == "single_quoted"
-                  or value["type"] == "double_quoted"):
+            elif (value_type == "single_quoted"
+                  or value_type == "double_quoted"):
                 self.__non_or_quoted_split(arg, args, True)
             else:
                 self.__non_or_quoted_split(arg, args, False)
         result = []
-        for i in range(len(args)):
-            arg = args[i]
-            if str(arg) == "":
+        listing = None
+        for arg in args:
+            text = str(arg)
+            if text == "":
                 continue
-            glob_mask = arg.get_glob_mask()
-            globbed = glob(glob_mask)
+            if not arg.has_glob_chars():
+                result.append(text)
+                continue
+            if listing is None:
+                listing = context.get("directory_listing")
+                if listing is None:
+                    listing = DirectoryListing()
+            globbed = expand_glob(arg.get_glob_mask(), listing)
             if len(globbed) > 0:
                 result.extend(globbed)
             else:
-                result.append(str(arg))
+                result.append(text)
         return result
 
     def __command_substitution_split(self, arg: str,
-                                     args: list[char_with_info_list]):
+                                     args: list[QuotedString]):
         """
         Split the command substitution content.
-        Also wrap the content with char_with_info_list for globbing.
+        Also wrap the content with QuotedString for globbing.
         """
         tmp_args = []
         if arg.startswith(" "):
@@ -227,7 +438,7 @@ class ArgumentNode(EvalNode):
             tmp_args.append("")
         for i in range(len(tmp_args)):
             # command substitution content treated as nonquoted
-            tmp_args[i] = char_with_info_list(tmp_args[i], False)
+            tmp_args[i] = QuotedString(tmp_args[i], False)
         if len(args) > 0:
             args[-1] += tmp_args[0]
             if len(tmp_args) > 1:
@@ -236,13 +447,13 @@ class ArgumentNode(EvalNode):
             args.extend(tmp_args)
 
     def __non_or_quoted_split(self, arg: str,
-                              args: list[char_with_info_list],
+                              args: list[QuotedString],
                               is_quoted: bool):
         """
         Extend the arg to the args list.
-        Also wrap the content with char_with_info_list for globbing.
+        Also wrap the content with QuotedString for globbing.
         """
-        arg = char_with_info_list(arg, is_quoted)
+        arg = QuotedString(arg, is_quoted)
         if len(args) > 0:
             args[-1] += arg
         else:
@@ -256,14 +467,14 @@ class RedirectionNode(EvalNode):
     Return value: list of strings, which is the redirection symbol
     and the file names(maybe more than one).
     """
-    def __init__(self, ast: dict):
-        self.redirect_symbol = ast.get("redirect_symbol", "")
-        self.file_argument = ast.get("file_argument", {})
+    def __init__(self, ast: AstNode):
+        self.redirect_symbol = ast.redirect_symbol
+        file_argument = ast.file_argument
+        self.file_argument = create_eval_node(file_argument.type,
+                                              file_argument)
 
     def eval(self, context) -> list[str]:
-        file_names_node = create_eval_node(self.file_argument["type"],
-                                           self.file_argument)
-        file_names = file_names_node.eval(context)
+        file_names = self.file_argument.eval(context)
         if len(file_names) == 0:
             raise ValueError("no file to redirect")
         return [self.redirect_symbol] + file_names
@@ -275,8 +486,8 @@ class NonKeywordNode(EvalNode):
     Represents a non-keyword argument in a command.
     Return value: string, which is the argument value.
     """
-    def __init__(self, ast: dict):
-        self.value = ast.get("value", "")
+    def __init__(self, ast: AstNode):
+        self.value = ast.value
 
     def eval(self, context) -> str:
         return self.value
@@ -288,8 +499,8 @@ class SingleQuotedNode(EvalNode):
     Represents a single quoted argument in a command.
     Return value: string, which is the argument value.
     """
-    def __init__(self, ast: dict):
-        self.value = ast.get("value", "")
+    def __init__(self, ast: AstNode):
+        self.value = ast.value
 
     def eval(self, context) -> str:
         return self.value
@@ -302,13 +513,13 @@ class DoubleQuotedNode(EvalNode):
     Return value: string, which is the double quoted content
     and the command substitution content.
     """
-    def __init__(self, ast: dict):
-        self.values = ast.get("values", [])
+    def __init__(self, ast: AstNode):
+        self.values = [create_eval_node(value.type, value)
+                       for value in ast.values]
 
     def eval(self, context) -> str:
         contents = []
-        for value in self.values:
-            content_node = create_eval_node(value["type"], value)
+        for content_node in self.values:
             content = content_node.eval(context)
             contents.append(content)
         return "".join(contents)
@@ -319,25 +530,31 @@ class BackQuotedNode(EvalNode):
     """
     Represents a back quoted argument in a command.
     Responsible for command substitution.
+    The substituted command is parsed on the first evaluation,
+    and its eval tree is reused by later evaluations.
     Return value: string, which is the command substitution value.
     """
-    def __init__(self, ast: dict):
-        self.content = ast.get("value", {})
+    def __init__(self, ast: AstNode):
+        content = ast.value
+        self.content = create_eval_node(content.type, content)
+        self.command_tree = None
 
     def eval(self, context) -> str:
-        command_content_node = create_eval_node(self.content["type"],
-                                                self.content)
-        command_content = command_content_node.eval(context)
         pipe_out = StringIO()
         # use the root context as the command substitution
         # is evaluated separately.
         pipe_context = context.get_root_context_copy()
         pipe_context.set("output_stream", pipe_out)
-        # there won't be backquote in the command content,
-        # so it won't be recursive.
-        parse_tree = parse_command(command_content)
-        command_node = create_eval_node(parse_tree["type"], parse_tree)
-        command_node.eval(pipe_context)
+        if self.command_tree is None:
+            # there won't be backquote in the command content,
+            # so it won't be recursive.
+            command_content = self.content.eval(context)
+            engine = context.get("self_engine")
+            if engine is not None:
+                self.command_tree = engine._get_eval_tree(command_content)
+            else:
+                self.command_tree = EvalTree(parse_command(command_content))
+        self.command_tree.eval(pipe_context)
         command_out = pipe_out.getvalue()
         pipe_out.close()
         if command_out.endswith("\n"):
@@ -354,8 +571,8 @@ class VariableNode(EvalNode):
     Represents a variable in a command.
     Return value: string, which is the variable expansion value.
     """
-    def __init__(self, ast: dict):
-        self.value = ast.get("value", "")
+    def __init__(self, ast: AstNode):
+        self.value = ast.value
 
     def eval(self, context) -> str:
         var_name = self.value
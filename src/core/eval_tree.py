@@ -8,6 +8,7 @@ and a factory function to create eval nodes based on their type name.
 from abc import ABC, abstractmethod
 from typing import Dict, Type
 from core.runtime import Context
+from core.shell_parser.ast_nodes import AstNode, from_dict
 
 
 class EvalNode(ABC):
@@ -16,7 +17,7 @@ class EvalNode(ABC):
     The run method should be implemented by subclasses.
     """
     @abstractmethod
-    def __init__(self, ast: dict):
+    def __init__(self, ast: AstNode):
         pass
 
     @abstractmethod
@@ -34,7 +35,7 @@ def register(name: str):
     return decorator
 
 
-def create_eval_node(name: str, ast: dict) -> EvalNode:
+def create_eval_node(name: str, ast: AstNode) -> EvalNode:
     """
     Create an eval node instance by name.
     """
@@ -49,12 +50,16 @@ class EvalTree:
     """
     Represents a tree of eval nodes. Which is used to evaluate the command.
     """
-    def __init__(self, ast: dict):
+    def __init__(self, ast: AstNode):
         """
         Initialize the eval tree with an AST (abstract syntax tree).
-        The AST is a dictionary representation of the tree.
+        The AST is the typed AST from the parser, the dict form
+        of the AST is also accepted for compatibility.
         """
-        self.root = create_eval_node(ast["type"], ast)
+        if isinstance(ast, dict):
+            ast = from_dict(ast)
+        self.ast = ast
+        self.root = create_eval_node(ast.type, ast)
 
     def eval(self, context: Context = None):
         """
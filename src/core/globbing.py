@@ -0,0 +1,160 @@
+"""
+This module expands the glob patterns of arguments.
+
+It follows glob.glob with recursive=True: the matches come in the same
+order, files starting with a dot only match patterns starting with
+a dot, and a "**" path component matches any files and zero or more
+directories.
+
+The directories are read with os.scandir through a DirectoryListing,
+which keeps the listings for the arguments of one command, so each
+directory is read once, and "**" only descends into the directories
+known from the file types read by scandir instead of trying to list
+every file.
+"""
+
+import fnmatch
+import functools
+import os
+import re
+from typing import Dict, Iterator, List, Tuple
+
+
+_MAGIC_CHECK = re.compile("[*?[]")
+
+
+def has_magic(pattern: str) -> bool:
+    return _MAGIC_CHECK.search(pattern) is not None
+
+
+def _is_hidden(name: str) -> bool:
+    return name[0] == "."
+
+
+def _join(dirname: str, basename: str) -> str:
+    if not dirname or not basename:
+        return dirname or basename
+    return os.path.join(dirname, basename)
+
+
+class DirectoryListing:
+    """
+    A cache of the directories listed by os.scandir.
+    Each listing is the list of (name, is_dir) of the directory entries,
+    a directory which can't be read is empty.
+    """
+    def __init__(self):
+        self._listings: Dict[str, List[Tuple[str, bool]]] = {}
+
+    def entries(self, dirname: str) -> List[Tuple[str, bool]]:
+        listing = self._listings.get(dirname)
+        if listing is None:
+            listing = []
+            try:
+                with os.scandir(dirname or os.curdir) as it:
+                    for entry in it:
+                        try:
+                            is_dir = entry.is_dir()
+                        except OSError:
+                            is_dir = False
+                        listing.append((entry.name, is_dir))
+            except OSError:
+                pass
+            self._listings[dirname] = listing
+        return listing
+
+
+def expand_glob(pattern: str, listing: DirectoryListing) -> List[str]:
+    """
+    Get the paths matching the glob pattern, like glob.glob with
+    recursive=True, listing the directories through the listing.
+    """
+    paths = _iglob(pattern, listing, False)
+    if pattern[:2] == "**":
+        # the empty match of "**" itself
+        first = next(paths, None)
+        if first:
+            return [first] + list(paths)
+    return list(paths)
+
+
+def _iglob(pattern: str, listing: DirectoryListing,
+           dironly: bool) -> Iterator[str]:
+    dirname, basename = os.path.split(pattern)
+    if not has_magic(pattern):
+        if basename:
+            if os.path.lexists(pattern):
+                yield pattern
+        elif os.path.isdir(dirname):
+            # patterns ending with a slash only match directories
+            yield pattern
+        return
+    if not dirname:
+        if basename == "**":
+            yield from _glob_recursive(dirname, listing, dironly)
+        else:
+            yield from _glob_pattern(dirname, basename, listing, dironly)
+        return
+    if dirname != pattern and has_magic(dirname):
+        dirs = _iglob(dirname, listing, True)
+    else:
+        dirs = [dirname]
+    for parent in dirs:
+        if basename == "**":
+            names = _glob_recursive(parent, listing, dironly)
+        elif has_magic(basename):
+            names = _glob_pattern(parent, basename, listing, dironly)
+        else:
+            names = _glob_literal(parent, basename)
+        for name in names:
+            yield os.path.join(parent, name)
+
+
+def _glob_pattern(dirname: str, pattern: str, listing: DirectoryListing,
+                  dironly: bool) -> List[str]:
+    match = _compile_pattern(pattern)
+    hidden = _is_hidden(pattern)
+    return [name for name, is_dir in listing.entries(dirname)
+            if (is_dir or not dironly) and (hidden or not _is_hidden(name))
+            and match(name)]
+
+
+@functools.lru_cache(maxsize=256)
+def _compile_pattern(pattern: str):
+    return re.compile(fnmatch.translate(pattern)).match
+
+
+def _glob_literal(dirname: str, basename: str) -> List[str]:
+    if basename:
+        if os.path.lexists(_join(dirname, basename)):
+            return [basename]
+    elif os.path.isdir(dirname):
+        return [basename]
+    return []
+
+
+def _glob_recursive(dirname: str, listing: DirectoryListing,
+                    dironly: bool) -> Iterator[str]:
+    """
+    Yield "" for the directory itself, then the relative paths of
+    the files, or only of the directories if dironly, below it.
+    """
+    yield ""
+    # the directories left to list, with their relative paths,
+    # the last one is the next one in depth first order
+    stack = [iter(listing.entries(dirname))]
+    prefixes = [""]
+    while stack:
+        for name, is_dir in stack[-1]:
+            if _is_hidden(name) or (dironly and not is_dir):
+                continue
+            relative = _join(prefixes[-1], name)
+            yield relative
+            if is_dir:
+                stack.append(iter(listing.entries(_join(dirname,
+                                                        relative))))
+                prefixes.append(relative)
+                break
+        else:
+            stack.pop()
+            prefixes.pop()
@@ -0,0 +1,123 @@
+"""
+This module provides the background jobs of a shell engine,
+the commands started with "&" and joined by the wait builtin.
+
+Each job runs in its own thread and writes its output to its own buffer.
+The buffer is written to the output stream of the job as a single block
+when the job finishes, so the output of concurrent jobs never interleaves.
+A job doesn't read the input of the shell, its input is empty.
+It sees the variables of the shell when it starts, as a subshell.
+The jobs are not daemon threads, so the process waits for them to
+finish and write their output before it exits.
+"""
+
+from core.error_handling import print_error_handler, recoverable_exceptions
+from io import StringIO
+from typing import Callable, Dict, List, Optional
+import threading
+
+
+class Job:
+    """
+    A command running in the background.
+    The command is a callable taking the context of the job,
+    e.g. the eval method of a command node.
+    """
+    def __init__(self, job_id: int, command: Callable, context,
+                 output_stream, output_lock: threading.Lock):
+        self.job_id = job_id
+        self._command = command
+        self._output_stream = output_stream
+        self._output_lock = output_lock
+        self._buffer = StringIO()
+        # the variables of the job are those of the shell when it starts,
+        # and the command substitutions of the job read them too
+        self._context = context.snapshot()
+        self._context.set("input_stream", StringIO())
+        self._context.set("input_lines", None)
+        self._context.set("output_stream", self._buffer)
+        self._context.set("output_lines", False)
+        self.thread = threading.Thread(target=self._run,
+                                       name=f"shell-job-{job_id}")
+
+    def _run(self):
+        try:
+            self._command(self._context)
+        except recoverable_exceptions as e:
+            # nothing waits for the job to raise the error,
+            # it is printed as by the interactive shell
+            print_error_handler.handle_error(e, self._buffer)
+        finally:
+            self._write_output()
+
+    def _write_output(self):
+        """
+        Write the buffered output to the output stream of the job.
+        """
+        output = self._buffer.getvalue()
+        self._buffer = None
+        self._context = None
+        if output == "":
+            return
+        with self._output_lock:
+            try:
+                self._output_stream.write(output)
+                self._output_stream.flush()
+            except ValueError:
+                # the output stream was closed before the job finished,
+                # e.g. by a command substitution
+                pass
+
+    def join(self):
+        self.thread.join()
+
+
+class JobTable:
+    """
+    The background jobs of a shell engine, numbered from 1.
+    A job is kept until it is waited for.
+    """
+    def __init__(self):
+        self._jobs: Dict[int, Job] = {}
+        self._next_id = 1
+        self._lock = threading.Lock()
+        # the output of the jobs is written one job at a time
+        self._output_lock = threading.Lock()
+
+    def start(self, command: Callable, context, output_stream) -> int:
+        """
+        Start the command in the background with a copy of the context,
+        its output is written to the output stream when it finishes.
+        Returns the id of the job.
+        """
+        with self._lock:
+            job_id = self._next_id
+            self._next_id += 1
+            job = Job(job_id, command, context, output_stream,
+                      self._output_lock)
+            self._jobs[job_id] = job
+        job.thread.start()
+        return job_id
+
+    def wait(self, job_ids: Optional[List[int]] = None):
+        """
+        Wait for the jobs to finish and remove them from the table,
+        all the jobs when job_ids is None.
+        Raises ValueError for an unknown job id.
+        """
+        if job_ids is None:
+            while True:
+                with self._lock:
+                    if len(self._jobs) == 0:
+                        return
+                    job_id = min(self._jobs)
+                    job = self._jobs.pop(job_id)
+                job.join()
+        with self._lock:
+            for job_id in job_ids:
+                if job_id not in self._jobs:
+                    raise ValueError(f"no such job {job_id}")
+            jobs = [self._jobs.pop(job_id) for job_id in job_ids
+                    if job_id in self._jobs]
+        for job in jobs:
+            job.join()
@@ -0,0 +1,199 @@
+"""
+This module provides the pipeline fusion pass over the stages of a pipe.
+
+Some common pipes are replaced by a fused app doing the work of all
+their commands in a single pass, e.g. sort | head keeps the first lines
+in a heap instead of sorting all of them. A fusion rule matches the
+app names of consecutive stages, and builds the fused stage from
+their arguments, or returns None when the arguments are not supported.
+
+Only calls made of constant arguments without redirections are fused,
+so the arguments are known before run time, and the output of a fused
+pipe is the same as the output of the commands it replaces.
+The fused apps live in core.apps.fused_apps, which is only imported
+when a pipe is fused.
+"""
+
+from core.app import StreamingApp
+from core.runtime import Context, engine_options, stream_app
+from core.shell_parser.ast_nodes import AstNode, constant_argument
+from typing import Callable, List, Optional
+
+
+class FusedStage:
+    """
+    A stage of a pipe running a fused app.
+    It is called with the segment context like the eval method of a call,
+    and returns the output lines when the context asks for them.
+    streaming_app replaces the app in the streaming pipeline mode, where
+    the commands after a failing command still write their output.
+    """
+    def __init__(self, app: StreamingApp, args: list,
+                 streaming_app: Optional[StreamingApp] = None):
+        self.app = app
+        self.args = args
+        self.streaming_app = streaming_app
+
+    def __call__(self, context: Context):
+        app = self.app
+        if (self.streaming_app is not None
+                and engine_options(context).pipeline_mode == "streaming"):
+            app = self.streaming_app
+        return stream_app(app, self.args, context)
+
+
+FusionRule = Callable[[List[list]], Optional[FusedStage]]
+
+_fusion_rules: List[tuple] = []
+
+
+def fusion_rule(*app_names: str):
+    """
+    Register a fusion rule for consecutive stages calling the apps.
+    The rule takes the argument lists of the stages.
+    """
+    def decorator(rule: FusionRule):
+        _fusion_rules.append((app_names, rule))
+        # try the longest rules first
+        _fusion_rules.sort(key=lambda item: -len(item[0]))
+        return rule
+    return decorator
+
+
+def _constant_call(ast: AstNode) -> Optional[list]:
+    """
+    Get the app name and the arguments of a call made only of
+    constant arguments, None if the call can't be fused.
+    """
+    if ast.type != "call":
+        return None
+    words = []
+    for arg in ast.arguments_or_redirect:
+        if arg.type != "argument":
+            return None
+        value = constant_argument(arg)
+        if value is None:
+            return None
+        words.extend(value)
+    if len(words) == 0:
+        return None
+    return words
+
+
+def fuse_stages(stages: List[AstNode], commands: list) -> list:
+    """
+    Get the commands of a pipe, with the commands of fusable stages
+    replaced by fused stages. stages are the ASTs of the commands.
+    """
+    calls = [_constant_call(stage) for stage in stages]
+    fused = []
+    index = 0
+    while index < len(stages):
+        fused_stage, length = _match(calls, index)
+        if fused_stage is None:
+            fused.append(commands[index])
+            index += 1
+        else:
+            fused.append(fused_stage)
+            index += length
+    return fused
+
+
+def _match(calls: list, index: int):
+    """
+    Get the fused stage starting at index and the number of stages
+    it replaces, (None, 0) if no rule applies.
+    """
+    for app_names, rule in _fusion_rules:
+        words = calls[index:index + len(app_names)]
+        if (len(words) != len(app_names)
+                or any(call is None for call in words)
+                or tuple(call[0] for call in words) != app_names):
+            continue
+        fused_stage = rule([call[1:] for call in words])
+        if fused_stage is not None:
+            return fused_stage, len(app_names)
+    return None, 0
+
+
+"""
+Fusion rules.
+"""
+
+
+def _head_count(args: list) -> Optional[int]:
+    """
+    Get the number of lines of head reading its input, None if the
+    arguments are not supported. Counts under 1 are not fused, as head
+    then reads no line and the previous command may still fail.
+    """
+    if len(args) == 0:
+        return 10
+    if len(args) != 2 or args[0] != "-n":
+        return None
+    try:
+        count = int(args[1])
+    except ValueError:
+        return None
+    return count if count > 0 else None
+
+
+def _is_sort_args(args: list, with_file: bool = True) -> bool:
+    """
+    Check the arguments are valid for sort, reading a file or its input.
+    """
+    if len(args) == 0:
+        return True
+    if len(args) == 1:
+        return args[0] == "-r" or with_file
+    return len(args) == 2 and args[0] == "-r" and with_file
+
+
+@fusion_rule("grep", "head")
+def _fuse_grep_head(args: list) -> Optional[FusedStage]:
+    grep_args, head_args = args
+    count = _head_count(head_args)
+    if len(grep_args) == 0 or count is None:
+        return None
+    from core.apps.fused_apps import GrepHead
+    return FusedStage(GrepHead(count), grep_args)
+
+
+@fusion_rule("sort", "head")
+def _fuse_sort_head(args: list) -> Optional[FusedStage]:
+    sort_args, head_args = args
+    count = _head_count(head_args)
+    if not _is_sort_args(sort_args) or count is None:
+        return None
+    from core.apps.fused_apps import SortHead
+    return FusedStage(SortHead(count), sort_args)
+
+
+@fusion_rule("sort", "uniq")
+def _fuse_sort_uniq(args: list) -> Optional[FusedStage]:
+    sort_args, uniq_args = args
+    if not _is_sort_args(sort_args) or len(uniq_args) != 0:
+        return None
+    from core.apps.fused_apps import SortUniq
+    return FusedStage(SortUniq(), sort_args)
+
+
+@fusion_rule("cat", "wc")
+def _fuse_cat_wc(args: list) -> Optional[FusedStage]:
+    cat_args, wc_args = args
+    if wc_args != ["-l"]:
+        return None
+    from core.apps.fused_apps import CatWcLines
+    # wc -l still counts the lines read before cat fails
+    return FusedStage(CatWcLines(), cat_args,
+                      streaming_app=CatWcLines(count_on_error=True))
+
+
+@fusion_rule("cut", "sort", "uniq")
+def _fuse_cut_sort_uniq(args: list) -> Optional[FusedStage]:
+    cut_args, sort_args, uniq_args = args
+    if (not _is_sort_args(sort_args, with_file=False)
+            or len(uniq_args) != 0):
+        return None
+    from core.apps.fused_apps import CutSortUniq
+    return FusedStage(CutSortUniq(sort_args == ["-r"]), cut_args)
@@ -0,0 +1,271 @@
+"""
+This module provides the result cache of the shell engine, which keeps
+the output of read-only commands to reuse it when they run again.
+
+Only commands made of calls to pure apps, see app_factory.register,
+with constant arguments are cached. A command writing a file through
+a redirection, running in the background, or calling a builtin app
+such as cd or set is evaluated without the cache. The output of
+a cached command is keyed by its canonical AST and by the state
+(path, size, mtime_ns) of every argument and input redirection
+naming a file, so a changed file is never served from the cache.
+A command reading its input stream is not stored, as its output
+depends on that input.
+
+The cache is bounded by the total size in bytes of the stored outputs,
+encoded as UTF-8 as they are written to files, the least recently used
+outputs are evicted first.
+"""
+
+from core.app_factory import is_pure_app
+from core.eval_tree import EvalTree
+from core.runtime import Context
+from core.shell_parser.ast_nodes import AstNode, constant_argument
+from core.utils import current_stream, is_binary_stream
+from collections import OrderedDict
+from typing import List, Optional
+import os
+import sys
+import threading
+
+
+def _read_paths(ast: AstNode) -> Optional[List[str]]:
+    """
+    Get the words of a read-only command which may name the files it
+    reads, None if the command can't be cached.
+    """
+    if ast.type in ("seq", "pipe"):
+        paths = []
+        for command in ast.commands:
+            command_paths = _read_paths(command)
+            if command_paths is None:
+                return None
+            paths.extend(command_paths)
+        return paths
+    if ast.type != "call":
+        return None
+    words = []
+    for arg in ast.arguments_or_redirect:
+        if arg.type == "redirection":
+            if arg.redirect_symbol != "<":
+                return None
+            value = constant_argument(arg.file_argument)
+        else:
+            value = constant_argument(arg)
+        if value is None:
+            return None
+        words.extend(value)
+    if len(words) == 0 or not is_pure_app(words[0]):
+        return None
+    return words[1:]
+
+
+def _encoded_size(text: str) -> int:
+    """
+    Get the number of bytes of the text written to a file.
+    """
+    if text.isascii():
+        return len(text)
+    return len(text.encode("utf-8", "surrogateescape"))
+
+
+def _file_state(path: str) -> tuple:
+    """
+    Get the state of the file at the path, or the path alone when
+    there is no such file, e.g. for a grep pattern.
+    """
+    try:
+        stat = os.stat(path)
+    except (OSError, ValueError):
+        return (path,)
+    return (os.path.abspath(path), stat.st_size, stat.st_mtime_ns)
+
+
+class _TrackedInput:
+    """
+    Input stream recording whether the command read it.
+    Checking the kind of the stream is not reading it,
+    reading its buffer is reading it.
+    """
+    def __init__(self, stream, owner=None):
+        self._stream = stream
+        # the input recording the reads, the stream itself or
+        # the text stream of a buffer
+        self._owner = owner if owner is not None else self
+        self.used = False
+
+    @property
+    def binary(self) -> bool:
+        return is_binary_stream(self._stream)
+
+    @property
+    def buffer(self):
+        buffer = getattr(self._stream, "buffer", None)
+        if buffer is None:
+            return None
+        return _TrackedInput(buffer, self._owner)
+
+    def isatty(self) -> bool:
+        return self._stream.isatty()
+
+    def readable(self) -> bool:
+        return self._stream.readable()
+
+    def read(self, *args):
+        self._owner.used = True
+        return self._stream.read(*args)
+
+    def readline(self, *args):
+        self._owner.used = True
+        return self._stream.readline(*args)
+
+    def readlines(self, *args):
+        self._owner.used = True
+        return self._stream.readlines(*args)
+
+    def __iter__(self):
+        self._owner.used = True
+        return iter(self._stream)
+
+    def __getattr__(self, name):
+        # any other use may read the stream
+        self._owner.used = True
+        return getattr(self._stream, name)
+
+
+class _TeeOutput:
+    """
+    Output stream writing through to the output stream of the command,
+    and keeping the output until it exceeds the limit in bytes.
+    """
+    def __init__(self, stream, limit: int):
+        self._stream = stream
+        self._limit = limit
+        self._parts = []
+        self._size = 0
+
+    def write(self, text: str) -> int:
+        self._stream.write(text)
+        if self._parts is not None:
+            self._size += _encoded_size(text)
+            if self._size > self._limit:
+                # too large to be stored
+                self._parts = None
+            else:
+                self._parts.append(text)
+        return len(text)
+
+    def flush(self):
+        self._stream.flush()
+
+    def isatty(self) -> bool:
+        return False
+
+    def getvalue(self) -> Optional[str]:
+        """
+        Get the output, None if it was too large.
+        """
+        if self._parts is None:
+            return None
+        return "".join(self._parts)
+
+    def size(self) -> int:
+        """
+        Get the number of bytes of the output.
+        """
+        return self._size
+
+
+class ResultCache:
+    """
+    A size-bounded LRU cache of command outputs.
+    The capacity is the total number of bytes of the outputs.
+    """
+    def __init__(self, capacity: int):
+        if capacity < 0:
+            raise ValueError("result cache capacity must be non-negative")
+        self.capacity = capacity
+        self.hits = 0
+        self.misses = 0
+        self.bypasses = 0
+        self._size = 0
+        self._cache = OrderedDict()
+        # the cache may be shared by commands evaluated in several threads
+        self._lock = threading.Lock()
+
+    def eval(self, eval_tree: EvalTree, context: Context):
+        """
+        Evaluate the eval tree, or write its cached output.
+        """
+        paths = _read_paths(eval_tree.ast)
+        if self.capacity == 0 or paths is None:
+            with self._lock:
+                self.bypasses += 1
+            eval_tree.eval(context)
+            return
+        key = (repr(eval_tree.ast),
+               tuple(_file_state(path) for path in paths))
+        output_stream = context.get("output_stream")
+        if output_stream is None:
+            output_stream = current_stream(sys.stdout)
+        with self._lock:
+            entry = self._cache.get(key)
+            if entry is not None:
+                self.hits += 1
+                self._cache.move_to_end(key)
+            else:
+                self.misses += 1
+        if entry is not None:
+            output_stream.write(entry[0])
+            return
+        input_stream = context.get("input_stream")
+        if input_stream is None:
+            input_stream = current_stream(sys.stdin)
+        tracked_input = _TrackedInput(input_stream)
+        tee_output = _TeeOutput(output_stream, self.capacity)
+        command_context = context.copy()
+        command_context.set("input_stream", tracked_input)
+        command_context.set("output_stream", tee_output)
+        eval_tree.eval(command_context)
+        output = tee_output.getvalue()
+        if output is not None and not tracked_input.used:
+            self._store(key, output, tee_output.size())
+
+    def _store(self, key: tuple, output: str, size: int):
+        with self._lock:
+            if key in self._cache:
+                return
+            # the size in bytes is kept, not to encode the output again
+            self._cache[key] = (output, size)
+            self._size += size
+            while self._size > self.capacity:
+                # evict the least recently used output
+                _, (_, evicted_size) = self._cache.popitem(last=False)
+                self._size -= evicted_size
+
+    def info(self) -> dict:
+        """
+        Get the statistics of the cache.
+        """
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "bypasses": self.bypasses,
+                "hit_rate": self.hits / lookups if lookups else 0.0,
+                "entries": len(self._cache),
+                "size": self._size,
+                "capacity": self.capacity,
+            }
+
+    def clear(self):
+        """
+        Remove all the outputs and reset the statistics.
+        """
+        with self._lock:
+            self._cache.clear()
+            self._size = 0
+            self.hits = 0
+            self.misses = 0
+            self.bypasses = 0
@@ -4,16 +4,23 @@ to manage the shell engine's runtime.
 """
 
 import core.app_factory as app_factory
+from core.app import StreamingApp
 from core.builtinapp_executor import BuiltinAppExecutor
+from core.utils import (LineStream, binary_input, binary_output,
+                        current_stream, text_input, text_output, write_lines)
 import sys
 
 
 class Context:
     """
     Context class to manage the state of the execution environment.
+    A copy of a context is a child scope, which stores only the values
+    set on it and reads the other values through its parent,
+    so copying a context doesn't depend on the number of values.
     """
-    def __init__(self, root_context=None):
+    def __init__(self, root_context=None, parent=None):
         self._context = dict()
+        self._parent = parent
         self._root_context = root_context if root_context is not None else self
 
     def set(self, key: str, value):
@@ -26,16 +33,20 @@ class Context:
         """
         Get a value from the context.
         """
-        return self._context.get(key, None)
+        context = self
+        while context is not None:
+            values = context._context
+            if key in values:
+                return values[key]
+            context = context._parent
+        return None
 
     def copy(self):
         """
         Create a copy of the context.
         """
-        # create a new context with the same root context
-        new_context = Context(self._root_context)
-        new_context._context = self._context.copy()
-        return new_context
+        # create a child scope with the same root context
+        return Context(self._root_context, self)
 
     def get_root_context_copy(self):
         """
@@ -43,32 +54,57 @@ class Context:
         """
         return self._root_context.copy()
 
+    def snapshot(self):
+        """
+        Get a new root context with the values of this context,
+        read through its parents when it is made. Unlike a copy, it
+        doesn't see the values set later on this context or its parents.
+        """
+        contexts = []
+        context = self
+        while context is not None:
+            contexts.append(context)
+            context = context._parent
+        snapshot = Context()
+        for context in reversed(contexts):
+            snapshot._context.update(context._context)
+        return snapshot
 
-class IOContextManager:
+
+class EngineOptions:
     """
-    Context manager to manage the input and output streams.
-    It will automatically recover the streams when exiting the context.
+    The options of a shell engine, see ShellEngine.
+    They are kept by the engine apart from the variables of its context,
+    so $name doesn't read them and set doesn't change them.
     """
-    def __init__(self, input_stream=None, output_stream=None):
-        if input_stream is not None:
-            self.input_stream = input_stream
-        else:
-            self.input_stream = sys.stdin
-        if output_stream is not None:
-            self.output_stream = output_stream
-        else:
-            self.output_stream = sys.stdout
-        self.original_input = sys.stdin
-        self.original_output = sys.stdout
-
-    def __enter__(self):
-        sys.stdin = self.input_stream
-        sys.stdout = self.output_stream
-        return self
-
-    def __exit__(self, exc_type, exc_value, traceback):
-        sys.stdin = self.original_input
-        sys.stdout = self.original_output
+    __slots__ = ("exit_flag", "parse_cache_size", "parser_backend",
+                 "pipeline_mode", "pipeline_fusion", "result_cache_size",
+                 "bytes_mode")
+
+    def __init__(self, exit_flag: bool = True, parse_cache_size: int = 1024,
+                 parser_backend: str = "earley",
+                 pipeline_mode: str = "sequential",
+                 pipeline_fusion: bool = True, result_cache_size: int = 0,
+                 bytes_mode: bool = False):
+        self.exit_flag = exit_flag
+        self.parse_cache_size = parse_cache_size
+        self.parser_backend = parser_backend
+        self.pipeline_mode = pipeline_mode
+        self.pipeline_fusion = pipeline_fusion
+        self.result_cache_size = result_cache_size
+        self.bytes_mode = bytes_mode
+
+
+_default_options = EngineOptions()
+
+
+def engine_options(context: Context) -> EngineOptions:
+    """
+    Get the options of the engine evaluating in the context,
+    the default options when the context has no engine.
+    """
+    engine = context.get("self_engine")
+    return engine.options if engine is not None else _default_options
 
 
 def execute_app(app: str, args: list, context: Context):
@@ -77,14 +113,100 @@ def execute_app(app: str, args: list, context: Context):
     This function checks if the application is a builtin app or a regular app.
     If it's a builtin app, it uses the BuiltinAppExecutor to execute it.
     If it's a regular app, it uses the app factory to create and execute it.
+
+    The input lines of a previous streaming app are read from the
+    "input_lines" of the context when it is set, instead of
+    the input stream. When the "output_lines" of the context is True,
+    a streaming app returns its output lines as an iterator instead of
+    writing them to the output stream. Otherwise None is returned.
+
+    When the bytes_mode of the engine options is True, the apps supporting
+    bytes read and write bytes, and their output lines are bytes,
+    see App.supports_bytes. The other apps read and write text
+    decoded from and encoded to these bytes.
     """
+    binary = _bytes_mode(context)
     if BuiltinAppExecutor.check_builtin_app(app):
         app_instance = BuiltinAppExecutor(context.get("self_engine"))
-        with IOContextManager(context.get("input_stream"),
-                              context.get("output_stream")):
-            app_instance.execute_builtin_app(app, args)
+        app_instance.execute_builtin_app(app, args,
+                                         _input_stream(context, False),
+                                         _output_stream(context, False))
+        return None
+    app_instance = app_factory.create_app(app)
+    if (not isinstance(app_instance, StreamingApp)
+            or (binary and not app_instance.supports_bytes)):
+        app_instance.binary = binary and app_instance.supports_bytes
+        output_stream = _output_stream(context, app_instance.binary)
+        try:
+            app_instance.exec(args,
+                              _input_stream(context, app_instance.binary),
+                              output_stream)
+        finally:
+            if app_instance.binary:
+                output_stream.flush()
+        return None
+    return stream_app(app_instance, args, context)
+
+
+def _bytes_mode(context: Context) -> bool:
+    return bool(engine_options(context).bytes_mode)
+
+
+def _input_stream(context: Context, binary: bool):
+    """
+    Get the input stream of the context, the input lines are
+    read through a LineStream when they are set.
+    Defaults to the standard input.
+    In the bytes mode, the stream reads bytes if binary is True,
+    and text otherwise.
+    """
+    input_lines = context.get("input_lines")
+    if input_lines is not None:
+        input_stream = LineStream(input_lines, _bytes_mode(context))
     else:
-        app_instance = app_factory.create_app(app)
-        with IOContextManager(context.get("input_stream"),
-                              context.get("output_stream")):
-            app_instance.exec(args)
+        input_stream = context.get("input_stream")
+        if input_stream is None:
+            input_stream = current_stream(sys.stdin)
+    if not _bytes_mode(context):
+        return input_stream
+    return binary_input(input_stream) if binary else text_input(input_stream)
+
+
+def _output_stream(context: Context, binary: bool):
+    """
+    Get the output stream of the context, defaults to the standard output.
+    In the bytes mode, the stream writes bytes if binary is True,
+    and text otherwise.
+    """
+    output_stream = context.get("output_stream")
+    if output_stream is None:
+        output_stream = current_stream(sys.stdout)
+    if not _bytes_mode(context):
+        return output_stream
+    return (binary_output(output_stream) if binary
+            else text_output(output_stream))
+
+
+def stream_app(app_instance: StreamingApp, args: list, context: Context):
+    """
+    Execute the streaming app instance with the given arguments and context,
+    like a streaming app executed by execute_app.
+    The app must support bytes in the bytes mode.
+    """
+    app_instance.binary = _bytes_mode(context)
+    input_lines = context.get("input_lines")
+    if input_lines is None:
+        input_stream = _input_stream(context, app_instance.binary)
+        input_lines = None if input_stream.isatty() else input_stream
+    output_lines = app_instance.stream(args, input_lines)
+    if context.get("output_lines"):
+        return output_lines
+    output_stream = _output_stream(context, app_instance.binary)
+    try:
+        write_lines(output_stream, output_lines)
+    finally:
+        # stop the app when the output stream is broken
+        output_lines.close()
+        if app_instance.binary:
+            output_stream.flush()
+    return None
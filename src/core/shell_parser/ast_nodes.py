@@ -0,0 +1,223 @@
+"""
+This module defines the typed abstract syntax tree (AST) of a command.
+
+Each AST node is a small class with __slots__ instead of a dict,
+which saves memory and attribute lookups on large command lines.
+The type name of a node is a class attribute, matching the "type"
+key of the dict form of the AST.
+
+to_dict and from_dict convert between the typed AST
+and the dict form, which is kept for compatibility.
+constant_argument evaluates the arguments known before run time.
+"""
+
+from typing import Dict, Optional, Type
+
+
+class AstNode:
+    """
+    Base class for all AST nodes.
+    Subclasses define the type name and the fields of the node.
+    """
+    __slots__ = ()
+    type = ""
+    fields = ()
+
+    def __eq__(self, other):
+        if type(self) is not type(other):
+            return NotImplemented
+        return ([getattr(self, field) for field in self.fields]
+                == [getattr(other, field) for field in other.fields])
+
+    def __repr__(self):
+        values = ", ".join(f"{field}={getattr(self, field)!r}"
+                           for field in self.fields)
+        return f"{type(self).__name__}({values})"
+
+
+_ast_node_registry: Dict[str, Type[AstNode]] = {}
+
+
+def register(cls: Type[AstNode]):
+    _ast_node_registry[cls.type] = cls
+    return cls
+
+
+@register
+class Seq(AstNode):
+    __slots__ = ("commands",)
+    type = "seq"
+    fields = ("commands",)
+
+    def __init__(self, commands: list):
+        self.commands = commands
+
+
+@register
+class Background(AstNode):
+    __slots__ = ("command",)
+    type = "background"
+    fields = ("command",)
+
+    def __init__(self, command: AstNode):
+        self.command = command
+
+
+@register
+class Pipe(AstNode):
+    __slots__ = ("commands",)
+    type = "pipe"
+    fields = ("commands",)
+
+    def __init__(self, commands: list):
+        self.commands = commands
+
+
+@register
+class Call(AstNode):
+    __slots__ = ("arguments_or_redirect",)
+    type = "call"
+    fields = ("arguments_or_redirect",)
+
+    def __init__(self, arguments_or_redirect: list):
+        self.arguments_or_redirect = arguments_or_redirect
+
+
+@register
+class Redirection(AstNode):
+    __slots__ = ("redirect_symbol", "file_argument")
+    type = "redirection"
+    fields = ("redirect_symbol", "file_argument")
+
+    def __init__(self, redirect_symbol: str, file_argument: "Argument"):
+        self.redirect_symbol = redirect_symbol
+        self.file_argument = file_argument
+
+
+@register
+class Argument(AstNode):
+    __slots__ = ("values",)
+    type = "argument"
+    fields = ("values",)
+
+    def __init__(self, values: list):
+        self.values = values
+
+
+@register
+class DoubleQuoted(AstNode):
+    __slots__ = ("values",)
+    type = "double_quoted"
+    fields = ("values",)
+
+    def __init__(self, values: list):
+        self.values = values
+
+
+@register
+class BackQuoted(AstNode):
+    __slots__ = ("value",)
+    type = "backquoted"
+    fields = ("value",)
+
+    def __init__(self, value: "NonKeyword"):
+        self.value = value
+
+
+@register
+class NonKeyword(AstNode):
+    __slots__ = ("value",)
+    type = "non_keyword"
+    fields = ("value",)
+
+    def __init__(self, value: str):
+        self.value = value
+
+
+@register
+class SingleQuoted(AstNode):
+    __slots__ = ("value",)
+    type = "single_quoted"
+    fields = ("value",)
+
+    def __init__(self, value: str):
+        self.value = value
+
+
+@register
+class Variable(AstNode):
+    __slots__ = ("value",)
+    type = "variable"
+    fields = ("value",)
+
+    def __init__(self, value: str):
+        self.value = value
+
+
+def to_dict(node: AstNode) -> dict:
+    """
+    Convert a typed AST into its dict form.
+    """
+    ast = {"type": node.type}
+    for field in node.fields:
+        value = getattr(node, field)
+        if isinstance(value, AstNode):
+            value = to_dict(value)
+        elif isinstance(value, list):
+            value = [to_dict(item) for item in value]
+        ast[field] = value
+    return ast
+
+
+def from_dict(ast: dict) -> AstNode:
+    """
+    Convert the dict form of an AST into a typed AST.
+    Raises ValueError for an unknown node type.
+    """
+    try:
+        cls = _ast_node_registry[ast["type"]]
+    except KeyError:
+        raise ValueError(f"unsupported ast node {ast['type']}")
+    values = []
+    for field in cls.fields:
+        value = ast[field]
+        if isinstance(value, dict):
+            value = from_dict(value)
+        elif isinstance(value, list):
+            value = [from_dict(item) for item in value]
+        values.append(value)
+    return cls(*values)
+
+
+_GLOB_CHARS = "*?["
+
+
+def _constant_value(ast: AstNode) -> Optional[str]:
+    """
+    Get the string value of a constant argument value,
+    None if it has to be evaluated at run time.
+    """
+    if ast.type in ("non_keyword", "single_quoted"):
+        return ast.value
+    if ast.type == "double_quoted":
+        contents = [_constant_value(value) for value in ast.values]
+        if None in contents:
+            return None
+        return "".join(contents)
+    return None
+
+
+def constant_argument(ast: Argument) -> Optional[list]:
+    """
+    Evaluate a constant argument, made only of non-keywords and quoted
+    strings without glob characters, as the argument eval node would.
+    Returns the argument list, None if it has to be evaluated at run time.
+    """
+    contents = [_constant_value(value) for value in ast.values]
+    if None in contents:
+        return None
+    argument = "".join(contents)
+    # glob characters, quoted or not, may match files at run time
+    if any(char in argument for char in _GLOB_CHARS):
+        return None
+    return [argument] if argument != "" else []
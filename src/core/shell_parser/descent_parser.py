@@ -0,0 +1,187 @@
+"""
+This module provides a hand-written tokenizer and recursive descent parser
+for the shell grammar in grammar.lark.
+
+It runs in linear time over the command line and produces exactly the
+same AST as the CommandTransformer of the Lark based parser,
+including the left nesting of sequences and pipes.
+"""
+
+from core.error_handling import ParseError
+from core.shell_parser.ast_nodes import (
+    AstNode, Seq, Background, Pipe, Call, Redirection, Argument,
+    DoubleQuoted, BackQuoted, NonKeyword, SingleQuoted, Variable)
+import re
+
+
+# the terminals of grammar.lark
+_NON_KEYWORD = re.compile(r"[^|;&\$\s<>\"'`]+")
+_VARIABLE = re.compile(r"\$[^|;&\$\s<>\"'`]*")
+_SINGLE_QUOTE = re.compile(r"'[^']*'")
+_DOUBLEQUOTE_CONTENT = re.compile(r'[^"`]+')
+_BACKQUOTED_CONTENT = re.compile(r"[^`]+")
+_GTLT = re.compile(r">>|[<>]")
+_WS = re.compile(r"[ \t\n]+")
+
+
+class _DescentParser:
+    """
+    Recursive descent parser over a single command line.
+    Each _parse_* method consumes its construct starting at self.pos
+    and returns the AST of it.
+    """
+    def __init__(self, command: str):
+        self.text = command
+        self.pos = 0
+
+    def parse(self) -> AstNode:
+        self._skip_ws()
+        ast = self._parse_seq()
+        self._skip_ws()
+        if self.pos != len(self.text):
+            self._error("unexpected character")
+        return ast
+
+    def _error(self, message: str):
+        if self.pos < len(self.text):
+            found = repr(self.text[self.pos])
+        else:
+            found = "end of input"
+        raise ParseError(f"{message} at position {self.pos}: found {found}")
+
+    def _peek(self) -> str:
+        if self.pos < len(self.text):
+            return self.text[self.pos]
+        return ""
+
+    def _skip_ws(self) -> bool:
+        match = _WS.match(self.text, self.pos)
+        if match is None:
+            return False
+        self.pos = match.end()
+        return True
+
+    def _parse_seq(self) -> AstNode:
+        commands = [self._parse_pipe()]
+        while True:
+            self._skip_ws()
+            separator = self._peek()
+            if separator not in (";", "&"):
+                break
+            self.pos += 1
+            self._skip_ws()
+            if separator == "&":
+                # "&" runs the pipe before it in the background,
+                # and may end the command line
+                commands[-1] = Background(commands[-1])
+                if self._peek() == "":
+                    break
+                if self._peek() == ";":
+                    # as in grammar.lark, a ";" may follow the "&"
+                    self.pos += 1
+                    self._skip_ws()
+            commands.append(self._parse_pipe())
+        ast = commands[0]
+        for command in commands[1:]:
+            ast = Seq([ast, command])
+        return ast
+
+    def _parse_pipe(self) -> AstNode:
+        ast = self._parse_call()
+        while True:
+            start = self.pos
+            self._skip_ws()
+            if self._peek() != "|":
+                self.pos = start
+                return ast
+            self.pos += 1
+            self._skip_ws()
+            ast = Pipe([ast, self._parse_call()])
+
+    def _parse_call(self) -> Call:
+        items = []
+        has_argument = False
+        while True:
+            if _GTLT.match(self.text, self.pos):
+                items.append(self._parse_redirection())
+            else:
+                items.append(self._parse_argument())
+                has_argument = True
+            start = self.pos
+            if not self._skip_ws() or self._peek() in ("", ";", "&", "|"):
+                self.pos = start
+                break
+        if not has_argument:
+            self._error("expected an argument")
+        return Call(items)
+
+    def _parse_redirection(self) -> Redirection:
+        match = _GTLT.match(self.text, self.pos)
+        self.pos = match.end()
+        self._skip_ws()
+        return Redirection(match.group(), self._parse_argument())
+
+    def _parse_argument(self) -> Argument:
+        values = []
+        while True:
+            char = self._peek()
+            if char == "'":
+                match = _SINGLE_QUOTE.match(self.text, self.pos)
+                if match is None:
+                    self._error("unterminated single quote")
+                self.pos = match.end()
+                values.append(SingleQuoted(match.group()[1:-1]))
+            elif char == '"':
+                values.append(self._parse_double_quoted())
+            elif char == "`":
+                values.append(self._parse_backquoted())
+            elif char == "$":
+                match = _VARIABLE.match(self.text, self.pos)
+                self.pos = match.end()
+                values.append(Variable(match.group()[1:]))
+            else:
+                match = _NON_KEYWORD.match(self.text, self.pos)
+                if match is None:
+                    break
+                self.pos = match.end()
+                values.append(NonKeyword(match.group()))
+        if len(values) == 0:
+            self._error("expected an argument")
+        return Argument(values)
+
+    def _parse_double_quoted(self) -> DoubleQuoted:
+        self.pos += 1
+        values = []
+        while True:
+            char = self._peek()
+            if char == '"':
+                self.pos += 1
+                return DoubleQuoted(values)
+            elif char == "`":
+                values.append(self._parse_backquoted())
+            elif char == "":
+                self._error("unterminated double quote")
+            else:
+                match = _DOUBLEQUOTE_CONTENT.match(self.text, self.pos)
+                self.pos = match.end()
+                values.append(NonKeyword(match.group()))
+
+    def _parse_backquoted(self) -> BackQuoted:
+        self.pos += 1
+        match = _BACKQUOTED_CONTENT.match(self.text, self.pos)
+        if match is None:
+            self._error("expected backquoted content")
+        self.pos = match.end()
+        if self._peek() != "`":
+            self._error("unterminated backquote")
+        self.pos += 1
+        return BackQuoted(NonKeyword(match.group()))
+
+
+def parse_command(command: str) -> AstNode:
+    """
+    Parse the command using the recursive descent parser.
+    Returns the abstract syntax tree (AST) of the command.
+    Raises ParseError if the command is invalid.
+    """
+    return _DescentParser(command).parse()
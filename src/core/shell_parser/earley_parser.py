@@ -0,0 +1,96 @@
+"""
+This module parses the command line input using the Lark Earley
+parser over grammar.lark, and transforms the parse tree into
+the abstract syntax tree (AST) of the command.
+"""
+
+from lark import Transformer, LarkError
+from core.error_handling import ParseError
+from core.shell_parser.grammar_cache import load_parser
+from core.shell_parser.ast_nodes import (
+    AstNode, Seq, Background, Pipe, Call, Redirection, Argument,
+    DoubleQuoted, BackQuoted, NonKeyword, SingleQuoted, Variable)
+import os
+
+
+with open(os.path.join(os.path.dirname(__file__), "grammar.lark"), "r",
+          encoding="utf-8") as f:
+    grammar = f.read()
+
+
+def _flatten_seq(items: list) -> list:
+    """
+    Flatten nested seq ASTs into the list of their commands in order.
+    """
+    commands = []
+    for item in items:
+        if isinstance(item, Seq):
+            commands.extend(_flatten_seq(item.commands))
+        else:
+            commands.append(item)
+    return commands
+
+
+class CommandTransformer(Transformer):
+    def seq(self, items):
+        # the grammar is ambiguous on ";", so the Earley parser nests
+        # a sequence either way depending on the surrounding whitespace.
+        # normalize it to the left nested form to keep the AST stable.
+        commands = _flatten_seq(items)
+        ast = Seq(commands[:2])
+        for command in commands[2:]:
+            ast = Seq([ast, command])
+        return ast
+
+    def background(self, items):
+        return Background(items[0])
+
+    def pipe(self, items):
+        return Pipe(items)
+
+    def call(self, items):
+        return Call(items)
+
+    def redirection(self, items):
+        return Redirection(items[0].value, items[1])
+
+    def argument(self, items):
+        return Argument(items)
+
+    def double_quoted(self, items):
+        return DoubleQuoted(items)
+
+    def backquoted(self, items):
+        return BackQuoted(items[0])
+
+    def non_keyword(self, items):
+        return NonKeyword(items[0].value)
+
+    def single_quoted(self, items):
+        return SingleQuoted(items[0].value[1:-1])
+
+    def doublequote_content(self, items):
+        return NonKeyword(items[0].value)
+
+    def backquote_content(self, items):
+        return NonKeyword(items[0].value)
+
+    def variable(self, items):
+        return Variable(items[0].value[1:])
+
+
+# the parser tables are loaded from the on-disk cache when possible
+parser = load_parser(grammar, "earley")
+transformer = CommandTransformer()
+
+
+def parse_command(command: str) -> AstNode:
+    """
+    Parse the command using Lark parser.
+    Returns the abstract syntax tree (AST) of the command.
+    Raises ParseError if the command is invalid.
+    """
+    try:
+        return transformer.transform(parser.parse(command))
+    except LarkError as e:
+        raise ParseError(e)
@@ -0,0 +1,158 @@
+"""
+This module caches the built Lark parser on disk, so a new process
+can load the parser tables instead of analysing grammar.lark again.
+
+The cache file is keyed by a hash of the grammar, the Lark version and
+the Python version, so a changed grammar never loads stale tables.
+The cache directory is taken from the SHELL_PARSER_CACHE_DIR environment
+variable, an empty value disables the cache.
+
+Unpickling a file runs the code it names, so the cache is only used when
+the directory and the file belong to the user and others can't write to
+them, as the socket of the daemon in user.daemon.
+"""
+
+from lark import Lark
+import lark
+import hashlib
+import importlib
+import os
+import pickle
+import stat
+import sys
+import tempfile
+import types
+
+
+_DEFAULT_CACHE_DIR = os.path.join(os.path.expanduser("~"), ".cache",
+                                  "shell_parser")
+
+
+class _ParserPickler(pickle.Pickler):
+    """
+    Pickler that stores modules by name, as the Lark lexer configuration
+    keeps a reference to the regex module.
+    """
+    def persistent_id(self, obj):
+        if isinstance(obj, types.ModuleType):
+            return obj.__name__
+        return None
+
+
+class _ParserUnpickler(pickle.Unpickler):
+    """
+    Unpickler that restores the modules stored by _ParserPickler.
+    """
+    def persistent_load(self, pid):
+        return importlib.import_module(pid)
+
+
+def get_cache_dir():
+    """
+    Get the directory of the parser cache, None if it is disabled.
+    """
+    cache_dir = os.environ.get("SHELL_PARSER_CACHE_DIR", _DEFAULT_CACHE_DIR)
+    return cache_dir if cache_dir else None
+
+
+def get_cache_path(grammar: str, parser_type: str):
+    """
+    Get the path of the cache file for the grammar,
+    None if the cache is disabled.
+    """
+    cache_dir = get_cache_dir()
+    if cache_dir is None:
+        return None
+    key = "\0".join([grammar, parser_type, lark.__version__,
+                     sys.version])
+    digest = hashlib.sha256(key.encode("utf-8")).hexdigest()[:32]
+    return os.path.join(cache_dir, f"grammar_{digest}.pickle")
+
+
+def _is_private(info: os.stat_result) -> bool:
+    """
+    Check that the file of the stat result belongs to the user
+    and others can't write to it.
+    """
+    # without user ids, e.g. on Windows, the permissions of the
+    # user profile protect the cache
+    if not hasattr(os, "getuid"):
+        return True
+    return info.st_uid == os.getuid() and not info.st_mode & 0o022
+
+
+def _is_private_dir(cache_dir: str) -> bool:
+    """
+    Check that the cache directory is a directory of the user,
+    others can't write to it.
+    """
+    try:
+        info = os.lstat(cache_dir)
+    except OSError:
+        return False
+    return stat.S_ISDIR(info.st_mode) and _is_private(info)
+
+
+def _read_parser(cache_path: str) -> Lark:
+    """
+    Read the parser of the cache file, which must be a regular file
+    of the user in a private cache directory.
+    Raises PermissionError for the files others could have written.
+    """
+    if not _is_private_dir(os.path.dirname(cache_path)):
+        raise PermissionError(f"{os.path.dirname(cache_path)} must be "
+                              "a directory of the user not writable by others")
+    # the checks are made on the opened file, a symbolic link is not followed
+    fd = os.open(cache_path, os.O_RDONLY | getattr(os, "O_NOFOLLOW", 0))
+    with os.fdopen(fd, "rb") as f:
+        info = os.fstat(f.fileno())
+        if not stat.S_ISREG(info.st_mode) or not _is_private(info):
+            raise PermissionError(f"{cache_path} must be a file of the user "
+                                  "not writable by others")
+        return _ParserUnpickler(f).load()
+
+
+def load_parser(grammar: str, parser_type: str = "earley") -> Lark:
+    """
+    Load the Lark parser of the grammar from the cache,
+    build and cache it on a miss.
+    Errors of the cache are ignored, the parser is then built directly.
+    A cache file which others could have written is never loaded.
+    """
+    cache_path = get_cache_path(grammar, parser_type)
+    if cache_path is not None:
+        try:
+            return _read_parser(cache_path)
+        except Exception:
+            # missing, broken or untrusted cache file, rebuild it below
+            pass
+    parser = Lark(grammar, parser=parser_type)
+    if cache_path is not None:
+        _save_parser(parser, cache_path)
+    return parser
+
+
+def _save_parser(parser: Lark, cache_path: str):
+    """
+    Atomically write the parser to the cache file.
+    The cache directory is created only accessible to the user,
+    nothing is written to a directory others can write to.
+    """
+    try:
+        cache_dir = os.path.dirname(cache_path)
+        os.makedirs(cache_dir, mode=0o700, exist_ok=True)
+        if not _is_private_dir(cache_dir):
+            return
+        # the temporary file is only accessible to the user
+        fd, tmp_path = tempfile.mkstemp(dir=cache_dir, suffix=".tmp")
+        try:
+            with os.fdopen(fd, "wb") as f:
+                _ParserPickler(f, pickle.HIGHEST_PROTOCOL).dump(parser)
+            os.replace(tmp_path, cache_path)
+        except BaseException:
+            os.unlink(tmp_path)
+            raise
+    except Exception:
+        # the cache is only an optimization,
+        # e.g. the cache directory may be read-only
+        pass
@@ -1,68 +1,101 @@
 """
-This module is used to parse the command line input using Lark
-parser, and return the abstract syntax tree (AST) of the command.
+This module is used to parse the command line input,
+and return the abstract syntax tree (AST) of the command.
+It dispatches to one of the parser backends and provides
+a cache of parsed commands.
 """
 
-from lark import Lark, Transformer, LarkError
-from core.error_handling import ParseError
-import os
+from core.shell_parser import descent_parser
+from core.shell_parser.ast_nodes import AstNode
+from collections import OrderedDict
+import threading
 
 
-with open(os.path.join(os.path.dirname(__file__), "grammar.lark"), "r",
-          encoding="utf-8") as f:
-    grammar = f.read()
+# the available parser backends, both produce the same AST.
+# "earley" is the Lark parser over grammar.lark,
+# "descent" is the hand-written recursive descent parser.
+PARSER_BACKENDS = ("earley", "descent")
 
 
-class CommandTransformer(Transformer):
-    def seq(self, items):
-        return {"type": "seq", "commands": items}
-
-    def pipe(self, items):
-        return {"type": "pipe", "commands": items}
-
-    def call(self, items):
-        return {"type": "call", "arguments_or_redirect": items}
-
-    def redirection(self, items):
-        return {"type": "redirection",
-                "redirect_symbol": items[0].value, "file_argument": items[1]}
-
-    def argument(self, items):
-        return {"type": "argument", "values": items}
-
-    def double_quoted(self, items):
-        return {"type": "double_quoted", "values": items}
-
-    def backquoted(self, items):
-        return {"type": "backquoted", "value": items[0]}
-
-    def non_keyword(self, items):
-        return {"type": "non_keyword", "value": items[0].value}
-
-    def single_quoted(self, items):
-        return {"type": "single_quoted", "value": items[0].value[1:-1]}
-
-    def doublequote_content(self, items):
-        return {"type": "non_keyword", "value": items[0].value}
-
-    def backquote_content(self, items):
-        return {"type": "non_keyword", "value": items[0].value}
-
-    def variable(self, items):
-        return {"type": "variable", "value": items[0].value[1:]}
-
-
-parser = Lark(grammar, parser="earley")
-transformer = CommandTransformer()
+def parse_command(command: str, backend: str = "earley") -> AstNode:
+    """
+    Parse the command using the given parser backend.
+    Returns the typed abstract syntax tree (AST) of the command,
+    ast_nodes.to_dict converts it into the dict form.
+    Raises ParseError if the command is invalid.
+    """
+    if backend == "descent":
+        return descent_parser.parse_command(command)
+    elif backend == "earley":
+        # import Lark only when the Earley backend is actually used
+        from core.shell_parser import earley_parser
+        return earley_parser.parse_command(command)
+    raise ValueError(f"unsupported parser backend {backend}")
 
 
-def parse_command(command: str) -> dict:
+class ParseCache:
     """
-    Parse the command using Lark parser.
-    Returns the abstract syntax tree (AST) of the command.
-    Raises ParseError if the command is invalid.
+    A size-bounded LRU cache of parsed ASTs keyed by the command text.
+    A capacity of 0 disables the cache, every lookup is then a miss.
+    If build is given, it is applied to the parsed AST and its result,
+    e.g. an EvalTree, is cached and returned instead of the AST.
+    The cached values are shared, so callers must not modify them.
     """
-    try:
-        return transformer.transform(parser.parse(command))
-    except LarkError as e:
-        raise ParseError(e)
+    def __init__(self, capacity: int = 1024, backend: str = "earley",
+                 build=None):
+        if capacity < 0:
+            raise ValueError("parse cache capacity must be non-negative")
+        if backend not in PARSER_BACKENDS:
+            raise ValueError(f"unsupported parser backend {backend}")
+        self.capacity = capacity
+        self.backend = backend
+        self.build = build
+        self.hits = 0
+        self.misses = 0
+        self._cache = OrderedDict()
+        # the cache may be shared by commands evaluated in several threads
+        self._lock = threading.Lock()
+
+    def parse(self, command: str):
+        """
+        Return the AST of the command, or the value built from it,
+        parsing it only on a cache miss.
+        Raises ParseError if the command is invalid.
+        """
+        with self._lock:
+            value = self._cache.get(command)
+            if value is not None:
+                self.hits += 1
+                self._cache.move_to_end(command)
+                return value
+            self.misses += 1
+        # parse outside the lock, so other commands are not blocked
+        value = parse_command(command, self.backend)
+        if self.build is not None:
+            value = self.build(value)
+        if self.capacity > 0:
+            with self._lock:
+                self._cache[command] = value
+                if len(self._cache) > self.capacity:
+                    # evict the least recently used command
+                    self._cache.popitem(last=False)
+        return value
+
+    def clear(self):
+        """
+        Remove all cached values and reset the counters.
+        """
+        with self._lock:
+            self._cache.clear()
+            self.hits = 0
+            self.misses = 0
+
+    def info(self) -> dict:
+        """
+        Get the statistics of the cache.
+        """
+        return {"hits": self.hits, "misses": self.misses,
+                "size": len(self._cache), "capacity": self.capacity}
+
+    def __len__(self):
+        return len(self._cache)
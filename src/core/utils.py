@@ -2,30 +2,42 @@
 This module provides some utility classes and functions.
 """
 
+from collections import deque
+from contextlib import contextmanager
+from itertools import islice
+import codecs
+import io
+import sys
+import threading
+
 
 class IOFileManager:
     """
     A sugar class for managing input and output file streams together.
     It will automatically close the streams when exiting the context.
+    The files are opened in binary mode when binary is True.
     """
     def __init__(self, in_file: str = None, out_file: str = None,
-                 outfile_mode: str = 'w'):
+                 outfile_mode: str = 'w', binary: bool = False):
         self.in_file = in_file
         self.out_file = out_file
         self.outfile_mode = outfile_mode
+        self.binary = binary
         self.input_stream = None
         self.output_stream = None
 
     def __enter__(self):
         if self.in_file:
             try:
-                self.input_stream = open(self.in_file, 'r')
+                self.input_stream = open(self.in_file,
+                                         'rb' if self.binary else 'r')
             except FileNotFoundError:
                 raise ValueError(f"Input file {self.in_file} not found.")
 
         if self.out_file:
             try:
-                self.output_stream = open(self.out_file, self.outfile_mode)
+                mode = self.outfile_mode + ('b' if self.binary else '')
+                self.output_stream = open(self.out_file, mode)
             except FileNotFoundError:
                 raise ValueError(f"Output file {self.out_file} not found.")
 
@@ -39,45 +51,558 @@ class IOFileManager:
             self.output_stream.close()
 
 
-class char_with_info:
+class _ThreadLocalStream:
+    """
+    A proxy installed as sys.stdin or sys.stdout while commands run
+    in several threads. Each thread reads or writes its own stream,
+    threads without a stream of their own use the default stream.
+    """
+    def __init__(self, default_stream):
+        self._default_stream = default_stream
+        self._local = threading.local()
+
+    def get_stream(self):
+        return getattr(self._local, "stream", self._default_stream)
+
+    def set_stream(self, stream):
+        self._local.stream = stream
+
+    def __getattr__(self, name):
+        return getattr(self.get_stream(), name)
+
+    def __iter__(self):
+        return iter(self.get_stream())
+
+
+_thread_local_stdio_lock = threading.Lock()
+_thread_local_stdio_users = 0
+_original_stdio = None
+
+
+@contextmanager
+def thread_local_stdio():
+    """
+    Install thread local proxies as sys.stdin and sys.stdout,
+    so IOContextManager can be used from several threads at once.
+    Nested uses share the proxies, the original streams
+    are restored when the outermost use exits.
+    """
+    global _thread_local_stdio_users, _original_stdio
+    with _thread_local_stdio_lock:
+        if _thread_local_stdio_users == 0:
+            _original_stdio = (sys.stdin, sys.stdout)
+            sys.stdin = _ThreadLocalStream(current_stream(sys.stdin))
+            sys.stdout = _ThreadLocalStream(current_stream(sys.stdout))
+        _thread_local_stdio_users += 1
+    try:
+        yield
+    finally:
+        with _thread_local_stdio_lock:
+            _thread_local_stdio_users -= 1
+            if _thread_local_stdio_users == 0:
+                sys.stdin, sys.stdout = _original_stdio
+                _original_stdio = None
+
+
+def current_stream(stream):
     """
-    A class to store a character and its quote information.
+    Get the stream the current thread uses for sys.stdin or sys.stdout.
     """
-    def __init__(self, char: str, is_quoted: bool):
-        self.char = char
-        self.is_quoted = is_quoted
+    if isinstance(stream, _ThreadLocalStream):
+        return stream.get_stream()
+    return stream
 
 
-class char_with_info_list:
+class IOContextManager:
     """
-    A class to store a list of characters with their quote information.
+    Context manager to manage the input and output streams.
+    It will automatically recover the streams when exiting the context.
+    When thread local proxies are installed, only the streams
+    of the current thread are changed.
+    """
+    def __init__(self, input_stream=None, output_stream=None):
+        if input_stream is not None:
+            self.input_stream = input_stream
+        else:
+            self.input_stream = current_stream(sys.stdin)
+        if output_stream is not None:
+            self.output_stream = output_stream
+        else:
+            self.output_stream = current_stream(sys.stdout)
+        self.original_input = current_stream(sys.stdin)
+        self.original_output = current_stream(sys.stdout)
+
+    def __enter__(self):
+        self._set_streams(self.input_stream, self.output_stream)
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self._set_streams(self.original_input, self.original_output)
+
+    @staticmethod
+    def _set_streams(input_stream, output_stream):
+        if isinstance(sys.stdin, _ThreadLocalStream):
+            sys.stdin.set_stream(input_stream)
+            sys.stdout.set_stream(output_stream)
+        else:
+            sys.stdin = input_stream
+            sys.stdout = output_stream
+
+
+class QuotedString:
+    """
+    A string made of quoted and nonquoted parts, for globbing.
+    The parts are kept as (text, is_quoted) pairs, so concatenation
+    and the glob mask cost O(length) without an object per character.
     """
     def __init__(self, string: str, is_quoted: bool):
-        self.char_list = []
-        for char in string:
-            self.char_list.append(char_with_info(char, is_quoted))
-
-    def get_glob_mask(self):
-        result = ""
-        for char in self.char_list:
-            if char.is_quoted and char.char == "*":
-                result += "[*]"
-            else:
-                result += char.char
-        return result
+        self.parts = [(string, is_quoted)] if string else []
+
+    def get_glob_mask(self) -> str:
+        """
+        Get the glob pattern of the string, quoted "*" match only "*".
+        """
+        return "".join(text.replace("*", "[*]") if is_quoted else text
+                       for text, is_quoted in self.parts)
+
+    def has_glob_chars(self) -> bool:
+        """
+        Check if the glob mask has glob characters, otherwise globbing
+        the string can only match the string itself.
+        """
+        return any(("*" in text and not is_quoted) or "?" in text
+                   or "[" in text for text, is_quoted in self.parts)
 
     def __str__(self):
-        return "".join([char.char for char in self.char_list])
+        return "".join(text for text, _ in self.parts)
 
     def __len__(self):
-        return len(self.char_list)
+        return sum(len(text) for text, _ in self.parts)
 
-    def __getitem__(self, index: int):
-        return self.char_list[index]
+    def __iadd__(self, other):
+        self.parts += other.parts
+        return self
 
-    def __setitem__(self, index: int, value):
-        self.char_list[index] = value
 
-    def __iadd__(self, other):
-        self.char_list += other.char_list
+class BoundedPipe:
+    """
+    A bounded in-memory text pipe connecting two concurrently running
+    commands, or a bytes pipe when binary is True.
+    The writer end buffers small writes into chunks, and blocks
+    when max_chunks chunks are waiting to be read (backpressure).
+    The reader end blocks until a chunk or the end of the stream arrives.
+    Closing the reader end makes later writes raise BrokenPipeError,
+    so the writing command stops instead of blocking forever.
+    """
+    def __init__(self, chunk_size: int = 65536, max_chunks: int = 16,
+                 binary: bool = False):
+        self.chunk_size = chunk_size
+        self.max_chunks = max_chunks
+        self.binary = binary
+        # the empty data and the line break of the pipe
+        self.empty = b"" if binary else ""
+        self.newline = b"\n" if binary else "\n"
+        self._chunks = deque()
+        self._condition = threading.Condition()
+        self._eof = False
+        self._reader_closed = False
+        self._reader_waiting = False
+        self.writer = PipeWriter(self)
+        self.reader = PipeReader(self)
+
+    def _put(self, chunk):
+        with self._condition:
+            while (len(self._chunks) >= self.max_chunks
+                   and not self._reader_closed):
+                self._condition.wait()
+            if self._reader_closed:
+                raise BrokenPipeError("the reader of the pipe is closed")
+            self._chunks.append(chunk)
+            self._condition.notify_all()
+
+    def _get(self):
+        """
+        Get the next chunk, empty at the end of the stream.
+        """
+        with self._condition:
+            while not self._chunks and not self._eof:
+                self._reader_waiting = True
+                self._condition.wait()
+            self._reader_waiting = False
+            if self._chunks:
+                chunk = self._chunks.popleft()
+                self._condition.notify_all()
+                return chunk
+            return self.empty
+
+    def _close_writer(self):
+        with self._condition:
+            self._eof = True
+            self._condition.notify_all()
+
+    def _close_reader(self):
+        with self._condition:
+            self._reader_closed = True
+            self._chunks.clear()
+            self._condition.notify_all()
+
+
+class PipeWriter:
+    """
+    The writer end of a BoundedPipe, a writable text or bytes stream.
+    Writes are sent as soon as the reader is waiting for data,
+    otherwise they are batched into chunks of the pipe's chunk size.
+    """
+    def __init__(self, pipe: BoundedPipe):
+        self._pipe = pipe
+        self._pending = []
+        self._pending_size = 0
+        self.closed = False
+
+    @property
+    def binary(self) -> bool:
+        return self._pipe.binary
+
+    def write(self, text) -> int:
+        if self.closed:
+            raise ValueError("write to closed pipe")
+        if text:
+            self._pending.append(text)
+            self._pending_size += len(text)
+            if (self._pending_size >= self._pipe.chunk_size
+                    or self._pipe._reader_waiting):
+                self.flush()
+        return len(text)
+
+    def flush(self):
+        """
+        Send the pending data, raises BrokenPipeError when the reader
+        is closed even without pending data, so a writer waiting for
+        data to write, e.g. tail -f, can check the pipe is still read.
+        """
+        if self._pending:
+            chunk = self._pipe.empty.join(self._pending)
+            self._pending = []
+            self._pending_size = 0
+            self._pipe._put(chunk)
+        elif self._pipe._reader_closed:
+            raise BrokenPipeError("the reader of the pipe is closed")
+
+    def close(self):
+        """
+        Flush the pending data and signal the end of the stream.
+        """
+        if self.closed:
+            return
+        self.closed = True
+        try:
+            self.flush()
+        finally:
+            self._pipe._close_writer()
+
+    def isatty(self) -> bool:
+        return False
+
+    def writable(self) -> bool:
+        return True
+
+
+class PipeReader:
+    """
+    The reader end of a BoundedPipe, a readable text or bytes stream.
+    """
+    def __init__(self, pipe: BoundedPipe):
+        self._pipe = pipe
+        # the unread data is self._buffer[self._pos:]
+        self._buffer = pipe.empty
+        self._pos = 0
+        self._eof = False
+        self.closed = False
+
+    def _fill(self) -> bool:
+        """
+        Append the next chunk to the buffer, False at the end of stream.
+        """
+        if self._eof:
+            return False
+        chunk = self._pipe._get()
+        if not chunk:
+            self._eof = True
+            return False
+        self._buffer = self._buffer[self._pos:] + chunk
+        self._pos = 0
+        return True
+
+    @property
+    def binary(self) -> bool:
+        return self._pipe.binary
+
+    def _take(self, end: int):
+        data = self._buffer[self._pos:end]
+        self._pos = end
+        return data
+
+    def read(self, size: int = -1):
+        if size is None or size < 0:
+            while self._fill():
+                pass
+            return self._take(len(self._buffer))
+        while len(self._buffer) - self._pos < size and self._fill():
+            pass
+        return self._take(min(self._pos + size, len(self._buffer)))
+
+    def readline(self, size: int = -1):
+        start = self._pos
+        while True:
+            index = self._buffer.find(self._pipe.newline, start)
+            if index >= 0:
+                end = index + 1
+                break
+            start = len(self._buffer) - self._pos
+            if not self._fill():
+                end = len(self._buffer)
+                break
+            # the buffer is rebased to the unread data by _fill
+        if size is not None and 0 <= size < end - self._pos:
+            end = self._pos + size
+        return self._take(end)
+
+    def readlines(self) -> list:
+        return list(self)
+
+    def __iter__(self):
+        return self
+
+    def __next__(self):
+        line = self.readline()
+        if not line:
+            raise StopIteration
+        return line
+
+    def close(self):
+        """
+        Stop reading, the writer end gets BrokenPipeError on its next write.
+        """
+        if not self.closed:
+            self.closed = True
+            self._buffer = self._pipe.empty
+            self._pos = 0
+            self._pipe._close_reader()
+
+    def isatty(self) -> bool:
+        return False
+
+    def readable(self) -> bool:
+        return True
+
+
+class LineStream:
+    """
+    A readable text stream over an iterator of lines, so apps reading
+    their standard input can read the output lines of a streaming app.
+    The lines are bytes when binary is True.
+    The lines are only consumed as they are read.
+    """
+    def __init__(self, lines, binary: bool = False):
+        self._lines = iter(lines)
+        self.binary = binary
+        self._empty = b"" if binary else ""
+        self._buffer = self._empty
+        self.closed = False
+
+    def read(self, size: int = -1):
+        if size is None or size < 0:
+            data = self._buffer + self._empty.join(self._lines)
+            self._buffer = self._empty
+            return data
+        parts = [self._buffer]
+        length = len(self._buffer)
+        while length < size:
+            line = next(self._lines, self._empty)
+            if not line:
+                break
+            parts.append(line)
+            length += len(line)
+        data = self._empty.join(parts)
+        self._buffer = data[size:]
+        return data[:size]
+
+    def readline(self, size: int = -1):
+        if self._buffer:
+            line, self._buffer = self._buffer, self._empty
+        else:
+            line = next(self._lines, self._empty)
+        if size is not None and 0 <= size < len(line):
+            line, self._buffer = line[:size], line[size:]
+        return line
+
+    def readlines(self) -> list:
+        return list(self)
+
+    def __iter__(self):
         return self
+
+    def __next__(self):
+        line = self.readline()
+        if not line:
+            raise StopIteration
+        return line
+
+    def close(self):
+        """
+        Stop reading, the iterator of lines is closed if it can be.
+        """
+        if not self.closed:
+            self.closed = True
+            close = getattr(self._lines, "close", None)
+            if close is not None:
+                close()
+            self._lines = iter(())
+            self._buffer = self._empty
+
+    def isatty(self) -> bool:
+        return False
+
+    def readable(self) -> bool:
+        return True
+
+
+def text_lines(lines):
+    """
+    Get the lines of the text made of the given lines, where a line
+    without line break, e.g. the last line of a file, is joined
+    to the next line as it would be in a text stream.
+    The lines may be str or bytes.
+    """
+    partial = None
+    for line in lines:
+        if line[-1:] not in ("\n", b"\n"):
+            partial = line if partial is None else partial + line
+        elif partial is not None:
+            yield partial + line
+            partial = None
+        else:
+            yield line
+    if partial:
+        yield partial
+
+
+def write_lines(output_stream, lines, batch_size: int = 1024):
+    """
+    Write the lines, str or bytes, to the output stream.
+    Buffered binary files get batches of joined lines, as each write
+    costs much more than joining the lines, and their data is only
+    written when their buffer is full anyway. Other streams, e.g. pipes
+    and terminals, get each line as soon as it is produced.
+    """
+    if not isinstance(output_stream, io.BufferedWriter):
+        for line in lines:
+            output_stream.write(line)
+        return
+    lines = iter(lines)
+    while True:
+        batch = list(islice(lines, batch_size))
+        if not batch:
+            return
+        output_stream.write(batch[0][:0].join(batch))
+
+
+def is_binary_stream(stream) -> bool:
+    """
+    Check if the stream reads or writes bytes.
+    """
+    return (isinstance(stream, (io.BufferedIOBase, io.RawIOBase))
+            or getattr(stream, "binary", False) is True)
+
+
+class EncodingWriter(io.TextIOBase):
+    """
+    A writable text stream encoding the text to a binary stream.
+    Text decoded with surrogateescape gets its original bytes back.
+    """
+    def __init__(self, stream):
+        self._stream = stream
+
+    def writable(self) -> bool:
+        return True
+
+    def write(self, text: str) -> int:
+        self._stream.write(text.encode("utf-8", "surrogateescape"))
+        return len(text)
+
+    def flush(self):
+        self._stream.flush()
+
+    def isatty(self) -> bool:
+        return self._stream.isatty()
+
+
+class DecodingWriter(io.BufferedIOBase):
+    """
+    A writable binary stream decoding the bytes to a text stream,
+    invalid UTF-8 sequences are written as replacement characters.
+    """
+    def __init__(self, stream):
+        self._stream = stream
+        self._decoder = codecs.getincrementaldecoder("utf-8")("replace")
+
+    def writable(self) -> bool:
+        return True
+
+    def write(self, data) -> int:
+        self._stream.write(self._decoder.decode(data))
+        return len(data)
+
+    def flush(self):
+        self._stream.write(self._decoder.decode(b"", final=True))
+        self._stream.flush()
+
+    def isatty(self) -> bool:
+        return self._stream.isatty()
+
+
+def binary_output(stream):
+    """
+    Get a binary stream writing to the output stream.
+    Terminals get the text decoded, other text files are written
+    through their buffer. The stream must be flushed at the end.
+    """
+    if is_binary_stream(stream):
+        return stream
+    buffer = getattr(stream, "buffer", None)
+    if buffer is not None and not stream.isatty():
+        stream.flush()
+        return buffer
+    return DecodingWriter(stream)
+
+
+def text_output(stream):
+    """
+    Get a text stream writing to the output stream.
+    """
+    if is_binary_stream(stream):
+        return EncodingWriter(stream)
+    return stream
+
+
+def binary_input(stream):
+    """
+    Get a binary stream reading the input stream.
+    """
+    if is_binary_stream(stream):
+        return stream
+    buffer = getattr(stream, "buffer", None)
+    if buffer is not None:
+        return buffer
+    return LineStream((line.encode("utf-8", "surrogateescape")
+                       for line in stream), binary=True)
+
+
+def text_input(stream):
+    """
+    Get a text stream reading the input stream.
+    """
+    if is_binary_stream(stream):
+        return LineStream((line.decode("utf-8", "surrogateescape")
+                           for line in stream))
+    return stream
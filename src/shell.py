@@ -1,21 +1,62 @@
 import sys
-from user.shell import Shell
 from core.api import create_shell_engine, eval_command
 
+
+def run_batch(lines, timing: bool):
+    # the batch mode doesn't need the interactive shell
+    from user.batch import BatchRunner
+    runner = BatchRunner(timing_stream=sys.stderr if timing else None)
+    runner.run(lines)
+
+
+def run_daemon(socket_path=None):
+    # the daemon evaluates the commands of user.client
+    from user.daemon import run_daemon
+    run_daemon(socket_path)
+
+
 if __name__ == "__main__":
-    args_num = len(sys.argv) - 1
+    args = sys.argv[1:]
+    # -t reports the time of each command of the batch modes
+    timing = len(args) > 0 and args[0] == "-t"
+    if timing:
+        args = args[1:]
+    # -b runs the command of -c in the bytes mode
+    bytes_mode = len(args) > 0 and args[0] == "-b"
+    if bytes_mode:
+        args = args[1:]
+    args_num = len(args)
     if args_num > 2:
         raise ValueError("wrong number of command line arguments")
+    elif timing and args_num > 0 and args[0] != "-f":
+        raise ValueError("-t is only supported with -f or standard input")
+    elif bytes_mode and (args_num == 0 or args[0] != "-c"):
+        raise ValueError("-b is only supported with -c")
     elif args_num == 2:
-        if sys.argv[1] != "-c":
-            raise ValueError(f"unexpected command line argument {sys.argv[1]}")
-        engine = create_shell_engine()
-        eval_command(engine, sys.argv[2])
+        if args[0] == "-f":
+            with open(args[1], "r") as script:
+                run_batch(script, timing)
+        elif args[0] == "-c":
+            engine = create_shell_engine(bytes_mode=bytes_mode)
+            eval_command(engine, args[1])
+        elif args[0] == "-d":
+            run_daemon(args[1])
+        else:
+            raise ValueError(f"unexpected command line argument {args[0]}")
+    elif args_num == 1 and args[0] == "-d":
+        run_daemon()
     elif args_num == 1:
-        if sys.argv[1] != "-e":
-            raise ValueError(f"unexpected command line argument {sys.argv[1]}")
+        if args[0] != "-e":
+            raise ValueError(f"unexpected command line argument {args[0]}")
+        # the interactive shell pulls in prompt_toolkit and pygments,
+        # so only import it when it is used
+        from user.shell import Shell
         shell = Shell(exit_flag=False)
         shell.run()
+    elif timing or not sys.stdin.isatty():
+        # commands piped to the shell are run in the batch mode
+        run_batch(sys.stdin, timing)
     else:
+        from user.shell import Shell
         shell = Shell()
         shell.run()
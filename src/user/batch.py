@@ -0,0 +1,48 @@
+import time
+from core.api import create_shell_engine, eval_command
+
+
+class BatchRunner:
+    """
+    Batch runner to evaluate the commands of a script, one per line,
+    on a single engine. The lines are read as they are evaluated,
+    and repeated commands are only parsed once by the parse cache.
+    """
+    def __init__(self, timing_stream=None, **kwargs):
+        """
+        Initialize the batch runner with the engine context.
+        By default the engine uses the descent parser, and errors are
+        printed without stopping the script.
+        When timing_stream is given, the time of each command
+        and the total time are written to it.
+        """
+        kwargs.setdefault("parser_backend", "descent")
+        kwargs.setdefault("exit_flag", False)
+        self.engine = create_shell_engine(**kwargs)
+        self.timing_stream = timing_stream
+
+    def run(self, lines):
+        """
+        Evaluate the commands of the lines.
+        Blank lines and lines starting with "#" are skipped.
+        """
+        count = 0
+        total = 0.0
+        for line in lines:
+            command = line.rstrip("\r\n")
+            stripped = command.strip()
+            if not stripped or stripped.startswith("#"):
+                continue
+            if self.timing_stream is None:
+                eval_command(self.engine, command)
+                continue
+            start = time.perf_counter()
+            eval_command(self.engine, command)
+            elapsed = time.perf_counter() - start
+            count += 1
+            total += elapsed
+            print(f"{elapsed * 1000:.3f} ms\t{command}",
+                  file=self.timing_stream)
+        if self.timing_stream is not None:
+            print(f"{count} commands in {total * 1000:.3f} ms",
+                  file=self.timing_stream)
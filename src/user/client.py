@@ -0,0 +1,107 @@
+"""
+This module provides the client of the shell daemon, see user.daemon.
+It only uses the standard library, so it starts much faster than
+a new shell engine.
+"""
+
+import json
+import os
+import socket
+import struct
+import sys
+import threading
+from user.protocol import OUTPUT, ERROR, EXIT, read_frames
+
+
+def _send_input(sock: socket.socket, input_fd: int):
+    """
+    Send the bytes of the input file descriptor, then shut down
+    the sending side of the socket to end the input of the command.
+    The descriptor is read directly, as the thread may still be
+    blocked on it when the process exits.
+    """
+    try:
+        for block in iter(lambda: os.read(input_fd, 65536), b""):
+            sock.sendall(block)
+        sock.shutdown(socket.SHUT_WR)
+    except OSError:
+        # the command finished without reading all its input
+        pass
+
+
+def _check_daemon_user(sock: socket.socket, socket_path: str):
+    """
+    Check that the daemon listening on the socket runs as the user,
+    before the request is sent to it, from the credentials of the
+    connected process or otherwise from the owner of the socket.
+    Raises PermissionError when it is another user.
+    """
+    if hasattr(socket, "SO_PEERCRED"):
+        credentials = sock.getsockopt(socket.SOL_SOCKET, socket.SO_PEERCRED,
+                                      struct.calcsize("3i"))
+        _, uid, _ = struct.unpack("3i", credentials)
+    else:
+        uid = os.stat(socket_path).st_uid
+    if uid != os.getuid():
+        raise PermissionError(
+            f"the shell daemon on {socket_path} runs as another user")
+
+
+def run_remote_command(command: str, socket_path: str,
+                       variables: dict = None) -> int:
+    """
+    Evaluate the command on the daemon listening on the socket path,
+    which must run as the user, in the current working directory,
+    with the variables and the standard input of this process,
+    like shell.py -c.
+    The output is written to the standard output, and the error
+    stopping the command to the standard error.
+    Returns the exit status of the command.
+    """
+    send_input = not sys.stdin.isatty()
+    request = {
+        "command": command,
+        "cwd": os.getcwd(),
+        "variables": variables or {},
+        "stdin": send_input,
+    }
+    with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as sock:
+        sock.connect(socket_path)
+        _check_daemon_user(sock, socket_path)
+        sock.sendall(json.dumps(request).encode() + b"\n")
+        if send_input:
+            # send the input while reading the output, so neither side
+            # blocks when both are larger than the socket buffers
+            threading.Thread(target=_send_input,
+                             args=(sock, sys.stdin.fileno()),
+                             daemon=True).start()
+        else:
+            sock.shutdown(socket.SHUT_WR)
+        try:
+            with sock.makefile("rb") as response:
+                return _write_response(response)
+        except BrokenPipeError:
+            # the reader of the output stopped, e.g. head, so the
+            # output left in the buffer is dropped at exit
+            devnull = os.open(os.devnull, os.O_WRONLY)
+            os.dup2(devnull, sys.stdout.fileno())
+            return 1
+
+
+def _write_response(response) -> int:
+    """
+    Write the output and the error of the response frames,
+    and return the exit status.
+    """
+    output = sys.stdout.buffer
+    for kind, payload in read_frames(response):
+        if kind == OUTPUT:
+            output.write(payload)
+        elif kind == ERROR:
+            output.flush()
+            print(payload.decode(), file=sys.stderr)
+        elif kind == EXIT:
+            output.flush()
+            return int(payload)
+    output.flush()
+    raise ConnectionError("the shell daemon closed the connection")
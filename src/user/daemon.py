@@ -0,0 +1,198 @@
+"""
+This module provides the shell daemon, a long-lived server evaluating
+commands sent by clients over a Unix domain socket,
+see user.protocol for the messages and user.client for the client.
+
+The daemon imports the apps and builds the parser once, in its engine.
+Each request is evaluated in a process forked from the daemon, on a copy
+of this warm engine, in the working directory and with the variables
+and the standard input of the request. So a request starts without
+paying the startup of a new shell, and it can't change the directory,
+the variables or the parse cache of the daemon or of other requests.
+"""
+
+import io
+import json
+import os
+import socketserver
+import stat
+import sys
+import threading
+from core.api import create_shell_engine
+from core.app_factory import create_app, get_available_apps
+from user.protocol import (OUTPUT, ERROR, EXIT, default_socket_path,
+                           encode_frame, private_socket_directory)
+
+
+class _FrameWriter(io.TextIOBase):
+    """
+    Output stream of a request, sending the written text to the client
+    in OUTPUT frames of up to chunk_size bytes.
+    It is written by the background jobs of the request too.
+    """
+    def __init__(self, wfile, chunk_size: int = 65536):
+        self._wfile = wfile
+        self._chunk_size = chunk_size
+        self._buffer = []
+        self._size = 0
+        self._lock = threading.Lock()
+
+    def writable(self) -> bool:
+        return True
+
+    def write(self, text: str) -> int:
+        data = text.encode()
+        with self._lock:
+            self._buffer.append(data)
+            self._size += len(data)
+            if self._size >= self._chunk_size:
+                self._send()
+        return len(text)
+
+    def flush(self):
+        with self._lock:
+            self._send()
+
+    def _send(self):
+        if self._size > 0:
+            self._wfile.write(encode_frame(OUTPUT, b"".join(self._buffer)))
+            self._buffer = []
+            self._size = 0
+
+
+class _ClientTerminal(io.StringIO):
+    """
+    Input stream of a request whose client reads a terminal,
+    apps then have no input as in the interactive shell.
+    """
+    def isatty(self) -> bool:
+        return True
+
+
+class _RequestHandler(socketserver.StreamRequestHandler):
+    """
+    Handler of a request, run in the process forked for it.
+    """
+    def handle(self):
+        output_stream = _FrameWriter(self.wfile)
+        try:
+            line = self.rfile.readline()
+            if not line:
+                # the client closed the connection without a request
+                return
+            request = json.loads(line)
+            os.chdir(request.get("cwd", "/"))
+            engine = self.server.engine
+            for name, value in request.get("variables", {}).items():
+                engine._set_var(name, value)
+            if request.get("stdin", False):
+                input_stream = io.TextIOWrapper(self.rfile)
+            else:
+                input_stream = _ClientTerminal()
+            engine._eval_command(request["command"], input_stream,
+                                 output_stream)
+            # the process exits after the request,
+            # so the background jobs must finish first
+            engine._wait_jobs()
+        except BrokenPipeError:
+            # the client is gone
+            return
+        except Exception as e:
+            output_stream.flush()
+            self.wfile.write(encode_frame(ERROR, str(e).encode()))
+            self.wfile.write(encode_frame(EXIT, b"1"))
+            return
+        output_stream.flush()
+        self.wfile.write(encode_frame(EXIT, b"0"))
+
+
+class ShellDaemon(socketserver.ForkingMixIn, socketserver.UnixStreamServer):
+    """
+    Shell daemon serving the requests on a Unix domain socket.
+    """
+    def __init__(self, socket_path: str = None, **kwargs):
+        """
+        Initialize the daemon listening on the socket path,
+        the default path of user.protocol if it is None.
+        The keyword arguments are the context of the engine, by default
+        it uses the descent parser, and errors stop the command
+        as in shell.py -c.
+        """
+        if socket_path is None:
+            socket_path = default_socket_path()
+        kwargs.setdefault("parser_backend", "descent")
+        self.engine = create_shell_engine(**kwargs)
+        self._warm_up()
+        _prepare_socket_path(socket_path)
+        super().__init__(socket_path, _RequestHandler)
+
+    def _warm_up(self):
+        """
+        Import the lazily registered apps and build the parser,
+        so the forked processes don't do it for each request.
+        """
+        import core.apps.fused_apps  # noqa: F401
+        for name in get_available_apps():
+            create_app(name)
+        self.engine._get_eval_tree("echo warm | cat")
+
+    def server_bind(self):
+        """
+        Bind the socket, only the user can connect to it.
+        """
+        # the socket is never accessible to others, even before the chmod
+        umask = os.umask(0o177)
+        try:
+            super().server_bind()
+        finally:
+            os.umask(umask)
+        os.chmod(self.server_address, 0o600)
+
+    def server_close(self):
+        super().server_close()
+        if os.path.exists(self.server_address):
+            os.unlink(self.server_address)
+
+
+def _prepare_socket_path(socket_path: str):
+    """
+    Make the socket path ready for the daemon to listen on it.
+    The private socket directory is created if needed, and must only
+    be accessible to the user. A socket of the user left by a daemon
+    which didn't stop cleanly is removed, other files are never removed.
+    Raises PermissionError when the directory or the file at the path
+    belongs to another user, or the directory is accessible to others,
+    and FileExistsError when the file is not a socket.
+    """
+    directory = os.path.dirname(socket_path)
+    if directory == private_socket_directory():
+        os.makedirs(directory, mode=0o700, exist_ok=True)
+        info = os.lstat(directory)
+        if (not stat.S_ISDIR(info.st_mode) or info.st_uid != os.getuid()
+                or info.st_mode & 0o077):
+            raise PermissionError(
+                f"{directory} must be a directory of the user "
+                "only accessible to the user")
+    try:
+        info = os.lstat(socket_path)
+    except FileNotFoundError:
+        return
+    if info.st_uid != os.getuid():
+        raise PermissionError(f"{socket_path} belongs to another user")
+    if not stat.S_ISSOCK(info.st_mode):
+        raise FileExistsError(f"{socket_path} exists and is not a socket")
+    # the socket of a daemon which didn't stop cleanly
+    os.unlink(socket_path)
+
+
+def run_daemon(socket_path: str = None):
+    """
+    Run the shell daemon until it is interrupted.
+    """
+    with ShellDaemon(socket_path) as daemon:
+        print(f"shell daemon listening on {daemon.server_address}",
+              file=sys.stderr)
+        try:
+            daemon.serve_forever()
+        except KeyboardInterrupt:
+            pass
@@ -0,0 +1,71 @@
+"""
+This module defines the protocol between the shell daemon and its clients
+over a Unix domain socket. It only uses the standard library, so the
+client starts without importing the shell engine.
+
+A request is a JSON header on one line, with the command, the working
+directory, the variables and whether the standard input is sent,
+followed by the bytes of the standard input until the client shuts
+down its side of the socket.
+The response is a sequence of frames, a one byte kind and the length
+of the payload on 4 bytes, then the payload:
+    OUTPUT  the next bytes of the output of the command,
+    ERROR   the message of the error stopping the command,
+    EXIT    the exit status as text, the last frame.
+"""
+
+import os
+import struct
+
+
+OUTPUT = b"o"
+ERROR = b"e"
+EXIT = b"x"
+
+_FRAME_HEADER = struct.Struct("!cI")
+
+
+def default_socket_path() -> str:
+    """
+    Get the path of the daemon socket, $SHELL_DAEMON_SOCKET if it is set,
+    otherwise a socket in $XDG_RUNTIME_DIR, the runtime directory only
+    the user can access, or in the private_socket_directory.
+    """
+    path = os.environ.get("SHELL_DAEMON_SOCKET")
+    if path:
+        return path
+    runtime_dir = os.environ.get("XDG_RUNTIME_DIR")
+    if runtime_dir and os.path.isdir(runtime_dir):
+        return os.path.join(runtime_dir, "shell-daemon.sock")
+    return os.path.join(private_socket_directory(), "daemon.sock")
+
+
+def private_socket_directory() -> str:
+    """
+    Get the directory of the default socket when there is no runtime
+    directory, the daemon creates it with the mode 0700.
+    """
+    return os.path.join("/tmp", f"shell-daemon-{os.getuid()}")
+
+
+def encode_frame(kind: bytes, payload: bytes) -> bytes:
+    """
+    Encode a response frame.
+    """
+    return _FRAME_HEADER.pack(kind, len(payload)) + payload
+
+
+def read_frames(stream):
+    """
+    Read the response frames from a binary stream,
+    yields (kind, payload) until the end of the stream.
+    """
+    while True:
+        header = stream.read(_FRAME_HEADER.size)
+        if len(header) < _FRAME_HEADER.size:
+            return
+        kind, length = _FRAME_HEADER.unpack(header)
+        payload = stream.read(length)
+        if len(payload) < length:
+            return
+        yield kind, payload
@@ -0,0 +1,32 @@
+"""
+The tests import the core and user packages from src,
+as shell.py does when it runs.
+"""
+
+import os
+import sys
+import pytest
+
+SRC_DIR = os.path.join(os.path.dirname(os.path.dirname(
+    os.path.abspath(__file__))), "src")
+sys.path.insert(0, SRC_DIR)
+
+
+@pytest.fixture(autouse=True, scope="session")
+def parser_cache_dir(tmp_path_factory) -> str:
+    """
+    The parser cache of the tests and of the shells they start,
+    a temporary directory instead of the cache of the user.
+    """
+    cache_dir = str(tmp_path_factory.mktemp("parser_cache"))
+    with pytest.MonkeyPatch.context() as monkeypatch:
+        monkeypatch.setenv("SHELL_PARSER_CACHE_DIR", cache_dir)
+        yield cache_dir
+
+
+@pytest.fixture
+def shell_script() -> str:
+    """
+    The path of shell.py.
+    """
+    return os.path.join(SRC_DIR, "shell.py")
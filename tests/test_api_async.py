@@ -0,0 +1,123 @@
+"""
+Tests of eval_command_async: concurrent commands write to their own
+output streams and run in one shared thread pool.
+"""
+
+import asyncio
+import io
+import threading
+from concurrent.futures import ThreadPoolExecutor
+import pytest
+from core import api
+from core.api import create_shell_engine, eval_command_async
+
+
+@pytest.fixture
+def files(tmp_path, monkeypatch):
+    for i in range(8):
+        (tmp_path / f"{i}.txt").write_text(
+            "".join(f"{i} {n}\n" for n in range(2000)))
+    monkeypatch.chdir(tmp_path)
+
+
+async def gather_outputs(engine, commands, executor=None):
+    outputs = [io.StringIO() for _ in commands]
+    await asyncio.gather(*(
+        eval_command_async(engine, command, output, executor)
+        for command, output in zip(commands, outputs)))
+    return [output.getvalue() for output in outputs]
+
+
+@pytest.mark.parametrize("pipeline_mode", ["sequential", "streaming"])
+def test_concurrent_outputs(files, pipeline_mode):
+    engine = create_shell_engine(pipeline_mode=pipeline_mode)
+    commands = [f"cat {i}.txt | sort -r | head -n 1000" for i in range(8)]
+    commands += [f"echo {i}" for i in range(8)]
+    outputs = asyncio.run(gather_outputs(engine, commands))
+    for i in range(8):
+        assert outputs[i] == "".join(
+            f"{i} {n}\n" for n in sorted(range(2000), key=str,
+                                         reverse=True)[:1000])
+        assert outputs[8 + i] == f"{i}\n"
+
+
+def test_concurrent_engines(files):
+    engines = [create_shell_engine() for _ in range(4)]
+
+    async def main():
+        return await asyncio.gather(*(
+            gather_outputs(engine, [f"cat {i}.txt | wc -l", f"echo {i}"])
+            for i, engine in enumerate(engines)))
+
+    for i, outputs in enumerate(asyncio.run(main())):
+        assert outputs == ["2000\n", f"{i}\n"]
+
+
+def test_shared_executor(files):
+    assert api._get_executor() is api._get_executor()
+    threads = set()
+    engine = create_shell_engine()
+    original = engine._eval_command
+
+    def eval_command(*args, **kwargs):
+        threads.add(threading.current_thread())
+        original(*args, **kwargs)
+
+    engine._eval_command = eval_command
+    for _ in range(3):
+        assert asyncio.run(gather_outputs(
+            engine, ["echo a"] * 4)) == ["a\n"] * 4
+    # the event loops of the three runs got the threads of one pool
+    assert all(thread.name.startswith("shell-engine") for thread in threads)
+    assert len(threads) <= api._get_executor()._max_workers
+    assert not api._get_executor()._shutdown
+
+
+def test_given_executor(files, monkeypatch):
+    def no_shared_executor():
+        raise AssertionError("the shared executor is used")
+
+    monkeypatch.setattr(api, "_get_executor", no_shared_executor)
+    engine = create_shell_engine()
+    with ThreadPoolExecutor(2, thread_name_prefix="given") as executor:
+        names = set()
+        original = engine._eval_command
+
+        def eval_command(*args, **kwargs):
+            names.add(threading.current_thread().name)
+            original(*args, **kwargs)
+
+        engine._eval_command = eval_command
+        assert asyncio.run(gather_outputs(
+            engine, ["echo a", "cat 0.txt | wc -l"], executor)) == [
+            "a\n", "2000\n"]
+    assert executor._shutdown
+    assert names and all(name.startswith("given") for name in names)
+
+
+def test_loop_not_blocked(files):
+    engine = create_shell_engine()
+    started = threading.Event()
+    release = threading.Event()
+    original = engine._eval_command
+
+    def eval_command(*args, **kwargs):
+        started.set()
+        release.wait(5)
+        original(*args, **kwargs)
+
+    engine._eval_command = eval_command
+
+    async def main():
+        output = io.StringIO()
+        task = asyncio.ensure_future(
+            eval_command_async(engine, "echo a", output))
+        # the loop keeps running while the command waits
+        while not started.is_set():
+            await asyncio.sleep(0.001)
+        assert not task.done()
+        release.set()
+        await task
+        return output.getvalue()
+
+    assert asyncio.run(main()) == "a\n"
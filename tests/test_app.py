@@ -0,0 +1,38 @@
+"""
+Tests of the base classes of the applications.
+"""
+
+import io
+import pytest
+from core.app import App, StreamingApp
+
+
+def test_app_without_run_is_rejected():
+    with pytest.raises(TypeError):
+        class Nothing(App):
+            pass
+
+
+def test_app_with_run_prints_to_output_stream():
+    class Hello(App):
+        def _run(self, args):
+            print("hello", *args)
+    output = io.StringIO()
+    Hello("hello").exec(["world"], io.StringIO(), output)
+    assert output.getvalue() == "hello world\n"
+
+
+def test_app_with_run_io():
+    class Upper(App):
+        def _run_io(self, args, input_stream, output_stream):
+            output_stream.write(input_stream.read().upper())
+    output = io.StringIO()
+    Upper("upper").exec([], io.StringIO("abc\n"), output)
+    assert output.getvalue() == "ABC\n"
+
+
+def test_streaming_app_must_implement_stream():
+    class Lines(StreamingApp):
+        pass
+    with pytest.raises(TypeError):
+        Lines("lines")
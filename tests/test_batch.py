@@ -0,0 +1,130 @@
+"""
+Tests of the batch mode: scripts given with -f or on the standard input,
+errors in the middle of a script and the timing of -t.
+"""
+
+import io
+import re
+import subprocess
+import sys
+import pytest
+from core.api import get_parse_cache_info
+from core.error_handling import AppRuntimeError
+from user.batch import BatchRunner
+
+SCRIPT = """\
+echo a
+
+# a comment
+   # an indented comment
+cat missing.txt
+echo b | cut
+nosuch x
+echo "x
+echo c
+"""
+
+OUTPUT = """\
+a
+cat: unexpected error: [Errno 2] No such file or directory: 'missing.txt'
+cut: wrong number of arguments
+unsupported application nosuch
+ParseError: unterminated double quote at position 7: found end of input
+c
+"""
+
+COMMANDS = ["echo a", "cat missing.txt", "echo b | cut", "nosuch x",
+            "echo \"x", "echo c"]
+
+TIMING = re.compile(r"(\d+\.\d{3}) ms\t(.*)")
+TOTAL = re.compile(r"(\d+) commands in (\d+\.\d{3}) ms")
+
+
+def run_shell(shell_script, tmp_path, args, script):
+    return subprocess.run([sys.executable, shell_script] + args,
+                          input=script, capture_output=True, text=True,
+                          cwd=tmp_path, timeout=60)
+
+
+@pytest.fixture
+def script_file(tmp_path):
+    path = tmp_path / "script.sh"
+    path.write_text(SCRIPT)
+    return str(path)
+
+
+def test_script_file(shell_script, tmp_path, script_file):
+    result = run_shell(shell_script, tmp_path, ["-f", script_file], "")
+    assert result.returncode == 0
+    assert result.stdout == OUTPUT
+    assert result.stderr == ""
+
+
+def test_standard_input(shell_script, tmp_path):
+    result = run_shell(shell_script, tmp_path, [], SCRIPT)
+    assert result.returncode == 0
+    assert result.stdout == OUTPUT
+    assert result.stderr == ""
+
+
+@pytest.mark.parametrize("args", [["-t"], ["-t", "-f", "{}"]])
+def test_timing(shell_script, tmp_path, script_file, args):
+    args = [arg.format(script_file) for arg in args]
+    result = run_shell(shell_script, tmp_path, args, SCRIPT)
+    assert result.returncode == 0
+    # the timing doesn't change the output
+    assert result.stdout == OUTPUT
+    lines = result.stderr.splitlines()
+    timings = [TIMING.fullmatch(line) for line in lines[:-1]]
+    assert all(timings)
+    assert [timing.group(2) for timing in timings] == COMMANDS
+    total = TOTAL.fullmatch(lines[-1])
+    assert total and int(total.group(1)) == len(COMMANDS)
+    assert float(total.group(2)) == pytest.approx(
+        sum(float(timing.group(1)) for timing in timings), abs=0.01)
+
+
+@pytest.mark.parametrize("args", [["-t", "-c", "echo"], ["-t", "-e"]])
+def test_timing_of_other_modes(shell_script, tmp_path, args):
+    result = run_shell(shell_script, tmp_path, args, "")
+    assert result.returncode != 0
+    assert "-t is only supported with -f or standard input" in result.stderr
+
+
+def test_errors_dont_stop_the_script(capsys):
+    runner = BatchRunner()
+    runner.run(io.StringIO(SCRIPT))
+    assert capsys.readouterr().out == OUTPUT
+
+
+def test_exit_flag_stops_the_script(capsys):
+    runner = BatchRunner(exit_flag=True)
+    with pytest.raises(AppRuntimeError):
+        runner.run(io.StringIO(SCRIPT))
+    assert capsys.readouterr().out == "a\n"
+
+
+def test_lines_are_read_as_they_are_evaluated():
+    output = io.StringIO()
+    runner = BatchRunner(output_stream=output)
+    outputs = []
+
+    def lines():
+        for command in ["echo a", "echo b", "echo c"]:
+            outputs.append(output.getvalue())
+            yield command + "\n"
+
+    runner.run(lines())
+    assert outputs == ["", "a\n", "a\nb\n"]
+    assert output.getvalue() == "a\nb\nc\n"
+
+
+def test_repeated_commands_are_parsed_once():
+    output = io.StringIO()
+    timing = io.StringIO()
+    runner = BatchRunner(timing_stream=timing, output_stream=output)
+    runner.run(["echo a | cut -b 1\n"] * 5 + ["echo b\r\n"])
+    assert output.getvalue() == "a\n" * 5 + "b\n"
+    info = get_parse_cache_info(runner.engine)
+    assert (info["hits"], info["misses"]) == (4, 2)
+    assert timing.getvalue().splitlines()[-1].startswith("6 commands in ")
@@ -0,0 +1,75 @@
+"""
+Tests that the upstream commands of a pipe stop reading their files
+when the rest of the pipe stops reading, e.g. cat big | head -n 5.
+"""
+
+import io
+import pytest
+from core.api import create_shell_engine
+from core.app import App
+
+LINE_COUNT = 1_000_000
+# much less than the file, a few buffers of each command
+READ_LIMIT = 1 << 20
+
+
+class _CountingFile(io.FileIO):
+    """
+    File counting the bytes read from it by its buffer.
+    """
+    opened = []
+
+    def __init__(self, file: str):
+        super().__init__(file, "r")
+        self.read_bytes = 0
+        _CountingFile.opened.append(self)
+
+    def readinto(self, buffer) -> int:
+        count = super().readinto(buffer)
+        if count:
+            self.read_bytes += count
+        return count
+
+
+def _open(app: App, file: str):
+    buffer = io.BufferedReader(_CountingFile(file))
+    return buffer if app.binary else io.TextIOWrapper(buffer)
+
+
+@pytest.fixture(scope="module")
+def big_file(tmp_path_factory) -> str:
+    path = tmp_path_factory.mktemp("data") / "big.txt"
+    with open(path, "w") as f:
+        f.writelines(f"line {i}\n" for i in range(LINE_COUNT))
+    return str(path)
+
+
+@pytest.fixture
+def opened_files(monkeypatch):
+    monkeypatch.setattr(App, "_open", _open)
+    monkeypatch.setattr(_CountingFile, "opened", [])
+    return _CountingFile.opened
+
+
+@pytest.mark.parametrize("pipeline_mode", ["sequential", "streaming"])
+@pytest.mark.parametrize("bytes_mode", [False, True],
+                         ids=["text", "bytes"])
+@pytest.mark.parametrize("command, expected", [
+    ("cat {} | head -n 5",
+     "line 0\nline 1\nline 2\nline 3\nline 4\n"),
+    ("cat {} | head -n 5 | wc -l", "5\n"),
+    ("cat {} | cat | grep 'line 1' | head -n 2", "line 1\nline 10\n"),
+    ("head -n 3 {}", "line 0\nline 1\nline 2\n"),
+    ("head -c 10 {}", "line 0\nlin"),
+])
+def test_upstream_reads_are_bounded(big_file, opened_files, pipeline_mode,
+                                    bytes_mode, command, expected):
+    engine = create_shell_engine(pipeline_mode=pipeline_mode,
+                                 bytes_mode=bytes_mode)
+    output = io.StringIO()
+    engine._eval_command(command.format(big_file), None, output)
+    assert output.getvalue() == expected
+    assert len(opened_files) == 1
+    assert 0 < opened_files[0].read_bytes < READ_LIMIT
+    # the early exit closes the file of the upstream command
+    assert opened_files[0].closed
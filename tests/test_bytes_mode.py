@@ -0,0 +1,96 @@
+"""
+Tests of the bytes mode: bytes flow through pipes and files unchanged,
+also where they are not valid UTF-8, and cut -b selects bytes.
+"""
+
+import io
+import shutil
+import subprocess
+import pytest
+from core.api import create_shell_engine
+
+# a two-byte and a three-byte character, invalid bytes,
+# a character cut by the end of the file
+DATA = "é€x\n".encode() + b"\xff\xfeab\n" + b"caf\xc3\n"
+
+
+def run(command: str, **kwargs) -> bytes:
+    engine = create_shell_engine(bytes_mode=True, **kwargs)
+    output = io.BytesIO()
+    engine._eval_command(command, None, output)
+    return output.getvalue()
+
+
+@pytest.fixture
+def files(tmp_path, monkeypatch):
+    (tmp_path / "in.bin").write_bytes(DATA)
+    monkeypatch.chdir(tmp_path)
+    return tmp_path
+
+
+@pytest.fixture(params=[("sequential", True), ("streaming", True),
+                        ("sequential", False), ("streaming", False)],
+                ids=["sequential", "streaming", "sequential-unfused",
+                     "streaming-unfused"])
+def pipeline(request):
+    mode, fusion = request.param
+    return {"pipeline_mode": mode, "pipeline_fusion": fusion}
+
+
+@pytest.mark.parametrize("command, expected", [
+    # cut -b splits the characters into their bytes
+    ("cut -b 1 in.bin", b"\xc3\n\xff\nc\n"),
+    ("cut -b 2-3 in.bin", b"\xa9\xe2\n\xfea\naf\n"),
+    ("cut -b 3- in.bin", b"\xe2\x82\xacx\nab\nf\xc3\n"),
+    ("cut -b -2,4 in.bin", b"\xc3\xa9\x82\n\xff\xfeb\nca\xc3\n"),
+    ("cat in.bin | cut -b 1,3 | cat", b"\xc3\xe2\n\xffa\ncf\n"),
+    # the other bytes pass through unchanged
+    ("cat in.bin", DATA),
+    ("cat < in.bin", DATA),
+    ("cat in.bin | cat | cat", DATA),
+    ("cat in.bin | head -n 2", b"\xc3\xa9\xe2\x82\xacx\n\xff\xfeab\n"),
+    ("cat in.bin | tail -n 1", b"caf\xc3\n"),
+    ("cat in.bin | grep a", b"\xff\xfeab\ncaf\xc3\n"),
+    ("cat in.bin | grep -v a", b"\xc3\xa9\xe2\x82\xacx\n"),
+    ("cat in.bin | grep -c a", b"2\n"),
+    # bytes sort in the order of their values
+    ("cat in.bin | sort", b"caf\xc3\n\xc3\xa9\xe2\x82\xacx\n\xff\xfeab\n"),
+    ("cat in.bin in.bin | sort | uniq",
+     b"caf\xc3\n\xc3\xa9\xe2\x82\xacx\n\xff\xfeab\n"),
+    ("cat in.bin | wc -l", b"3\n"),
+    ("cat in.bin | wc -w", b"3\n"),
+    ("echo a; cat in.bin | tail -n 2", b"a\n\xff\xfeab\ncaf\xc3\n"),
+    ("cat in.bin | echo a", b"a\n"),
+])
+def test_pipes(files, pipeline, command, expected):
+    assert run(command, **pipeline) == expected
+
+
+@pytest.mark.parametrize("command, expected", [
+    ("cat in.bin > out.bin", DATA),
+    ("cat < in.bin > out.bin", DATA),
+    ("cat in.bin | cat > out.bin", DATA),
+    ("cat in.bin | grep -v z | sort -r | sort > out.bin",
+     b"caf\xc3\n\xc3\xa9\xe2\x82\xacx\n\xff\xfeab\n"),
+])
+def test_redirected_output(files, pipeline, command, expected):
+    assert run(command, **pipeline) == b""
+    assert (files / "out.bin").read_bytes() == expected
+
+
+def test_text_output(files):
+    # a text stream gets the invalid bytes replaced
+    engine = create_shell_engine(bytes_mode=True)
+    output = io.StringIO()
+    engine._eval_command("cat in.bin", None, output)
+    assert output.getvalue() == DATA.decode("utf-8", "replace")
+
+
+@pytest.mark.skipif(shutil.which("cut") is None, reason="no GNU cut")
+@pytest.mark.parametrize("spec", ["1", "2", "1-2", "2-", "-3", "1,3,5",
+                                  "2,1", "4-9", "1-1,3-4"])
+def test_same_output_as_gnu_cut(files, spec):
+    command = f"cut -b {spec} in.bin"
+    expected = subprocess.run(command, shell=True, capture_output=True,
+                              check=True).stdout
+    assert run(command) == expected
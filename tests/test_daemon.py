@@ -0,0 +1,79 @@
+"""
+Tests of the shell daemon and its client over a Unix domain socket.
+"""
+
+import io
+import os
+import stat
+import sys
+import threading
+import pytest
+from user import client, daemon, protocol
+
+pytestmark = pytest.mark.skipif(not hasattr(os, "fork"),
+                                reason="the daemon forks for each request")
+
+
+class _Terminal(io.StringIO):
+    def isatty(self) -> bool:
+        return True
+
+
+@pytest.fixture
+def running_daemon(tmp_path):
+    server = daemon.ShellDaemon(str(tmp_path / "daemon.sock"))
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield server
+    server.shutdown()
+    server.server_close()
+
+
+def test_socket_is_only_accessible_to_the_user(running_daemon):
+    mode = os.stat(running_daemon.server_address).st_mode
+    assert stat.S_ISSOCK(mode)
+    assert stat.S_IMODE(mode) == 0o600
+
+
+def test_remote_command(running_daemon, monkeypatch, capfd):
+    monkeypatch.setattr(sys, "stdin", _Terminal())
+    status = client.run_remote_command("echo hello",
+                                       running_daemon.server_address)
+    assert status == 0
+    assert capfd.readouterr().out == "hello\n"
+
+
+def test_client_refuses_daemon_of_another_user(running_daemon, monkeypatch):
+    monkeypatch.setattr(sys, "stdin", _Terminal())
+    monkeypatch.setattr(client.os, "getuid", lambda: os.geteuid() + 1)
+    with pytest.raises(PermissionError):
+        client.run_remote_command("echo hello",
+                                  running_daemon.server_address)
+
+
+def test_other_files_are_not_removed(tmp_path):
+    path = tmp_path / "daemon.sock"
+    path.write_text("not a socket")
+    with pytest.raises(FileExistsError):
+        daemon.ShellDaemon(str(path))
+    assert path.read_text() == "not a socket"
+
+
+def test_private_directory_must_not_be_shared(tmp_path, monkeypatch):
+    directory = tmp_path / "private"
+    directory.mkdir(mode=0o755)
+    os.chmod(directory, 0o755)
+    monkeypatch.setattr(daemon, "private_socket_directory",
+                        lambda: str(directory))
+    with pytest.raises(PermissionError):
+        daemon.ShellDaemon(str(directory / "daemon.sock"))
+
+
+def test_default_socket_path(tmp_path, monkeypatch):
+    monkeypatch.delenv("SHELL_DAEMON_SOCKET", raising=False)
+    monkeypatch.setenv("XDG_RUNTIME_DIR", str(tmp_path))
+    assert protocol.default_socket_path() == str(
+        tmp_path / "shell-daemon.sock")
+    monkeypatch.delenv("XDG_RUNTIME_DIR")
+    assert (os.path.dirname(protocol.default_socket_path())
+            == protocol.private_socket_directory())
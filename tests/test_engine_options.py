@@ -0,0 +1,79 @@
+"""
+Tests that the options of the engine are not shell variables.
+"""
+
+import io
+import pytest
+from core import pipe_fusion
+from core.api import create_shell_engine
+from core.eval_node import PipeNode
+from core.runtime import EngineOptions
+
+OPTIONS = {
+    "exit_flag": False,
+    "parse_cache_size": 16,
+    "parser_backend": "descent",
+    "pipeline_mode": "sequential",
+    "pipeline_fusion": True,
+    "result_cache_size": 1024,
+    "bytes_mode": False,
+}
+
+
+def run(engine, command: str) -> str:
+    output = io.StringIO()
+    engine._eval_command(command, None, output)
+    return output.getvalue()
+
+
+def test_all_options_are_tested():
+    assert set(OPTIONS) == set(EngineOptions.__slots__)
+
+
+@pytest.mark.parametrize("name", OPTIONS)
+def test_option_is_not_a_variable(name):
+    engine = create_shell_engine(**OPTIONS)
+    assert getattr(engine.options, name) == OPTIONS[name]
+    assert engine._get_var(name) is None
+    assert run(engine, f"echo ${name}") == "\n"
+
+
+def test_other_keywords_are_variables():
+    engine = create_shell_engine(exit_flag=False, greeting="hello")
+    assert run(engine, "echo $greeting") == "hello\n"
+
+
+@pytest.mark.parametrize("command", [
+    "set pipeline_mode streaming",
+    "set pipeline_fusion False",
+    "set bytes_mode True",
+])
+def test_set_does_not_change_options(command):
+    engine = create_shell_engine(exit_flag=False)
+    run(engine, command)
+    assert (engine.options.pipeline_mode, engine.options.pipeline_fusion,
+            engine.options.bytes_mode) == ("sequential", True, False)
+
+
+def test_set_does_not_change_pipeline_mode(monkeypatch):
+    def streaming_pipe(commands, context):
+        raise AssertionError("the pipe is run in the streaming mode")
+    monkeypatch.setattr(PipeNode, "StreamingPipe", streaming_pipe)
+    engine = create_shell_engine()
+    assert run(engine, "set pipeline_mode streaming; echo a | cat") == "a\n"
+
+
+@pytest.mark.parametrize("fusion, fused", [(True, True), (False, False)])
+def test_pipeline_fusion_option(monkeypatch, fusion, fused):
+    calls = []
+    call = pipe_fusion.FusedStage.__call__
+
+    def counted_call(self, context):
+        calls.append(self)
+        return call(self, context)
+    monkeypatch.setattr(pipe_fusion.FusedStage, "__call__", counted_call)
+    engine = create_shell_engine(pipeline_fusion=fusion)
+    # the variable doesn't change the option
+    run(engine, f"set pipeline_fusion {not fusion}")
+    assert run(engine, "echo b | sort | head -n 1") == "b\n"
+    assert (len(calls) > 0) == fused
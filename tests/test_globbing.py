@@ -0,0 +1,92 @@
+"""
+Tests that glob patterns expand as glob.glob with recursive=True,
+including "**" and the files starting with a dot.
+"""
+
+import glob
+import io
+import os
+import pytest
+from core.api import create_shell_engine
+from core.globbing import DirectoryListing, expand_glob
+
+FILES = [
+    "top.txt",
+    "top.py",
+    ".hidden.txt",
+    "a/one.py",
+    "a/two.txt",
+    "a/.secret.py",
+    "a/b/three.py",
+    "a/b/c/four.txt",
+    "a/.hidden/five.py",
+    ".config/six.py",
+    ".config/sub/seven.txt",
+    "d/b/eight.py",
+    "e/",
+]
+
+PATTERNS = [
+    "*", "*.py", "**", "**/", "**/*.py", "**/*.txt", "**/**/*.txt",
+    "a/**", "a/**/", "a/**/*.py", "a/**/b/*", "**/b/*.py", "*/*",
+    "*/b", "a/*/c", "a/b?", "[ad]/*", "?/b/*.py", ".*", ".*/*",
+    ".*/**", "**/.*", "a/.*", "a/.hidden/*", "**/.hidden/*",
+    "e/*", "e/**", "nomatch*", "**/nomatch", "a/**/nomatch/*",
+]
+
+
+@pytest.fixture
+def tree(tmp_path, monkeypatch):
+    for name in FILES:
+        path = tmp_path / name
+        if name.endswith("/"):
+            path.mkdir(parents=True, exist_ok=True)
+        else:
+            path.parent.mkdir(parents=True, exist_ok=True)
+            path.write_text(name)
+    monkeypatch.chdir(tmp_path)
+    return tmp_path
+
+
+@pytest.mark.parametrize("pattern", PATTERNS)
+def test_same_matches_as_glob(tree, pattern):
+    assert (expand_glob(pattern, DirectoryListing())
+            == glob.glob(pattern, recursive=True))
+
+
+@pytest.mark.parametrize("pattern", ["**/*.py", ".*/**", "a/**/"])
+def test_absolute_pattern(tree, pattern):
+    pattern = os.path.join(str(tree), pattern)
+    assert (expand_glob(pattern, DirectoryListing())
+            == glob.glob(pattern, recursive=True))
+
+
+def test_shared_listing(tree):
+    # the listing of a command is shared by its arguments
+    listing = DirectoryListing()
+    for pattern in PATTERNS:
+        assert (expand_glob(pattern, listing)
+                == glob.glob(pattern, recursive=True))
+
+
+@pytest.mark.parametrize("pattern", ["**/*.py", ".*", "a/**/*.txt"])
+def test_arguments(tree, pattern):
+    engine = create_shell_engine()
+    output = io.StringIO()
+    engine._eval_command(f"echo {pattern}", None, output)
+    assert output.getvalue() == " ".join(
+        glob.glob(pattern, recursive=True)) + "\n"
+
+
+@pytest.mark.parametrize("command, expected", [
+    # no match leaves the pattern as it is
+    ("echo nomatch*", "nomatch*\n"),
+    # quoted glob characters are not expanded
+    ("echo '*.py'", "*.py\n"),
+    ("echo \"**\"", "**\n"),
+])
+def test_unexpanded_arguments(tree, command, expected):
+    engine = create_shell_engine()
+    output = io.StringIO()
+    engine._eval_command(command, None, output)
+    assert output.getvalue() == expected
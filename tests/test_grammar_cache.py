@@ -0,0 +1,129 @@
+"""
+Tests of the parser cache on disk: the cache files are private to the user
+and the files others could have written are never unpickled.
+"""
+
+import os
+import stat
+import pytest
+from core.shell_parser import grammar_cache
+
+GRAMMAR = """
+start: WORD+
+%import common.WORD
+%ignore " "
+"""
+
+pytestmark = pytest.mark.skipif(not hasattr(os, "getuid"),
+                                reason="the cache checks the user ids")
+
+
+@pytest.fixture
+def cache_dir(tmp_path, monkeypatch):
+    cache_dir = tmp_path / "cache"
+    monkeypatch.setenv("SHELL_PARSER_CACHE_DIR", str(cache_dir))
+    return cache_dir
+
+
+@pytest.fixture
+def loads(monkeypatch):
+    """
+    The cache files unpickled by the following loads.
+    """
+    loaded = []
+    original = grammar_cache._ParserUnpickler.load
+
+    def load(self):
+        loaded.append(self)
+        return original(self)
+
+    monkeypatch.setattr(grammar_cache._ParserUnpickler, "load", load)
+    return loaded
+
+
+def cache_path() -> str:
+    return grammar_cache.get_cache_path(GRAMMAR, "earley")
+
+
+def check_parser(parser):
+    assert [str(token) for token in parser.parse("a b").children] == ["a", "b"]
+
+
+def test_cache_is_private(cache_dir, loads):
+    check_parser(grammar_cache.load_parser(GRAMMAR))
+    assert not loads
+    assert stat.S_IMODE(os.stat(cache_dir).st_mode) == 0o700
+    assert stat.S_IMODE(os.stat(cache_path()).st_mode) == 0o600
+    check_parser(grammar_cache.load_parser(GRAMMAR))
+    assert len(loads) == 1
+
+
+def test_existing_directory(cache_dir, loads):
+    cache_dir.mkdir(mode=0o755)
+    os.chmod(cache_dir, 0o755)
+    grammar_cache.load_parser(GRAMMAR)
+    check_parser(grammar_cache.load_parser(GRAMMAR))
+    assert len(loads) == 1
+
+
+@pytest.mark.parametrize("mode", [0o620, 0o602, 0o666])
+def test_file_writable_by_others(cache_dir, loads, mode):
+    grammar_cache.load_parser(GRAMMAR)
+    os.chmod(cache_path(), mode)
+    check_parser(grammar_cache.load_parser(GRAMMAR))
+    assert not loads
+    # the rebuilt parser replaces the file
+    assert stat.S_IMODE(os.stat(cache_path()).st_mode) == 0o600
+    grammar_cache.load_parser(GRAMMAR)
+    assert len(loads) == 1
+
+
+@pytest.mark.parametrize("mode", [0o770, 0o707, 0o777, 0o1777])
+def test_directory_writable_by_others(cache_dir, loads, mode):
+    grammar_cache.load_parser(GRAMMAR)
+    os.chmod(cache_dir, mode)
+    check_parser(grammar_cache.load_parser(GRAMMAR))
+    assert not loads
+    # nothing is written to the directory
+    os.unlink(cache_path())
+    grammar_cache.load_parser(GRAMMAR)
+    assert not os.path.exists(cache_path())
+
+
+def test_files_of_another_user(cache_dir, loads, monkeypatch):
+    grammar_cache.load_parser(GRAMMAR)
+    monkeypatch.setattr(os, "getuid", lambda: os.stat(cache_dir).st_uid + 1)
+    check_parser(grammar_cache.load_parser(GRAMMAR))
+    assert not loads
+
+
+def test_symbolic_link(cache_dir, tmp_path, loads):
+    grammar_cache.load_parser(GRAMMAR)
+    target = tmp_path / "target.pickle"
+    os.replace(cache_path(), target)
+    os.symlink(target, cache_path())
+    check_parser(grammar_cache.load_parser(GRAMMAR))
+    assert not loads
+    # the link is replaced by a file of the cache
+    assert not os.path.islink(cache_path())
+
+
+def test_linked_directory(cache_dir, tmp_path, loads):
+    target = tmp_path / "target"
+    target.mkdir(mode=0o700)
+    os.symlink(target, cache_dir)
+    grammar_cache.load_parser(GRAMMAR)
+    check_parser(grammar_cache.load_parser(GRAMMAR))
+    assert not loads
+
+
+def test_disabled_cache(monkeypatch, loads):
+    monkeypatch.setenv("SHELL_PARSER_CACHE_DIR", "")
+    assert cache_path() is None
+    check_parser(grammar_cache.load_parser(GRAMMAR))
+    assert not loads
+
+
+def test_tests_use_a_temporary_cache(parser_cache_dir):
+    assert os.environ["SHELL_PARSER_CACHE_DIR"] == parser_cache_dir
+    assert parser_cache_dir != grammar_cache._DEFAULT_CACHE_DIR
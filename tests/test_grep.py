@@ -0,0 +1,150 @@
+"""
+Tests of grep, its options and the search of files by chunks
+and by several processes.
+"""
+
+import io
+import random
+import shutil
+import subprocess
+import pytest
+from core.api import create_shell_engine
+from core.apps import basic_apps
+
+# the last line has no line break
+TEXT = "foo bar\nBar baz\na.b qux\nfoo\naxb foofoo end"
+
+
+def run(command: str, input_text: str = None, **kwargs) -> str:
+    engine = create_shell_engine(**kwargs)
+    output = io.StringIO()
+    input_stream = io.StringIO(input_text) if input_text is not None else None
+    engine._eval_command(command, input_stream, output)
+    return output.getvalue()
+
+
+@pytest.fixture
+def files(tmp_path, monkeypatch):
+    (tmp_path / "f.txt").write_text(TEXT)
+    (tmp_path / "g.txt").write_text("nothing\nfoo\n")
+    monkeypatch.chdir(tmp_path)
+
+
+@pytest.fixture(params=[1 << 20, 7, 3], ids=["chunk", "chunk-7", "chunk-3"])
+def chunk_size(request, monkeypatch):
+    # small chunks put the lines and the matches across chunk boundaries
+    monkeypatch.setattr(basic_apps.Grep, "chunk_size", request.param)
+    return request.param
+
+
+@pytest.fixture
+def log_file(tmp_path) -> str:
+    path = tmp_path / "log.txt"
+    path.write_text("".join(f"{i} {'ERROR' if i % 7 == 0 else 'INFO'}\n"
+                            for i in range(20000)))
+    return str(path)
+
+
+def test_no_processes_without_jobs(log_file, monkeypatch):
+    def no_pool(workers):
+        raise AssertionError("grep started a process pool")
+    monkeypatch.setattr(basic_apps, "_process_pool", no_pool)
+    monkeypatch.setattr(basic_apps.Grep, "piece_size", 1 << 12)
+    assert run(f"grep -c ERROR {log_file}") == "2858\n"
+
+
+@pytest.mark.parametrize("options", ["", "-n", "-c", "-v", "-m 5"])
+def test_jobs_output_is_unchanged(log_file, monkeypatch, options):
+    # many pieces, so the results of several processes are merged
+    monkeypatch.setattr(basic_apps.Grep, "piece_size", 1 << 12)
+    command = f"grep {options} ERROR {log_file}"
+    expected = run(command)
+    assert run(command.replace("grep", "grep -j 2", 1)) == expected
+
+
+@pytest.mark.parametrize("bytes_mode", [False, True], ids=["text", "bytes"])
+@pytest.mark.parametrize("command, expected", [
+    # the pattern is searched anywhere in the lines
+    ("grep bar f.txt", "foo bar\n"),
+    ("grep 'ba[rz]' f.txt", "foo bar\nBar baz\n"),
+    ("grep 'foo$' f.txt", "foo\n"),
+    ("grep '^foo' f.txt", "foo bar\nfoo\n"),
+    ("grep 'end$' f.txt", "axb foofoo end"),
+    ("grep a.b f.txt", "a.b qux\naxb foofoo end"),
+    ("grep zzz f.txt", ""),
+    ("grep -v foo f.txt", "Bar baz\na.b qux\n"),
+    ("grep -v bar f.txt", "Bar baz\na.b qux\nfoo\naxb foofoo end"),
+    ("grep -c foo f.txt", "3\n"),
+    ("grep -c -v foo f.txt", "2\n"),
+    ("grep -c foo f.txt g.txt", "f.txt:3\ng.txt:1\n"),
+    ("grep -l foo f.txt g.txt", "f.txt\ng.txt\n"),
+    ("grep -l bar f.txt g.txt", "f.txt\n"),
+    ("grep -l bar < f.txt", "(standard input)\n"),
+    ("grep -n foo f.txt", "1:foo bar\n4:foo\n5:axb foofoo end"),
+    ("grep -vn foo f.txt", "2:Bar baz\n3:a.b qux\n"),
+    ("grep -n foo f.txt g.txt",
+     "f.txt:1:foo bar\nf.txt:4:foo\nf.txt:5:axb foofoo end"
+     "g.txt:2:foo\n"),
+    ("grep -i bar f.txt", "foo bar\nBar baz\n"),
+    ("grep -in 'BA[RZ]' f.txt", "1:foo bar\n2:Bar baz\n"),
+    ("grep -F a.b f.txt", "a.b qux\n"),
+    ("grep -iF A.B f.txt", "a.b qux\n"),
+    ("grep -m 2 foo f.txt", "foo bar\nfoo\n"),
+    ("grep -m 2 -n foo f.txt", "1:foo bar\n4:foo\n"),
+    ("grep -m 0 foo f.txt", ""),
+    ("grep -m 1 -v foo f.txt", "Bar baz\n"),
+    ("cat f.txt | grep -c foo", "3\n"),
+    ("cat f.txt | grep -n 'o$'", "4:foo\n"),
+])
+def test_options(files, chunk_size, bytes_mode, command, expected):
+    assert run(command, bytes_mode=bytes_mode) == expected
+
+
+@pytest.mark.parametrize("command", ["grep", "grep -x a f.txt",
+                                     "grep -m f.txt", "grep -j 0 a f.txt"])
+def test_invalid_arguments(files, command):
+    with pytest.raises(Exception):
+        run(command)
+
+
+def _is_gnu_grep() -> bool:
+    if shutil.which("grep") is None:
+        return False
+    result = subprocess.run(["grep", "--version"], capture_output=True,
+                            text=True)
+    return "GNU grep" in result.stdout
+
+
+GNU_PATTERNS = ["foo", "^foo", "foo$", "^$", "a.b", "a\\sb", "Ba+z",
+                "(foo|bar) q", "[0-9]", "\\bbar\\b", "ERROR|warn",
+                "\\s$", "[^a-z ]", "é"]
+GNU_OPTIONS = ["", "-v", "-c", "-n", "-i", "-vn", "-l", "-m 3", "-c -v",
+               "-in"]
+
+
+@pytest.fixture(scope="module")
+def random_file(tmp_path_factory) -> str:
+    generator = random.Random(0)
+    words = ["foo", "bar", "Baz", "ERROR", "warn", "qux", "a b", "x\ty",
+             "zz", "é", "7"]
+    lines = (" ".join(generator.choice(words)
+                      for _ in range(generator.randint(0, 6)))
+             for _ in range(2000))
+    path = tmp_path_factory.mktemp("grep") / "random.txt"
+    path.write_text("\n".join(lines) + "\n")
+    return str(path)
+
+
+@pytest.mark.skipif(not _is_gnu_grep(), reason="GNU grep is not installed")
+@pytest.mark.parametrize("bytes_mode", [False, True], ids=["text", "bytes"])
+@pytest.mark.parametrize("options", GNU_OPTIONS)
+@pytest.mark.parametrize("pattern", GNU_PATTERNS)
+def test_same_output_as_gnu_grep(random_file, monkeypatch, pattern,
+                                 options, bytes_mode):
+    monkeypatch.setattr(basic_apps.Grep, "chunk_size", 1 << 10)
+    quoted = "'" + pattern + "'"
+    expected = subprocess.run(f"grep -E {options} {quoted} {random_file}",
+                              shell=True, capture_output=True).stdout
+    output = run(f"grep {options} {quoted} {random_file}",
+                 bytes_mode=bytes_mode)
+    assert output.encode() == expected
@@ -0,0 +1,100 @@
+"""
+Tests of head: -n and -c counts, negative counts, several files
+and the input of a pipe.
+"""
+
+import io
+import shutil
+import subprocess
+import pytest
+from core.api import create_shell_engine
+
+FILES = {
+    "five.txt": "l1\nl2\nl3\nl4\nl5\n",
+    # the last line has no line break
+    "partial.txt": "l1\nl2\nl3\nl4\nl5",
+    "empty.txt": "",
+    "utf8.txt": "é1\né2\né3\n",
+}
+
+
+def run(command: str, **kwargs) -> str:
+    engine = create_shell_engine(**kwargs)
+    output = io.StringIO()
+    engine._eval_command(command, None, output)
+    return output.getvalue()
+
+
+@pytest.fixture
+def files(tmp_path, monkeypatch):
+    for name, text in FILES.items():
+        (tmp_path / name).write_text(text)
+    monkeypatch.chdir(tmp_path)
+
+
+@pytest.mark.parametrize("bytes_mode", [False, True], ids=["text", "bytes"])
+@pytest.mark.parametrize("command, expected", [
+    ("head five.txt", "l1\nl2\nl3\nl4\nl5\n"),
+    ("head -n 2 five.txt", "l1\nl2\n"),
+    ("head -n 0 five.txt", ""),
+    ("head -n 9 partial.txt", "l1\nl2\nl3\nl4\nl5"),
+    ("head -n -2 five.txt", "l1\nl2\nl3\n"),
+    ("head -n -2 partial.txt", "l1\nl2\nl3\n"),
+    ("head -n -0 partial.txt", "l1\nl2\nl3\nl4\nl5"),
+    ("head -n -9 five.txt", ""),
+    ("head -c 4 five.txt", "l1\nl"),
+    ("head -c 0 five.txt", ""),
+    ("head -c -3 partial.txt", "l1\nl2\nl3\nl4"),
+    ("head -c -100 five.txt", ""),
+    ("head -n 3 empty.txt", ""),
+    ("head -n 1 five.txt partial.txt",
+     "==> five.txt <==\nl1\n\n==> partial.txt <==\nl1\n"),
+    ("head -c 2 empty.txt five.txt",
+     "==> empty.txt <==\n\n==> five.txt <==\nl1"),
+    ("cat five.txt | head -n 2", "l1\nl2\n"),
+    ("cat five.txt | head -n -4", "l1\n"),
+    ("cat partial.txt | head -c -1", "l1\nl2\nl3\nl4\nl"),
+])
+def test_head(files, bytes_mode, command, expected):
+    assert run(command, bytes_mode=bytes_mode) == expected
+
+
+@pytest.mark.parametrize("bytes_mode, expected", [
+    # characters in the text mode, bytes in the bytes mode
+    (False, "é1\né"),
+    (True, "é1\n"),
+])
+def test_count_unit(files, bytes_mode, expected):
+    assert run("head -c 4 utf8.txt", bytes_mode=bytes_mode) == expected
+
+
+@pytest.mark.parametrize("command", ["head -x 1 five.txt", "head -n",
+                                     "head -n x five.txt",
+                                     "head missing.txt"])
+def test_invalid_arguments(files, command):
+    with pytest.raises(Exception):
+        run(command)
+
+
+def _is_gnu_head() -> bool:
+    if shutil.which("head") is None:
+        return False
+    result = subprocess.run(["head", "--version"], capture_output=True,
+                            text=True)
+    return "GNU coreutils" in result.stdout
+
+
+@pytest.mark.skipif(not _is_gnu_head(), reason="GNU head is not installed")
+@pytest.mark.parametrize("args", ["", "-n 2", "-n 0", "-n -2", "-n -0",
+                                  "-n -9", "-c 4", "-c -3", "-c -100"])
+@pytest.mark.parametrize("names", [["five.txt"], ["partial.txt"],
+                                   ["utf8.txt"], ["five.txt", "empty.txt",
+                                                  "partial.txt"]])
+def test_same_output_as_gnu_head(files, args, names):
+    command = f"head {args} {' '.join(names)}"
+    expected = subprocess.run(command, shell=True, capture_output=True,
+                              check=True).stdout
+    # a binary stream gets the bytes of a cut character as they are
+    output = io.BytesIO()
+    create_shell_engine(bytes_mode=True)._eval_command(command, None, output)
+    assert output.getvalue() == expected
@@ -0,0 +1,87 @@
+"""
+Import-time budget of the non-interactive modes, checked with
+python -X importtime: the -c path must only load the parser,
+the engine and the apps of the command, checked in sys.modules.
+"""
+
+import subprocess
+import sys
+import pytest
+from conftest import SRC_DIR
+
+# modules of the interactive shell
+INTERACTIVE_MODULES = ("prompt_toolkit", "pygments", "user.shell",
+                       "user.prompt")
+# modules only used by some commands, e.g. eval_command_async or grep -j
+ON_DEMAND_MODULES = ("asyncio", "concurrent", "multiprocessing")
+
+
+def imported_modules(args: list) -> set:
+    """
+    Get the names of the modules imported by python running the args.
+    """
+    result = subprocess.run([sys.executable, "-X", "importtime"] + args,
+                            cwd=SRC_DIR, capture_output=True, text=True)
+    assert result.returncode == 0, result.stderr
+    modules = set()
+    for line in result.stderr.splitlines():
+        if line.startswith("import time:") and "|" in line:
+            modules.add(line.rsplit("|", 1)[1].strip())
+    return modules
+
+
+def loaded(modules: set, packages: tuple) -> set:
+    return {module for module in modules
+            if module.split(".")[0] in packages or module in packages}
+
+
+@pytest.mark.parametrize("command", [
+    "echo hello",
+    "cat shell.py | grep import | wc -l",
+    "grep -c import shell.py; head -n 1 shell.py",
+])
+def test_command_mode_imports(shell_script, command):
+    modules = imported_modules([shell_script, "-c", command])
+    assert "core.engine" in modules
+    assert loaded(modules, INTERACTIVE_MODULES) == set()
+    assert loaded(modules, ON_DEMAND_MODULES) == set()
+
+
+def loaded_app_modules(shell_script: str, command: str) -> set:
+    """
+    Get the app modules in sys.modules after shell.py -c runs the command.
+    The apps are imported with importlib, which -X importtime doesn't log.
+    """
+    code = ("import runpy, sys\n"
+            f"sys.argv = [{shell_script!r}, '-c', {command!r}]\n"
+            f"runpy.run_path({shell_script!r}, run_name='__main__')\n"
+            "print(' '.join(sys.modules), file=sys.stderr)\n")
+    result = subprocess.run([sys.executable, "-c", code], cwd=SRC_DIR,
+                            capture_output=True, text=True)
+    assert result.returncode == 0, result.stderr
+    return {module for module in result.stderr.split()
+            if module.startswith("core.apps.")}
+
+
+@pytest.mark.parametrize("command, app_modules", [
+    ("echo hello", {"core.apps.basic_apps"}),
+    ("echo hello | cut -b 1", {"core.apps.basic_apps",
+                               "core.apps.additional_apps"}),
+    # the fused apps extend apps of both modules, e.g. Grep and Cut
+    ("cat shell.py | wc -l", {"core.apps.basic_apps",
+                              "core.apps.additional_apps",
+                              "core.apps.fused_apps"}),
+])
+def test_command_mode_loads_used_apps_only(shell_script, command,
+                                           app_modules):
+    assert loaded_app_modules(shell_script, command) == app_modules
+
+
+def test_descent_parser_does_not_load_lark():
+    code = ("from core.api import create_shell_engine, eval_command\n"
+            "engine = create_shell_engine(parser_backend='descent')\n"
+            "eval_command(engine, 'echo hello | cat')\n")
+    modules = imported_modules(["-c", code])
+    assert "core.shell_parser.descent_parser" in modules
+    assert loaded(modules, ("lark",)) == set()
+    assert loaded(modules, INTERACTIVE_MODULES) == set()
@@ -0,0 +1,48 @@
+"""
+Tests of the background jobs started with "&".
+"""
+
+import io
+import os
+import pytest
+from core.api import create_shell_engine, eval_command
+from core.runtime import Context
+
+
+def test_snapshot_is_not_changed_by_parents():
+    root = Context()
+    root.set("x", "1")
+    child = root.copy()
+    child.set("y", "2")
+    snapshot = child.snapshot()
+    root.set("x", "changed")
+    child.set("y", "changed")
+    assert snapshot.get("x") == "1"
+    assert snapshot.get("y") == "2"
+    # command substitutions of the snapshot read the snapshot too
+    assert snapshot.get_root_context_copy().get("x") == "1"
+
+
+@pytest.mark.skipif(not hasattr(os, "mkfifo"), reason="needs mkfifo")
+def test_later_set_does_not_change_running_job(tmp_path):
+    fifo = tmp_path / "fifo"
+    os.mkfifo(fifo)
+    engine = create_shell_engine()
+    output = io.StringIO()
+    eval_command(engine, "set x 1", output)
+    # the job is blocked on the fifo until the variable is changed
+    eval_command(engine, f"echo `cat {fifo}` $x `echo $x` &", output)
+    eval_command(engine, "set x 2", output)
+    with open(fifo, "w") as writer:
+        writer.write("done\n")
+    eval_command(engine, "wait; echo $x", output)
+    assert output.getvalue() == "done 1 1\n2\n"
+
+
+def test_jobs_output_does_not_interleave():
+    engine = create_shell_engine()
+    output = io.StringIO()
+    eval_command(engine, "echo a; echo b & echo c & wait", output)
+    lines = output.getvalue().splitlines()
+    assert lines[0] == "a"
+    assert sorted(lines[1:]) == ["b", "c"]
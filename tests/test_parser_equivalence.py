@@ -0,0 +1,114 @@
+"""
+Tests that the descent parser builds the same AST as the Earley parser
+over grammar.lark, and rejects the same commands.
+"""
+
+import random
+import pytest
+from core.error_handling import ParseError
+from core.shell_parser.ast_nodes import to_dict
+from core.shell_parser.parser import parse_command
+
+VALID_COMMANDS = [
+    "echo",
+    "echo hello world",
+    "  echo   padded  ",
+    "echo\ta\tb",
+    "echo a\nb",
+    "echo 'single quoted' \"double quoted\"",
+    "echo ''",
+    'echo ""',
+    "echo a'b'\"c\"d",
+    'echo "a `echo b` c"',
+    'echo "`echo a``echo b`"',
+    "echo `echo nested`",
+    "echo $x",
+    "echo $x$y",
+    "echo $",
+    "echo a$x",
+    'echo "$x"',
+    "echo *.py dir/*",
+    "cat < in.txt",
+    "< in.txt cat",
+    "cat <in.txt >out.txt",
+    "echo a > out.txt",
+    "echo a >> out.txt",
+    "> out.txt echo a",
+    "echo a > 'quoted name'",
+    "cat a | grep b",
+    "cat a|grep b|sort|uniq|head -n 5",
+    "cat < a | sort > b",
+    "echo a; echo b",
+    "echo a;echo b;echo c",
+    "echo a ; cat b | wc -l ; echo c",
+    "echo a &",
+    "sleep 1 & echo b",
+    "cat a | sort & cat b | sort &",
+    "sleep 1 & sleep 2 & wait",
+    "echo a; sleep 1 &",
+    "echo a & ; echo b",
+    "grep -v '^#' config | cut -b 1-10 | sort -r | uniq",
+    "find . -name '*.py' | xargs wc -l",
+]
+
+INVALID_COMMANDS = [
+    "",
+    "   ",
+    ";",
+    "echo a;",
+    "; echo a",
+    "echo a |",
+    "| grep a",
+    "echo a || grep b",
+    "echo a ;; echo b",
+    "&",
+    "echo a && echo b",
+    "echo >",
+    "cat <",
+    "echo 'unterminated",
+    'echo "unterminated',
+    "echo `unterminated",
+    "echo ``",
+    "echo a > > b",
+    "echo a>out.txt",
+]
+
+# pieces of random commands, mixing valid and invalid syntax
+ALPHABET = ["a", "b", "x y", " ", "  ", "\t", "\n", ";", "|", ">", ">>",
+            "<", "&", "$", "$v", '"', "'", "`", "*", "echo", '"a`b`c"',
+            "'q w'", "`c`", "/", "-n", '""']
+
+
+def parse(command: str, backend: str):
+    """
+    Get the dict form of the AST of the command, None if it is invalid.
+    """
+    try:
+        return to_dict(parse_command(command, backend))
+    except ParseError:
+        return None
+
+
+@pytest.mark.parametrize("command", VALID_COMMANDS)
+def test_valid_command(command):
+    ast = parse(command, "earley")
+    assert ast is not None
+    assert parse(command, "descent") == ast
+
+
+@pytest.mark.parametrize("command", INVALID_COMMANDS)
+def test_invalid_command(command):
+    assert parse(command, "earley") is None
+    assert parse(command, "descent") is None
+
+
+@pytest.mark.parametrize("seed", range(2))
+def test_random_commands(seed):
+    generator = random.Random(seed)
+    mismatches = []
+    for _ in range(200):
+        command = "".join(generator.choice(ALPHABET)
+                          for _ in range(generator.randint(0, 10)))
+        if parse(command, "descent") != parse(command, "earley"):
+            mismatches.append(command)
+    assert mismatches == []
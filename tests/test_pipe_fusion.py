@@ -0,0 +1,98 @@
+"""
+Tests that the fused pipes write the same output, and raise the same
+errors, as the pipes of the apps they replace.
+"""
+
+import io
+import pytest
+from core import pipe_fusion
+from core.api import create_shell_engine
+
+FILES = {
+    "lines": "b\na\nc\na\nb\nab\n",
+    "no-newline": "b\na\nc\na\nb\nab",
+    "empty": "",
+    "missing": None,
+}
+
+# the commands of each fusion rule, {} is the file
+COMMANDS = [
+    # grep | head
+    "grep a {} | head -n 2",
+    "grep b {} | head",
+    "cat {} | grep a | head -n 1",
+    "grep '(' {} | head -n 1",
+    # sort | head
+    "sort {} | head -n 2",
+    "sort -r {} | head -n 3",
+    "cat {} | sort | head -n 1",
+    # sort | uniq
+    "sort {} | uniq",
+    "cat {} | sort -r | uniq",
+    # cat | wc -l
+    "cat {} | wc -l",
+    "cat {} {} | wc -l",
+    "cat {} | cat | wc -l",
+    "cat {} {}.missing | wc -l",
+    # cut | sort | uniq
+    "cut -b 1 {} | sort | uniq",
+    "cat {} | cut -b 2 | sort -r | uniq",
+    "cut -b x {} | sort | uniq",
+]
+
+
+def run(command: str, **kwargs) -> tuple:
+    """
+    Get the output of the command and the error it raised.
+    """
+    engine = create_shell_engine(**kwargs)
+    output = io.StringIO()
+    try:
+        engine._eval_command(command, None, output)
+    except Exception as e:
+        return output.getvalue(), type(e), str(e)
+    return output.getvalue(), None, None
+
+
+@pytest.fixture
+def fused_calls(monkeypatch):
+    calls = []
+    call = pipe_fusion.FusedStage.__call__
+
+    def counted_call(self, context):
+        calls.append(type(self.app).__name__)
+        return call(self, context)
+    monkeypatch.setattr(pipe_fusion.FusedStage, "__call__", counted_call)
+    return calls
+
+
+@pytest.mark.parametrize("pipeline_mode", ["sequential", "streaming"])
+@pytest.mark.parametrize("bytes_mode", [False, True],
+                         ids=["text", "bytes"])
+@pytest.mark.parametrize("file", FILES)
+@pytest.mark.parametrize("command", COMMANDS)
+def test_fused_pipe_is_unchanged(tmp_path, fused_calls, command, file,
+                                 pipeline_mode, bytes_mode):
+    path = tmp_path / f"{file}.txt"
+    if FILES[file] is not None:
+        path.write_text(FILES[file])
+    command = command.replace("{}", str(path))
+    unfused = run(command, pipeline_mode=pipeline_mode,
+                  bytes_mode=bytes_mode, pipeline_fusion=False)
+    assert fused_calls == []
+    fused = run(command, pipeline_mode=pipeline_mode, bytes_mode=bytes_mode)
+    assert len(fused_calls) == 1
+    assert fused == unfused
+
+
+@pytest.mark.parametrize("command", [
+    "grep a | head -n 0",
+    "sort | head -n -1",
+    "sort -r | uniq -i",
+    "cat | wc",
+    "cut -b 1 | sort | uniq -i",
+])
+def test_unsupported_arguments_are_not_fused(fused_calls, command):
+    engine = create_shell_engine()
+    engine._eval_command(command, io.StringIO("b\na\n"), io.StringIO())
+    assert fused_calls == []
@@ -0,0 +1,108 @@
+"""
+Tests of the result cache of read-only commands.
+"""
+
+import io
+import os
+import pytest
+from core.api import create_shell_engine, get_result_cache_info
+
+
+class _PipedInput(io.TextIOWrapper):
+    """
+    Standard input of a command reading a pipe, not a terminal.
+    """
+    def isatty(self) -> bool:
+        return False
+
+
+def run(engine, command: str, input_text: str = None) -> str:
+    output = io.StringIO()
+    input_stream = None
+    if input_text is not None:
+        input_stream = _PipedInput(io.BytesIO(input_text.encode()))
+    engine._eval_command(command, input_stream, output)
+    return output.getvalue()
+
+
+@pytest.fixture(params=[
+    {},
+    {"bytes_mode": True},
+    {"pipeline_mode": "streaming"},
+    {"bytes_mode": True, "pipeline_mode": "streaming"},
+], ids=["text", "bytes", "streaming", "bytes-streaming"])
+def engine(request):
+    return create_shell_engine(result_cache_size=1 << 20, **request.param)
+
+
+def test_repeated_command_hits(engine, tmp_path):
+    path = tmp_path / "f.txt"
+    path.write_text("b\na\nb\nc\n")
+    outputs = [run(engine, f"sort {path} | uniq") for _ in range(3)]
+    assert outputs == ["a\nb\nc\n"] * 3
+    info = get_result_cache_info(engine)
+    assert (info["hits"], info["misses"], info["entries"]) == (2, 1, 1)
+
+
+def test_command_reading_input_is_not_stored(engine):
+    assert run(engine, "sort | uniq", "b\na\n") == "a\nb\n"
+    assert run(engine, "sort | uniq", "z\n") == "z\n"
+    assert get_result_cache_info(engine)["entries"] == 0
+
+
+def test_changed_file_is_not_served(engine, tmp_path):
+    path = tmp_path / "f.txt"
+    path.write_text("one\n")
+    assert run(engine, f"cat {path}") == "one\n"
+    # same size, later modification time
+    path.write_text("two\n")
+    stat = path.stat()
+    os.utime(path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 10 ** 9))
+    assert run(engine, f"cat {path}") == "two\n"
+    # other size
+    path.write_text("three\n")
+    assert run(engine, f"cat {path}") == "three\n"
+    info = get_result_cache_info(engine)
+    assert (info["hits"], info["misses"]) == (0, 3)
+
+
+def test_cd_is_not_cached(engine, tmp_path, monkeypatch):
+    for name in ("a", "b"):
+        (tmp_path / name).mkdir()
+        (tmp_path / name / "f.txt").write_text(f"{name}\n")
+    monkeypatch.chdir(tmp_path)
+    assert run(engine, "cd a") == ""
+    assert run(engine, "cat f.txt") == "a\n"
+    assert run(engine, "cd ../b") == ""
+    assert run(engine, "cat f.txt") == "b\n"
+    info = get_result_cache_info(engine)
+    assert (info["bypasses"], info["hits"]) == (2, 0)
+
+
+def test_variables_are_not_cached(engine):
+    for value in ("1", "2"):
+        assert run(engine, f"set x {value}") == ""
+        assert run(engine, "echo $x") == f"{value}\n"
+    info = get_result_cache_info(engine)
+    assert (info["bypasses"], info["entries"]) == (4, 0)
+
+
+def test_redirection_is_not_cached(engine, tmp_path):
+    path = tmp_path / "out.txt"
+    for _ in range(2):
+        path.unlink(missing_ok=True)
+        assert run(engine, f"echo a > {path}") == ""
+        assert path.read_text() == "a\n"
+    info = get_result_cache_info(engine)
+    assert (info["bypasses"], info["entries"]) == (2, 0)
+
+
+def test_capacity_is_in_bytes(tmp_path):
+    engine = create_shell_engine(result_cache_size=10)
+    # 6 characters, 11 bytes
+    assert run(engine, "echo ééééé") == "ééééé\n"
+    assert get_result_cache_info(engine)["entries"] == 0
+    # 4 characters, 7 bytes
+    assert run(engine, "echo ééé") == "ééé\n"
+    info = get_result_cache_info(engine)
+    assert (info["entries"], info["size"]) == (1, 7)
@@ -0,0 +1,125 @@
+"""
+Tests of tail: the last lines of files read backwards by blocks,
+the input of a pipe, and following a file with -f.
+"""
+
+import io
+import threading
+import time
+import pytest
+from core.api import create_shell_engine
+from core.app_factory import create_app
+from core.apps.basic_apps import Tail
+
+TEXTS = [
+    "",
+    "\n",
+    "one line",
+    "a\nb\nc\n",
+    "a\nb\nc",
+    "\n\nempty\n\n\nlines\n\n",
+    "short\n" + "x" * 50 + "\nlong line\n" + "y" * 20,
+]
+
+
+def run(command: str, **kwargs) -> str:
+    engine = create_shell_engine(**kwargs)
+    output = io.StringIO()
+    engine._eval_command(command, None, output)
+    return output.getvalue()
+
+
+def last_lines(text: str, count: int) -> str:
+    lines = text.splitlines(keepends=True)
+    return "".join(lines[max(len(lines) - count, 0):]) if count > 0 else ""
+
+
+@pytest.fixture(params=[1, 2, 3, 7, 65536])
+def block_size(request, monkeypatch):
+    # small blocks put the line breaks across block boundaries
+    offset = Tail.__dict__["_Tail__last_lines_offset"].__func__
+
+    def last_lines_offset(raw, count):
+        return offset(raw, count, request.param)
+    monkeypatch.setattr(Tail, "_Tail__last_lines_offset",
+                        staticmethod(last_lines_offset))
+    return request.param
+
+
+@pytest.mark.parametrize("bytes_mode", [False, True], ids=["text", "bytes"])
+@pytest.mark.parametrize("count", [0, 1, 2, 3, 5, 100])
+@pytest.mark.parametrize("text", TEXTS)
+def test_last_lines(tmp_path, block_size, bytes_mode, count, text):
+    path = tmp_path / "f.txt"
+    path.write_text(text)
+    assert (run(f"tail -n {count} {path}", bytes_mode=bytes_mode)
+            == last_lines(text, count))
+
+
+def test_large_file(tmp_path):
+    path = tmp_path / "big.txt"
+    text = "".join(f"line {i}\n" for i in range(100000))
+    path.write_text(text)
+    assert run(f"tail {path}") == last_lines(text, 10)
+    assert run(f"tail -n 20000 {path}") == last_lines(text, 20000)
+
+
+@pytest.mark.parametrize("pipeline_mode", ["sequential", "streaming"])
+def test_input_of_pipe(tmp_path, pipeline_mode):
+    path = tmp_path / "f.txt"
+    path.write_text("a\nb\nc\nd\n")
+    assert (run(f"cat {path} | tail -n 2", pipeline_mode=pipeline_mode)
+            == "c\nd\n")
+
+
+class _FollowOutput(io.StringIO):
+    """
+    Output of tail -f, which stops following when it is closed
+    by the test, as the output of a pipe whose reader is gone.
+    """
+    def __init__(self):
+        super().__init__()
+        self.stopped = threading.Event()
+
+    def flush(self):
+        if self.stopped.is_set():
+            raise BrokenPipeError
+
+
+def wait_for(output: _FollowOutput, expected: str, timeout: float = 5):
+    deadline = time.monotonic() + timeout
+    while output.getvalue() != expected:
+        assert time.monotonic() < deadline, output.getvalue()
+        time.sleep(0.01)
+
+
+def test_follow(tmp_path, monkeypatch):
+    monkeypatch.setattr(Tail, "follow_interval", 0.01)
+    path = tmp_path / "f.txt"
+    path.write_text("a\nb\n")
+    output = _FollowOutput()
+    errors = []
+
+    def follow():
+        try:
+            create_app("tail").exec(["-f", "-n", "1", str(path)],
+                                    io.StringIO(), output)
+        except BrokenPipeError:
+            pass
+        except Exception as e:
+            errors.append(e)
+    thread = threading.Thread(target=follow, daemon=True)
+    thread.start()
+    try:
+        wait_for(output, "b\n")
+        with open(path, "a") as f:
+            f.write("c\n")
+        wait_for(output, "b\nc\n")
+        # a truncated file is read again from its start
+        path.write_text("d\n")
+        wait_for(output, "b\nc\nd\n")
+    finally:
+        output.stopped.set()
+        thread.join(5)
+    assert not thread.is_alive()
+    assert errors == []